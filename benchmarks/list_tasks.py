@@ -0,0 +1,101 @@
+"""Micro-benchmark: rows/sec for listing tasks.
+
+Fills a throwaway database with tasks and times three ways of reading them
+back: raw sqlite3 rows, the previous dict + ``Task.from_dict`` decoding, and
+``Database.list_tasks``. Run from the repository root:
+
+    python benchmarks/list_tasks.py [--rows 100000] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notes.database import Database, create_tables  # noqa: E402
+from notes.models import Task  # noqa: E402
+
+
+def populate(db: Database, rows: int):
+    """Insert ``rows`` tasks with a realistic mix of optional fields."""
+    start = datetime(2024, 1, 1)
+    statuses = ('pending', 'in-progress', 'completed', 'cancelled')
+    tasks = []
+    for i in range(rows):
+        created = start + timedelta(minutes=i)
+        status = statuses[i % len(statuses)]
+        tasks.append(Task(
+            title=f'Task {i}',
+            description=f'Description of task {i}' if i % 3 else None,
+            status=status,
+            priority=('low', 'medium', 'high', 'urgent')[i % 4],
+            due_date=created + timedelta(days=7) if i % 2 else None,
+            tags=['work', f'tag{i % 50}'] if i % 5 else [],
+            created_at=created,
+            updated_at=created,
+            completed_at=created + timedelta(days=1) if status == 'completed' else None,
+        ))
+    db.bulk_create_tasks(tasks)
+
+
+def legacy_row_to_task(row) -> Task:
+    """The decoding path list_tasks used before: a dict, then Task.from_dict."""
+    return Task.from_dict({
+        'id': row['id'],
+        'title': row['title'],
+        'description': row['description'],
+        'status': row['status'],
+        'priority': row['priority'],
+        'due_date': row['due_date'],
+        'package_id': row['package_id'],
+        'tags': json.loads(row['tags']) if row['tags'] else [],
+        'created_at': row['created_at'],
+        'updated_at': row['updated_at'],
+        'completed_at': row['completed_at'],
+    })
+
+
+def best_of(repeat: int, run) -> float:
+    """Best wall time of ``repeat`` runs, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, 'bench.sqlite'))
+        conn.row_factory = sqlite3.Row
+        create_tables(conn)
+        db = Database(conn)
+        populate(db, args.rows)
+
+        query = 'SELECT * FROM tasks ORDER BY created_at DESC, id DESC'
+        cases = [
+            ('sqlite3 rows only', lambda: conn.execute(query).fetchall()),
+            ('dict + from_dict', lambda: [legacy_row_to_task(row) for row in conn.execute(query)]),
+            ('Database.list_tasks', lambda: db.list_tasks()),
+        ]
+
+        print(f'Listing {args.rows:,} tasks (best of {args.repeat}):')
+        for name, run in cases:
+            elapsed = best_of(args.repeat, run)
+            print(f'  {name:<20} {elapsed * 1000:8.1f} ms  {args.rows / elapsed:12,.0f} rows/sec')
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""Benchmark: requests/sec for ``notes server`` modes.
+
+Starts the server against a throwaway database in each mode in turn and
+hammers it with concurrent clients (one process each): the ``read``
+workload requests a page of tasks and the stats, the ``write`` workload
+creates a task and then updates it. Run from the repository root:
+
+    python benchmarks/server.py [--workload read|write] [--tasks 5000] [--clients 8] [--seconds 5]
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from notes.database import Database, create_tables  # noqa: E402
+from notes.database.schema import connect_database  # noqa: E402
+from notes.models import Task  # noqa: E402
+
+PATHS = ('/api/tasks?limit=20', '/api/stats')
+
+RUN_CLI = 'import sys; from notes.cli import cli; cli(sys.argv[1:], prog_name="notes")'
+
+
+def modes():
+    """(label, extra ``notes server`` arguments) for each mode worth timing."""
+    cpus = os.cpu_count() or 1
+    result = [
+        ('flask dev server', []),
+        ('builtin, 1 x 8 threads', ['--backend', 'builtin', '--threads', '8']),
+        (f'builtin, {cpus} x 4 threads', ['--backend', 'builtin', '--workers', str(cpus), '--threads', '4', '--preload']),
+        ('async builtin, 8 threads', ['--async', '--backend', 'builtin', '--threads', '8']),
+    ]
+    try:
+        __import__('uvicorn')
+        result.append(('async uvicorn, 8 threads', ['--async', '--backend', 'uvicorn', '--threads', '8']))
+    except ImportError:
+        pass
+    for backend in ('gunicorn', 'waitress'):
+        try:
+            __import__(backend)
+        except ImportError:
+            continue
+        workers = str(cpus) if backend == 'gunicorn' else '1'
+        result.append((f'{backend}, {workers} x 8 threads',
+                       ['--backend', backend, '--workers', workers, '--threads', '8', '--preload']))
+    return result
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(port: int, timeout: float = 15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'server on port {port} did not start')
+
+
+def request(port: int, method: str, path: str, body=None):
+    """Send one request; return the status and decoded JSON body (or None)."""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        conn.request(method, path, json.dumps(body) if body is not None else None, headers)
+        response = conn.getresponse()
+        data = response.read()
+        return response.status, json.loads(data) if data and response.status < 300 else None
+    finally:
+        conn.close()
+
+
+def client(port: int, seconds: float, workload: str):
+    """Issue requests until ``seconds`` have passed; return (succeeded, failed)."""
+    done = failed = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            if workload == 'read':
+                status, _ = request(port, 'GET', PATHS[done % len(PATHS)])
+            else:
+                status, task = request(port, 'POST', '/api/tasks', {'title': f'Load {done}', 'tags': ['load']})
+                if status == 201:
+                    done += 1
+                    status, _ = request(port, 'PUT', f"/api/tasks/{task['id']}", {'status': 'in-progress'})
+        except OSError:
+            status = None
+        if status is not None and status < 300:
+            done += 1
+        else:
+            failed += 1
+    return done, failed
+
+
+def measure(home: str, args, clients: int, seconds: float, workload: str):
+    port = free_port()
+    env = dict(os.environ, HOME=home)
+    proc = subprocess.Popen([sys.executable, '-c', RUN_CLI, 'server', '--port', str(port), '--host', '127.0.0.1', *args],
+                            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up(port)
+        with multiprocessing.Pool(clients) as pool:
+            counts = pool.starmap(client, [(port, seconds, workload)] * clients)
+        return sum(done for done, _ in counts) / seconds, sum(failed for _, failed in counts)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workload', choices=('read', 'write'), default='read')
+    parser.add_argument('--tasks', type=int, default=5000)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home:
+        os.environ['HOME'] = home
+        conn = connect_database()
+        create_tables(conn)
+        Database(conn).bulk_create_tasks(
+            [Task(title=f'Task {i}', tags=[f'tag{i % 20}']) for i in range(args.tasks)]
+        )
+        conn.close()
+
+        print(f'{args.workload} workload, {args.clients} clients for {args.seconds:g}s each, {args.tasks:,} tasks:')
+        for label, extra in modes():
+            rate, failed = measure(home, extra, args.clients, args.seconds, args.workload)
+            print(f'  {label:<28} {rate:10,.0f} requests/sec  {failed:6,} failed')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,313 @@
-from flask import Flask, request, jsonify, send_from_directory, send_file
-from datetime import datetime
+from flask import (
+    Flask, Response, request, jsonify, make_response, send_from_directory, send_file, g, current_app,
+    stream_with_context
+)
+from datetime import datetime, timezone
 from dateutil.parser import parse as parse_date
+from functools import wraps
 import os
+import threading
+import time
+from typing import Callable, List, Optional, TypeVar
+from urllib.parse import urlencode
 
-from ..database import Database
+from ..database import Database, ConnectionPool
+from ..database.writer import WriteQueue
+from ..database.database import next_cursor
 from ..models import Task, Note, Package
+from ..utils.ndjson import dump_ndjson, load_ndjson
+from .events import ChangeWatcher, EVENT_STREAM_HEADERS, requested_revision
 
 
-def create_app():
-    """Create and configure the Flask application."""
+def get_db() -> Database:
+    """Get the database for the current request, reusing a pooled connection."""
+    if 'db' not in g:
+        pool = current_app.extensions['notes_pool']
+        g.db = Database(pool.acquire())
+    return g.db
+
+
+def close_db(exception=None):
+    """Return the request's connection to the pool."""
+    db = g.pop('db', None)
+    if db is not None:
+        current_app.extensions['notes_pool'].release(db.conn)
+
+
+T = TypeVar('T')
+
+# Seconds a client turned away from /api/events should wait before retrying
+STREAM_RETRY_AFTER = 30
+
+# Wrap matches in search snippets; unlike "<mark>", these control characters
+# can't be confused with text the user typed once the GUI escapes a snippet
+SNIPPET_MARKERS = ('\x02', '\x03')
+
+
+def write(fn: Callable[[Database], T]) -> T:
+    """Run ``fn(db)`` on the app's writer thread and return its result once committed.
+    
+    Writes from concurrent requests are committed together instead of
+    contending for SQLite's write lock. An exception raised by ``fn`` undoes
+    only its own writes and is re-raised here.
+    """
+    return current_app.extensions['notes_writer'].run(fn)
+
+
+FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+
+def flag(name: str) -> bool:
+    """Read a boolean query-string flag such as ``?by_package=1``."""
+    return request.args.get(name, '').lower() in ('1', 'true', 'yes', 'on')
+
+
+def page_args() -> dict:
+    """Read limit/offset/cursor pagination parameters from the query string.
+    
+    Raises ValueError for a ``limit`` or ``offset`` that isn't a
+    non-negative integer.
+    """
+    page = {'cursor': request.args.get('cursor')}
+    for name in ('limit', 'offset'):
+        value = request.args.get(name)
+        try:
+            page[name] = int(value) if value is not None else None
+        except ValueError:
+            raise ValueError(f"Invalid {name}: {value}")
+        if page[name] is not None and page[name] < 0:
+            raise ValueError(f"Invalid {name}: {value}")
+    return page
+
+
+def tag_args() -> dict:
+    """Read tag filters: ``?tag=a&tag=b`` or ``?tag=a,b``, plus ``match=all|any``."""
+    tags = [tag for value in request.args.getlist('tag') for tag in value.split(',')]
+    if not tags:
+        return {}
+    return {'tags': tags, 'tag_mode': request.args.get('match', 'all')}
+
+
+def date_args() -> dict:
+    """Read ``due_after``/``due_before``/``completed_since`` dates and ``overdue``."""
+    filters = {'overdue': flag('overdue')}
+    for name in ('due_after', 'due_before', 'completed_since'):
+        value = request.args.get(name)
+        if value:
+            try:
+                filters[name] = parse_date(value)
+            except (ValueError, OverflowError):
+                raise ValueError(f"Invalid {name}: {value}")
+    return filters
+
+
+def field_args() -> Optional[List[str]]:
+    """Read a ``?fields=id,title`` projection from the query string."""
+    fields = request.args.get('fields')
+    if not fields:
+        return None
+    return [name.strip() for name in fields.split(',') if name.strip()]
+
+
+def project(item, fields: Optional[List[str]]) -> dict:
+    """Serialize an item, limited to ``fields`` when given.
+    
+    Only the requested attributes are read, so deferred body columns that
+    weren't asked for are never loaded.
+    """
+    if fields is None:
+        return item.to_dict()
+    data = {}
+    for name in fields:
+        value = getattr(item, name)
+        data[name] = value.isoformat() if isinstance(value, datetime) else value
+    return data
+
+
+def paginated(items, page: dict, serialize=None, keyset: bool = True):
+    """Serialize a page of items, advertising the next page by cursor (or by offset
+    when ``keyset`` is false) in ``Link`` and ``X-Next-*`` headers."""
+    serialize = serialize or (lambda item: item.to_dict())
+    response = jsonify([serialize(item) for item in items])
+    limit = page['limit']
+    if not limit or len(items) < limit:
+        return response
+    
+    args = request.args.to_dict()
+    if keyset:
+        args.pop('offset', None)
+        args['cursor'] = next_cursor(items, limit)
+        response.headers['X-Next-Cursor'] = args['cursor']
+    else:
+        args.pop('cursor', None)
+        args['offset'] = str((page['offset'] or 0) + limit)
+        response.headers['X-Next-Offset'] = args['offset']
+    response.headers['Link'] = f'<{request.path}?{urlencode(args)}>; rel="next"'
+    return response
+
+
+def conditional(*tables: str, clock=False):
+    """Answer conditional GETs from the revisions of ``tables`` before the view runs;
+    ``clock`` (True or a predicate) also ties the validators to the current time."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            db = get_db()
+            # Read the validators before the data: a write landing in between
+            # makes the ETag older than the body, which only costs a refetch
+            revisions = db.table_revisions(tables)
+            etag = '-'.join(str(revisions[table][0]) for table in tables)
+            modified_at = max(modified for _, modified in revisions.values())
+            
+            if clock is True or (callable(clock) and clock()):
+                now = datetime.now()
+                passed, upcoming = db.due_boundaries(now)
+                etag += f'-{now.date().isoformat()}-{upcoming or 0}'
+                changes = [datetime.combine(now.date(), datetime.min.time())]
+                if passed is not None:
+                    # due_epoch treats local times as UTC; undo that
+                    changes.append(datetime.fromtimestamp(passed, timezone.utc).replace(tzinfo=None))
+                modified_at = max(modified_at, int(max(changes).timestamp()))
+            last_modified = datetime.fromtimestamp(modified_at, timezone.utc)
+            
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                # Last-Modified has one-second resolution; a change made
+                # during the current second may not be the last one in it
+                since = request.if_modified_since
+                not_modified = since is not None and last_modified <= since and modified_at < int(time.time())
+            
+            response = Response(status=304) if not_modified else make_response(view(*args, **kwargs))
+            if response.status_code in (200, 304):
+                response.set_etag(etag, weak=True)
+                response.last_modified = last_modified
+                # Let the browser cache, but revalidate on every use
+                response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
+
+
+def task_from_json(data: dict) -> Task:
+    """Build a new Task from a JSON request body."""
+    # Parse due date if provided
+    due_date = None
+    if data.get('due_date'):
+        due_date = parse_date(data['due_date'])
+    
+    return Task(
+        title=data['title'],
+        description=data.get('description'),
+        status=data.get('status', 'pending'),
+        priority=data.get('priority', 'medium'),
+        due_date=due_date,
+        package_id=data.get('package_id'),
+        tags=data.get('tags', [])
+    )
+
+
+def apply_task_json(task: Task, data: dict) -> Task:
+    """Apply the fields present in a JSON request body to a task."""
+    if 'title' in data:
+        task.title = data['title']
+    if 'description' in data:
+        task.description = data['description']
+    if 'status' in data:
+        task.update_status(data['status'])
+    if 'priority' in data:
+        task.priority = data['priority']
+    if 'due_date' in data:
+        task.due_date = parse_date(data['due_date']) if data['due_date'] else None
+    if 'package_id' in data:
+        task.package_id = data['package_id']
+    if 'tags' in data:
+        task.tags = data['tags']
+        
+    task.updated_at = datetime.now()
+    return task
+
+
+def note_from_json(data: dict) -> Note:
+    """Build a new Note from a JSON request body."""
+    return Note(
+        title=data['title'],
+        content=data.get('content', ''),
+        package_id=data.get('package_id'),
+        linked_tasks=data.get('linked_tasks', []),
+        tags=data.get('tags', [])
+    )
+
+
+def apply_note_json(note: Note, data: dict) -> Note:
+    """Apply the fields present in a JSON request body to a note."""
+    if 'title' in data:
+        note.title = data['title']
+    if 'content' in data:
+        note.content = data['content']
+    if 'package_id' in data:
+        note.package_id = data['package_id']
+    if 'linked_tasks' in data:
+        note.linked_tasks = data['linked_tasks']
+    if 'tags' in data:
+        note.tags = data['tags']
+        
+    note.updated_at = datetime.now()
+    return note
+
+
+def package_from_json(data: dict) -> Package:
+    """Build a new Package from a JSON request body."""
+    # Parse due date if provided
+    due_date = None
+    if data.get('due_date'):
+        due_date = parse_date(data['due_date'])
+    
+    return Package(
+        name=data['name'],
+        description=data.get('description'),
+        parent_id=data.get('parent_id'),
+        due_date=due_date,
+        status=data.get('status', 'active')
+    )
+
+
+def apply_package_json(package: Package, data: dict) -> Package:
+    """Apply the fields present in a JSON request body to a package."""
+    if 'name' in data:
+        package.name = data['name']
+    if 'description' in data:
+        package.description = data['description']
+    if 'parent_id' in data:
+        package.parent_id = data['parent_id']
+    if 'due_date' in data:
+        package.due_date = parse_date(data['due_date']) if data['due_date'] else None
+    if 'status' in data:
+        package.update_status(data['status'])
+        
+    package.updated_at = datetime.now()
+    return package
+
+
+def create_app(pool_size: int = 8, max_streams: Optional[int] = None):
+    """Create and configure the Flask application.
+
+    ``pool_size`` is how many idle connections to keep; servers running
+    more request threads than that pass their thread count. Servers that
+    tie up a thread per open ``/api/events`` stream pass ``max_streams``
+    to keep some threads free for other requests.
+    """
     app = Flask(__name__)
     app.config['JSON_SORT_KEYS'] = False
+    
+    # Schema initialization happens once here, not on every request
+    app.extensions['notes_pool'] = ConnectionPool(max_idle=pool_size)
+    # Started by the first /api/events subscriber
+    app.extensions['notes_watcher'] = ChangeWatcher()
+    app.extensions['notes_stream_slots'] = threading.BoundedSemaphore(max_streams) if max_streams is not None else None
+    # All of the app's writes go through one writer thread, started on first use
+    app.extensions['notes_writer'] = WriteQueue()
+    app.teardown_appcontext(close_db)
 
     @app.errorhandler(400)
     def bad_request(error):
@@ -26,21 +323,30 @@ def create_app():
 
     # Task endpoints
     @app.route('/api/tasks', methods=['GET'])
+    @conditional('tasks', clock=lambda: flag('overdue'))
     def get_tasks():
         """Get list of tasks with optional filtering."""
-        with Database() as db:
-            filters = {}
-            
-            # Parse query parameters
-            if request.args.get('status'):
-                filters['status'] = request.args.get('status')
-            if request.args.get('priority'):
-                filters['priority'] = request.args.get('priority')
-            if request.args.get('package_id'):
-                filters['package_id'] = request.args.get('package_id')
-            
-            tasks = db.list_tasks(filters)
-            return jsonify([task.to_dict() for task in tasks])
+        db = get_db()
+        filters = {}
+        
+        # Parse query parameters
+        if request.args.get('status'):
+            filters['status'] = request.args.get('status')
+        if request.args.get('priority'):
+            filters['priority'] = request.args.get('priority')
+        if request.args.get('package_id'):
+            filters['package_id'] = request.args.get('package_id')
+        filters.update(tag_args())
+        
+        fields = field_args()
+        try:
+            page = page_args()
+            filters.update(date_args())
+            order = request.args.get('order', 'newest')
+            tasks = db.list_tasks(filters, fields=fields, order=order, **page)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return paginated(tasks, page, lambda task: project(task, fields), keyset=order == 'newest')
 
     @app.route('/api/tasks', methods=['POST'])
     def create_task():
@@ -49,37 +355,23 @@ def create_app():
         if not data or not data.get('title'):
             return jsonify({'error': 'Title is required'}), 400
             
-        with Database() as db:
-            try:
-                # Parse due date if provided
-                due_date = None
-                if data.get('due_date'):
-                    due_date = parse_date(data['due_date'])
-                
-                task = Task(
-                    title=data['title'],
-                    description=data.get('description'),
-                    status=data.get('status', 'pending'),
-                    priority=data.get('priority', 'medium'),
-                    due_date=due_date,
-                    package_id=data.get('package_id'),
-                    tags=data.get('tags', [])
-                )
-                
-                created_task = db.create_task(task)
-                return jsonify(created_task.to_dict()), 201
-                
-            except Exception as e:
-                return jsonify({'error': str(e)}), 400
+        try:
+            task = task_from_json(data)
+            created_task = write(lambda db: db.create_task(task))
+            return jsonify(created_task.to_dict()), 201
+            
+        except Exception as e:
+            return jsonify({'error': str(e)}), 400
 
     @app.route('/api/tasks/<task_id>', methods=['GET'])
+    @conditional('tasks')
     def get_task(task_id):
         """Get a specific task."""
-        with Database() as db:
-            task = db.get_task(task_id)
-            if not task:
-                return jsonify({'error': 'Task not found'}), 404
-            return jsonify(task.to_dict())
+        db = get_db()
+        task = db.get_task(task_id)
+        if not task:
+            return jsonify({'error': 'Task not found'}), 404
+        return jsonify(task.to_dict())
 
     @app.route('/api/tasks/<task_id>', methods=['PUT'])
     def update_task(task_id):
@@ -88,59 +380,63 @@ def create_app():
         if not data:
             return jsonify({'error': 'No data provided'}), 400
             
-        with Database() as db:
+        def update(db):
             task = db.get_task(task_id)
-            if not task:
-                return jsonify({'error': 'Task not found'}), 404
-                
-            try:
-                # Update fields if provided
-                if 'title' in data:
-                    task.title = data['title']
-                if 'description' in data:
-                    task.description = data['description']
-                if 'status' in data:
-                    task.update_status(data['status'])
-                if 'priority' in data:
-                    task.priority = data['priority']
-                if 'due_date' in data:
-                    task.due_date = parse_date(data['due_date']) if data['due_date'] else None
-                if 'package_id' in data:
-                    task.package_id = data['package_id']
-                if 'tags' in data:
-                    task.tags = data['tags']
-                    
-                task.updated_at = datetime.now()
-                updated_task = db.update_task(task)
-                return jsonify(updated_task.to_dict())
-                
-            except Exception as e:
-                return jsonify({'error': str(e)}), 400
+            return task and db.update_task(apply_task_json(task, data))
+            
+        try:
+            updated_task = write(update)
+        except Exception as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if not updated_task:
+            return jsonify({'error': 'Task not found'}), 404
+        return jsonify(updated_task.to_dict())
 
     @app.route('/api/tasks/<task_id>', methods=['DELETE'])
     def delete_task(task_id):
         """Delete a task."""
-        with Database() as db:
+        def delete(db):
             if not db.get_task(task_id):
-                return jsonify({'error': 'Task not found'}), 404
-                
-            if db.delete_task(task_id):
-                return '', 204
-            else:
-                return jsonify({'error': 'Failed to delete task'}), 500
+                return None
+            return db.delete_task(task_id)
+        
+        deleted = write(delete)
+        if deleted is None:
+            return jsonify({'error': 'Task not found'}), 404
+        if deleted:
+            return '', 204
+        else:
+            return jsonify({'error': 'Failed to delete task'}), 500
+
+    @app.route('/api/tasks/<task_id>/notes', methods=['GET'])
+    @conditional('tasks', 'notes')
+    def get_task_notes(task_id):
+        """Get the notes that link to a task."""
+        db = get_db()
+        if not db.get_task(task_id):
+            return jsonify({'error': 'Task not found'}), 404
+        return jsonify([note.to_dict() for note in db.notes_for_task(task_id)])
 
     # Note endpoints
     @app.route('/api/notes', methods=['GET'])
+    @conditional('notes')
     def get_notes():
         """Get list of notes with optional filtering."""
-        with Database() as db:
-            filters = {}
-            
-            if request.args.get('package_id'):
-                filters['package_id'] = request.args.get('package_id')
-            
-            notes = db.list_notes(filters)
-            return jsonify([note.to_dict() for note in notes])
+        db = get_db()
+        filters = {}
+        
+        if request.args.get('package_id'):
+            filters['package_id'] = request.args.get('package_id')
+        filters.update(tag_args())
+        
+        fields = field_args()
+        try:
+            page = page_args()
+            notes = db.list_notes(filters, fields=fields, **page)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return paginated(notes, page, lambda note: project(note, fields))
 
     @app.route('/api/notes', methods=['POST'])
     def create_note():
@@ -149,30 +445,23 @@ def create_app():
         if not data or not data.get('title'):
             return jsonify({'error': 'Title is required'}), 400
             
-        with Database() as db:
-            try:
-                note = Note(
-                    title=data['title'],
-                    content=data.get('content', ''),
-                    package_id=data.get('package_id'),
-                    linked_tasks=data.get('linked_tasks', []),
-                    tags=data.get('tags', [])
-                )
-                
-                created_note = db.create_note(note)
-                return jsonify(created_note.to_dict()), 201
-                
-            except Exception as e:
-                return jsonify({'error': str(e)}), 400
+        try:
+            note = note_from_json(data)
+            created_note = write(lambda db: db.create_note(note))
+            return jsonify(created_note.to_dict()), 201
+            
+        except Exception as e:
+            return jsonify({'error': str(e)}), 400
 
     @app.route('/api/notes/<note_id>', methods=['GET'])
+    @conditional('notes')
     def get_note(note_id):
         """Get a specific note."""
-        with Database() as db:
-            note = db.get_note(note_id)
-            if not note:
-                return jsonify({'error': 'Note not found'}), 404
-            return jsonify(note.to_dict())
+        db = get_db()
+        note = db.get_note(note_id)
+        if not note:
+            return jsonify({'error': 'Note not found'}), 404
+        return jsonify(note.to_dict())
 
     @app.route('/api/notes/<note_id>', methods=['PUT'])
     def update_note(note_id):
@@ -181,57 +470,71 @@ def create_app():
         if not data:
             return jsonify({'error': 'No data provided'}), 400
             
-        with Database() as db:
+        def update(db):
             note = db.get_note(note_id)
-            if not note:
-                return jsonify({'error': 'Note not found'}), 404
-                
-            try:
-                # Update fields if provided
-                if 'title' in data:
-                    note.title = data['title']
-                if 'content' in data:
-                    note.content = data['content']
-                if 'package_id' in data:
-                    note.package_id = data['package_id']
-                if 'linked_tasks' in data:
-                    note.linked_tasks = data['linked_tasks']
-                if 'tags' in data:
-                    note.tags = data['tags']
-                    
-                note.updated_at = datetime.now()
-                updated_note = db.update_note(note)
-                return jsonify(updated_note.to_dict())
-                
-            except Exception as e:
-                return jsonify({'error': str(e)}), 400
+            return note and db.update_note(apply_note_json(note, data))
+            
+        try:
+            updated_note = write(update)
+        except Exception as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if not updated_note:
+            return jsonify({'error': 'Note not found'}), 404
+        return jsonify(updated_note.to_dict())
 
     @app.route('/api/notes/<note_id>', methods=['DELETE'])
     def delete_note(note_id):
         """Delete a note."""
-        with Database() as db:
+        def delete(db):
             if not db.get_note(note_id):
-                return jsonify({'error': 'Note not found'}), 404
-                
-            if db.delete_note(note_id):
-                return '', 204
-            else:
-                return jsonify({'error': 'Failed to delete note'}), 500
+                return None
+            return db.delete_note(note_id)
+        
+        deleted = write(delete)
+        if deleted is None:
+            return jsonify({'error': 'Note not found'}), 404
+        if deleted:
+            return '', 204
+        else:
+            return jsonify({'error': 'Failed to delete note'}), 500
+
+    @app.route('/api/notes/<note_id>/tasks', methods=['GET'])
+    @conditional('tasks', 'notes')
+    def get_note_tasks(note_id):
+        """Get the tasks a note links to."""
+        db = get_db()
+        if not db.get_note(note_id):
+            return jsonify({'error': 'Note not found'}), 404
+        return jsonify([task.to_dict() for task in db.tasks_for_note(note_id)])
 
     # Package endpoints
     @app.route('/api/packages', methods=['GET'])
+    @conditional('packages', 'tasks', 'notes')
     def get_packages():
         """Get list of packages with optional filtering."""
-        with Database() as db:
-            filters = {}
-            
-            if request.args.get('status'):
-                filters['status'] = request.args.get('status')
-            if request.args.get('parent_id'):
-                filters['parent_id'] = request.args.get('parent_id')
-            
-            packages = db.list_packages(filters)
-            return jsonify([pkg.to_dict() for pkg in packages])
+        db = get_db()
+        filters = {}
+        
+        if request.args.get('status'):
+            filters['status'] = request.args.get('status')
+        if request.args.get('parent_id'):
+            filters['parent_id'] = request.args.get('parent_id')
+        
+        fields = field_args()
+        try:
+            page = page_args()
+            packages = db.list_packages(filters, fields=fields, **page)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if not flag('rollup'):
+            return paginated(packages, page, lambda pkg: project(pkg, fields))
+        
+        # Subtree task/note counts and progress for the whole page in one query
+        rollups = db.package_rollups(pkg.id for pkg in packages)
+        return paginated(packages, page,
+                         lambda pkg: dict(project(pkg, fields), rollup=rollups.get(pkg.id)))
 
     @app.route('/api/packages', methods=['POST'])
     def create_package():
@@ -240,46 +543,62 @@ def create_app():
         if not data or not data.get('name'):
             return jsonify({'error': 'Name is required'}), 400
             
-        with Database() as db:
-            try:
-                # Parse due date if provided
-                due_date = None
-                if data.get('due_date'):
-                    due_date = parse_date(data['due_date'])
-                
-                package = Package(
-                    name=data['name'],
-                    description=data.get('description'),
-                    parent_id=data.get('parent_id'),
-                    due_date=due_date,
-                    status=data.get('status', 'active')
-                )
-                
-                created_package = db.create_package(package)
-                return jsonify(created_package.to_dict()), 201
-                
-            except Exception as e:
-                return jsonify({'error': str(e)}), 400
+        try:
+            package = package_from_json(data)
+            created_package = write(lambda db: db.create_package(package))
+            return jsonify(created_package.to_dict()), 201
+            
+        except Exception as e:
+            return jsonify({'error': str(e)}), 400
 
     @app.route('/api/packages/<package_id>', methods=['GET'])
+    @conditional('packages', 'tasks', 'notes')
     def get_package(package_id):
         """Get a specific package with its contents."""
-        with Database() as db:
-            package = db.get_package(package_id)
-            if not package:
-                return jsonify({'error': 'Package not found'}), 404
-                
-            # Get tasks and notes in this package
-            tasks = db.list_tasks({'package_id': package_id})
-            notes = db.list_notes({'package_id': package_id})
-            child_packages = db.list_packages({'parent_id': package_id})
-            
-            result = package.to_dict()
-            result['tasks'] = [task.to_dict() for task in tasks]
-            result['notes'] = [note.to_dict() for note in notes]
-            result['child_packages'] = [pkg.to_dict() for pkg in child_packages]
+        db = get_db()
+        package = db.get_package(package_id)
+        if not package:
+            return jsonify({'error': 'Package not found'}), 404
             
-            return jsonify(result)
+        # Get tasks and notes in this package
+        tasks = db.list_tasks({'package_id': package_id})
+        notes = db.list_notes({'package_id': package_id})
+        child_packages = db.list_packages({'parent_id': package_id})
+        
+        result = package.to_dict()
+        result['tasks'] = [task.to_dict() for task in tasks]
+        result['notes'] = [note.to_dict() for note in notes]
+        result['child_packages'] = [pkg.to_dict() for pkg in child_packages]
+        result['rollup'] = db.package_rollup(package_id)
+        
+        return jsonify(result)
+
+    @app.route('/api/packages/<package_id>/tree', methods=['GET'])
+    @conditional('packages', 'tasks', 'notes')
+    def get_package_tree(package_id):
+        """Get a package and all of its descendants, each with its subtree rollup."""
+        db = get_db()
+        packages = db.get_package_tree(package_id)
+        if not packages:
+            return jsonify({'error': 'Package not found'}), 404
+        
+        rollups = db.package_rollups(pkg.id for pkg in packages)
+        return jsonify([dict(pkg.to_dict(), rollup=rollups.get(pkg.id)) for pkg in packages])
+
+    @app.route('/api/packages/<package_id>/archive', methods=['POST'])
+    def archive_package(package_id):
+        """Archive a package and, unless ``?cascade=0``, all of its descendants."""
+        cascade = request.args.get('cascade', '1').lower() not in FALSE_VALUES
+        
+        def archive(db):
+            if not db.get_package(package_id):
+                return None
+            return db.archive_package(package_id, cascade=cascade)
+        
+        archived = write(archive)
+        if archived is None:
+            return jsonify({'error': 'Package not found'}), 404
+        return jsonify({'archived': archived})
 
     @app.route('/api/packages/<package_id>', methods=['PUT'])
     def update_package(package_id):
@@ -288,95 +607,230 @@ def create_app():
         if not data:
             return jsonify({'error': 'No data provided'}), 400
             
-        with Database() as db:
+        def update(db):
             package = db.get_package(package_id)
-            if not package:
-                return jsonify({'error': 'Package not found'}), 404
-                
-            try:
-                # Update fields if provided
-                if 'name' in data:
-                    package.name = data['name']
-                if 'description' in data:
-                    package.description = data['description']
-                if 'parent_id' in data:
-                    package.parent_id = data['parent_id']
-                if 'due_date' in data:
-                    package.due_date = parse_date(data['due_date']) if data['due_date'] else None
-                if 'status' in data:
-                    package.update_status(data['status'])
-                    
-                package.updated_at = datetime.now()
-                updated_package = db.update_package(package)
-                return jsonify(updated_package.to_dict())
-                
-            except Exception as e:
-                return jsonify({'error': str(e)}), 400
+            return package and db.update_package(apply_package_json(package, data))
+            
+        try:
+            updated_package = write(update)
+        except Exception as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if not updated_package:
+            return jsonify({'error': 'Package not found'}), 404
+        return jsonify(updated_package.to_dict())
 
     @app.route('/api/packages/<package_id>', methods=['DELETE'])
     def delete_package(package_id):
-        """Delete a package."""
-        with Database() as db:
+        """Delete a package with its sub-packages, tasks and notes.
+        
+        ``?cascade=0`` deletes only the package, detaching its contents.
+        """
+        cascade = request.args.get('cascade', '1').lower() not in FALSE_VALUES
+        
+        def delete(db):
             if not db.get_package(package_id):
-                return jsonify({'error': 'Package not found'}), 404
-                
-            if db.delete_package(package_id):
-                return '', 204
-            else:
-                return jsonify({'error': 'Failed to delete package'}), 500
+                return None
+            return db.delete_package(package_id, cascade=cascade)
+        
+        deleted = write(delete)
+        if deleted is None:
+            return jsonify({'error': 'Package not found'}), 404
+        if deleted:
+            return '', 204
+        else:
+            return jsonify({'error': 'Failed to delete package'}), 500
+
+    # Batch endpoint
+    @app.route('/api/batch', methods=['POST'])
+    def batch():
+        """Create, update and delete many items in one transaction.
+        
+        The body may contain ``create``, ``update`` and ``delete`` sections,
+        each keyed by ``tasks``, ``notes`` and ``packages``. Creates take item
+        objects, updates take objects with an ``id`` plus the fields to change,
+        and deletes take lists of IDs. Packages are deleted with their contents
+        unless ``delete`` has ``"cascade": false``, as with DELETE
+        /api/packages/<id>. Nothing is written if any item fails.
+        """
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        
+        create = data.get('create', {})
+        update = data.get('update', {})
+        delete = data.get('delete', {})
+        
+        required = {'tasks': 'title', 'notes': 'title', 'packages': 'name'}
+        for kind, field in required.items():
+            if any(not item.get(field) for item in create.get(kind, [])):
+                return jsonify({'error': f'{field.capitalize()} is required for {kind}'}), 400
+        
+        appliers = {'tasks': apply_task_json, 'notes': apply_note_json, 'packages': apply_package_json}
+        
+        def apply(db):
+            loaders = {'tasks': db.get_task, 'notes': db.get_note, 'packages': db.get_package}
+            created = {
+                'packages': db.bulk_create_packages(package_from_json(item) for item in create.get('packages', [])),
+                'tasks': db.bulk_create_tasks(task_from_json(item) for item in create.get('tasks', [])),
+                'notes': db.bulk_create_notes(note_from_json(item) for item in create.get('notes', []))
+            }
+            
+            updated = {}
+            for kind in ('packages', 'tasks', 'notes'):
+                updated[kind] = []
+                for item in update.get(kind, []):
+                    existing = loaders[kind](item.get('id', ''))
+                    if not existing:
+                        raise LookupError(f"{kind[:-1].capitalize()} {item.get('id')} not found")
+                    updated[kind].append(appliers[kind](existing, item))
+            db.bulk_update(updated['packages'] + updated['tasks'] + updated['notes'])
+            
+            deleted = db.bulk_delete(
+                task_ids=delete.get('tasks', []),
+                note_ids=delete.get('notes', []),
+                package_ids=delete.get('packages', []),
+                cascade=bool(delete.get('cascade', True))
+            )
+            return created, updated, deleted
+        
+        try:
+            # The writer runs each request in its own savepoint, so a failure writes nothing
+            created, updated, deleted = write(apply)
+        except LookupError as e:
+            return jsonify({'error': str(e)}), 404
+        except Exception as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            'created': {kind: [item.to_dict() for item in items] for kind, items in created.items()},
+            'updated': {kind: [item.to_dict() for item in items] for kind, items in updated.items()},
+            'deleted': deleted
+        })
+
+    # Export/import endpoints
+    @app.route('/api/export', methods=['GET'])
+    @conditional('packages', 'tasks', 'notes')
+    def export_data():
+        """Stream the whole database as newline-delimited JSON."""
+        db = get_db()
+        # stream_with_context keeps the pooled connection until the last row is sent
+        return Response(
+            stream_with_context(dump_ndjson(db.export_records())),
+            mimetype='application/x-ndjson',
+            headers={'Content-Disposition': 'attachment; filename=notes-export.ndjson'}
+        )
+
+    @app.route('/api/import', methods=['POST'])
+    def import_data():
+        """Insert or update records from a newline-delimited JSON request body."""
+        db = get_db()
+        try:
+            counts = db.import_records(load_ndjson(request.stream), write=current_app.extensions['notes_writer'].run)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({'imported': counts})
 
     # Search endpoint
     @app.route('/api/search', methods=['GET'])
+    @conditional('tasks', 'notes', 'packages')
     def search():
         """Global search across tasks, notes, and packages."""
         query = request.args.get('q')
         if not query:
             return jsonify({'error': 'Query parameter q is required'}), 400
             
-        with Database() as db:
-            results = db.search(query)
+        limit = request.args.get('limit', 50, type=int)
             
-            # Convert objects to dictionaries
-            return jsonify({
-                'tasks': [task.to_dict() for task in results['tasks']],
-                'notes': [note.to_dict() for note in results['notes']],
-                'packages': [pkg.to_dict() for pkg in results['packages']]
-            })
+        db = get_db()
+        # The GUI escapes the snippet, then turns just these markers into <mark>
+        results = db.search(query, limit=limit, highlight=SNIPPET_MARKERS)
+        snippets = results['snippets']
+        
+        # Convert objects to dictionaries, attaching the highlighted excerpt
+        def with_snippet(item):
+            data = item.to_dict()
+            data['snippet'] = snippets.get(item.id)
+            return data
+        
+        return jsonify({
+            'tasks': [with_snippet(task) for task in results['tasks']],
+            'notes': [with_snippet(note) for note in results['notes']],
+            'packages': [with_snippet(pkg) for pkg in results['packages']]
+        })
+
+    # Tag cloud endpoint
+    @app.route('/api/tags', methods=['GET'])
+    @conditional('tasks', 'notes')
+    def get_tags():
+        """Get every tag with its usage count, most used first."""
+        db = get_db()
+        try:
+            counts = db.tag_counts(request.args.get('kind'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify([{'name': name, 'count': count} for name, count in counts])
 
     # Stats endpoint for dashboard
     @app.route('/api/stats', methods=['GET'])
+    @conditional('tasks', 'notes', 'packages', clock=True)
     def get_stats():
-        """Get dashboard statistics."""
-        with Database() as db:
-            # Get counts by status
-            all_tasks = db.list_tasks()
-            all_notes = db.list_notes()
-            all_packages = db.list_packages()
-            
-            task_stats = {
-                'total': len(all_tasks),
-                'pending': len([t for t in all_tasks if t.status == 'pending']),
-                'in_progress': len([t for t in all_tasks if t.status == 'in-progress']),
-                'completed': len([t for t in all_tasks if t.status == 'completed']),
-                'cancelled': len([t for t in all_tasks if t.status == 'cancelled'])
-            }
-            
-            note_stats = {
-                'total': len(all_notes)
-            }
-            
-            package_stats = {
-                'total': len(all_packages),
-                'active': len([p for p in all_packages if p.status == 'active']),
-                'completed': len([p for p in all_packages if p.status == 'completed']),
-                'archived': len([p for p in all_packages if p.status == 'archived'])
-            }
-            
-            return jsonify({
-                'tasks': task_stats,
-                'notes': note_stats,
-                'packages': package_stats
-            })
+        """Get dashboard statistics, optionally broken down by package and priority."""
+        db = get_db()
+        stats = db.get_stats(
+            by_package=flag('by_package'),
+            by_priority=flag('by_priority')
+        )
+        return jsonify(stats)
+
+    # Delta sync
+    @app.route('/api/changes', methods=['GET'])
+    @conditional('tasks', 'notes', 'packages')
+    def get_changes():
+        """Get items inserted, updated or deleted after revision ``?since=N``.
+
+        Without ``since`` only the current revision is returned, to start
+        syncing from.
+        """
+        db = get_db()
+        since = request.args.get('since')
+        if since is None:
+            return jsonify({'revision': db.current_revision()})
+        try:
+            since = int(since)
+        except ValueError:
+            return jsonify({'error': 'since must be a revision number'}), 400
+
+        changes = db.changes_since(since)
+        return jsonify({
+            'revision': changes['revision'],
+            'tasks': [task.to_dict() for task in changes['tasks']],
+            'notes': [note.to_dict() for note in changes['notes']],
+            'packages': [pkg.to_dict() for pkg in changes['packages']],
+            'deleted': changes['deleted']
+        })
+
+    @app.route('/api/events', methods=['GET'])
+    def get_events():
+        """Stream a Server-Sent ``change`` event with the new revision whenever data changes.
+        
+        Clients fetch the changes themselves from ``/api/changes``. The stream
+        holds no database connection while it waits, but it does hold a
+        request thread, so with ``max_streams`` set the streams beyond it
+        get a 503.
+        """
+        revision = requested_revision(request.headers.get('Last-Event-ID'), request.args.get('since'))
+        watcher = current_app.extensions['notes_watcher']
+        slots = current_app.extensions['notes_stream_slots']
+        if slots is not None and not slots.acquire(blocking=False):
+            response = jsonify({'error': 'Too many open event streams'})
+            response.status_code = 503
+            response.headers['Retry-After'] = str(STREAM_RETRY_AFTER)
+            return response
+        response = Response(watcher.events(revision), mimetype='text/event-stream', headers=EVENT_STREAM_HEADERS)
+        if slots is not None:
+            response.call_on_close(slots.release)
+        return response
 
     # Serve static files for GUI
     @app.route('/')
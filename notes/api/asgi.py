@@ -0,0 +1,307 @@
+import asyncio
+import contextvars
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote
+
+from .events import EVENT_STREAM_HEADERS, requested_revision
+
+
+# Bytes of a streamed response (e.g. an export) to collect per executor call
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class AsgiApp:
+    """Serve the Flask app to an ASGI server.
+
+    Requests run the Flask views on a bounded pool of threads, so the event
+    loop never blocks on SQLite or JSON encoding; the views hand their
+    writes to the app's WriteQueue. Long-lived responses don't hold a
+    thread while they wait: ``/api/events`` is served natively on the event
+    loop, and streamed responses such as ``/api/export`` only borrow a
+    thread to produce each chunk.
+    """
+
+    def __init__(self, wsgi_app, threads: int = 8):
+        self.wsgi_app = wsgi_app
+        self.threads = threads
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            if scope['path'] == '/api/events' and scope['method'] == 'GET':
+                await self._events(scope, receive, send)
+            else:
+                await self._wsgi(scope, receive, send)
+
+    def close(self):
+        """Shut down the executor threads and finish the queued writes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self.wsgi_app.extensions['notes_writer'].close()
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _wsgi(self, scope, receive, send):
+        """Run the request through the WSGI app on an executor thread."""
+        body = await _read_body(receive)
+        environ = _environ(scope, body)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='notes-request')
+        executor = self._executor
+        # Flask keeps the request in context variables; run every step of
+        # the request, including the streamed chunks, in the same context
+        context = contextvars.copy_context()
+
+        pending = None
+
+        def call(fn, *args):
+            nonlocal pending
+            pending = executor.submit(context.run, fn, *args)
+            return asyncio.wrap_future(pending)
+
+        started: List[Tuple[str, list]] = []
+
+        def start_response(status, headers, exc_info=None):
+            started[:] = [(status, headers)]
+            return lambda data: None
+
+        def first_chunk():
+            iterable = self.wsgi_app(environ, start_response)
+            chunks = iter(iterable)
+            return iterable, chunks, _next_chunk(chunks)
+
+        iterable, chunks, (chunk, more) = await call(first_chunk)
+        try:
+            status, headers = started[0]
+            await send({
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+            })
+
+            async def stream():
+                nonlocal chunk, more
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': more})
+                while more:
+                    chunk, more = await call(_next_chunk, chunks)
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': more})
+
+            if more:
+                await _until_disconnect(stream(), receive)
+            else:
+                await stream()
+        finally:
+            if not pending.done():
+                # The client left mid-chunk; let the thread finish with the iterator first
+                await asyncio.wait([asyncio.wrap_future(pending)])
+            if hasattr(iterable, 'close'):
+                # Ends Flask's request context, returning the pooled connection
+                await call(iterable.close)
+
+    async def _events(self, scope, receive, send):
+        """Serve the change event stream without tying up a thread."""
+        await _read_body(receive)
+        headers = dict(scope['headers'])
+        since = parse_qs(scope['query_string'].decode('latin-1')).get('since', [None])[0]
+        revision = requested_revision(headers.get(b'last-event-id', b'').decode('latin-1'), since)
+        watcher = self.wsgi_app.extensions['notes_watcher']
+
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(b'content-type', b'text/event-stream; charset=utf-8')] + [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in EVENT_STREAM_HEADERS.items()
+            ],
+        })
+
+        async def stream():
+            events = watcher.async_events(revision)
+            try:
+                async for event in events:
+                    await send({'type': 'http.response.body', 'body': event.encode('utf-8'), 'more_body': True})
+            finally:
+                await events.aclose()
+
+        await _until_disconnect(stream(), receive)
+
+
+async def _read_body(receive) -> bytes:
+    body = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        body.append(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    return b''.join(body)
+
+
+async def _until_disconnect(stream, receive):
+    """Run ``stream`` until it finishes or the client goes away."""
+    async def disconnected():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    tasks = [asyncio.ensure_future(stream), asyncio.ensure_future(disconnected())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+    for task in done:
+        if not task.cancelled() and task.exception() is not None:
+            raise task.exception()
+
+
+def _next_chunk(chunks) -> Tuple[bytes, bool]:
+    """Collect up to STREAM_CHUNK_SIZE bytes; return them and whether more follow."""
+    parts = []
+    size = 0
+    for part in chunks:
+        parts.append(part)
+        size += len(part)
+        if size >= STREAM_CHUNK_SIZE:
+            return b''.join(parts), True
+    return b''.join(parts), False
+
+
+def _environ(scope, body: bytes) -> dict:
+    """Build a WSGI environ for an ASGI HTTP scope."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': client[0],
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'CONTENT_LENGTH':
+            key = f'HTTP_{name}'
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+def serve_asgi(app: Callable, host: str, port: int):
+    """Serve an ASGI app with a minimal HTTP/1.1 server on asyncio.
+
+    The pure-Python fallback for when uvicorn isn't installed: one request
+    per connection, request bodies need a Content-Length, and responses
+    without one end when the connection closes.
+    """
+    async def main():
+        server = await asyncio.start_server(
+            lambda reader, writer: _handle_connection(app, reader, writer), host, port, backlog=128
+        )
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if hasattr(app, 'close'):
+            app.close()
+
+
+async def _handle_connection(app: Callable, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        request_line = await reader.readline()
+        if not request_line:
+            return
+        method, target, version = request_line.decode('latin-1').rstrip('\r\n').split(' ', 2)
+        headers = []
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers.append((name.strip().lower().encode('latin-1'), value.strip().encode('latin-1')))
+
+        length = int(dict(headers).get(b'content-length', b'0'))
+        body = await reader.readexactly(length) if length else b''
+        path, _, query = target.partition('?')
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': version.partition('/')[2],
+            'method': method.upper(),
+            'scheme': 'http',
+            'path': unquote(path),
+            'raw_path': path.encode('latin-1'),
+            'query_string': query.encode('latin-1'),
+            'root_path': '',
+            'headers': headers,
+            'client': writer.get_extra_info('peername')[:2],
+            'server': writer.get_extra_info('sockname')[:2],
+        }
+
+        body_received = False
+
+        async def receive():
+            nonlocal body_received
+            if not body_received:
+                body_received = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            # Nothing more is read from the connection until the client closes it
+            await reader.read()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                try:
+                    reason = HTTPStatus(status).phrase
+                except ValueError:
+                    reason = ''
+                lines = [f'HTTP/1.1 {status} {reason}\r\n'.encode('latin-1')]
+                lines += [name + b': ' + value + b'\r\n' for name, value in message.get('headers', [])]
+                lines.append(b'Connection: close\r\n\r\n')
+                writer.write(b''.join(lines))
+            elif message['type'] == 'http.response.body':
+                writer.write(message.get('body', b''))
+                await writer.drain()
+
+        await app(scope, receive, send)
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    except asyncio.CancelledError:
+        # Server shutdown with the connection still open (e.g. an event
+        # stream); nothing awaits this task, so just end it
+        pass
+    finally:
+        writer.close()
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import threading
+from typing import AsyncIterator, Callable, Iterator, List, Optional
+
+from ..database import Database
+from ..database.database import add_commit_listener, remove_commit_listener
+from ..database.schema import connect_database
+from ..utils.forks import ForkSafe
+
+
+# Seconds between checks for commits made by other processes
+POLL_INTERVAL = 1.0
+
+# Seconds between keep-alive comments on an idle event stream
+HEARTBEAT_INTERVAL = 15.0
+
+EVENT_STREAM_HEADERS = {
+    'Cache-Control': 'no-cache',
+    # Don't let a reverse proxy hold events back
+    'X-Accel-Buffering': 'no'
+}
+
+
+def requested_revision(last_event_id: Optional[str], since: Optional[str]) -> Optional[int]:
+    """The revision a client last saw, from ``Last-Event-ID`` or ``?since``."""
+    last_seen = last_event_id or since
+    try:
+        return int(last_seen) if last_seen else None
+    except ValueError:
+        return None
+
+
+def change_event(revision: int) -> str:
+    """Format a ``change`` event for ``revision``."""
+    return f'id: {revision}\nevent: change\ndata: {json.dumps({"revision": revision})}\n\n'
+
+
+class ChangeWatcher(ForkSafe):
+    """Watch the database for changes and wake the event streams waiting on them.
+
+    One background thread with its own connection checks ``PRAGMA
+    data_version``, which moves whenever any other connection commits (in
+    this process or another, such as the CLI), and reads the revision only
+    when it did. Writes committed through Database in this process wake the
+    thread at once; other processes' writes are seen within POLL_INTERVAL.
+    The thread only polls while someone is subscribed. A watcher created
+    before a fork (``notes server --preload``) starts afresh in each worker.
+    """
+
+    def __init__(self, interval: float = POLL_INTERVAL):
+        super().__init__()
+        self.interval = interval
+        self.revision: Optional[int] = None
+        self._changed = threading.Condition()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._subscribers = 0
+        self._callbacks: List[Callable[[], None]] = []
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def start(self):
+        """Start the watcher thread if it isn't running yet."""
+        self._check_fork()
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name='notes-change-watcher', daemon=True)
+            self._thread.start()
+            add_commit_listener(self._wake.set)
+
+    def _after_fork(self):
+        # Threads don't survive a fork; neither does state guarded by them
+        self.__init__(self.interval)
+
+    def stop(self):
+        """Stop the watcher thread and wait for it to exit."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is None:
+                return
+            self._stopped = True
+            remove_commit_listener(self._wake.set)
+        self._wake.set()
+        thread.join()
+
+    def wait_for_change(self, revision: Optional[int], timeout: float) -> Optional[int]:
+        """Wait up to ``timeout`` seconds for a revision other than ``revision``.
+
+        Returns the current revision, which equals ``revision`` on timeout.
+        """
+        with self._changed:
+            self._changed.wait_for(
+                lambda: self.revision is not None and self.revision != revision, timeout
+            )
+            return self.revision
+
+    def events(self, revision: Optional[int] = None) -> Iterator[str]:
+        """Yield Server-Sent Events: a ``change`` event for each new revision.
+
+        ``revision`` is the last one the client has seen (e.g. from
+        ``Last-Event-ID``); a client that is behind, or passes None, gets
+        the current revision straight away.
+        """
+        self._subscribe()
+        try:
+            yield self._retry_line()
+            while True:
+                current = self.wait_for_change(revision, HEARTBEAT_INTERVAL)
+                if current is None or current == revision:
+                    yield ': keep-alive\n\n'
+                    continue
+                revision = current
+                yield change_event(revision)
+        finally:
+            self._unsubscribe()
+
+    async def async_events(self, revision: Optional[int] = None) -> AsyncIterator[str]:
+        """Like events(), but waiting on the event loop instead of a thread."""
+        loop = asyncio.get_running_loop()
+        changed = asyncio.Event()
+
+        def notify():
+            try:
+                loop.call_soon_threadsafe(changed.set)
+            except RuntimeError:
+                # The loop has shut down
+                pass
+
+        self._subscribe(notify)
+        try:
+            yield self._retry_line()
+            while True:
+                current = self.revision
+                if current is None or current == revision:
+                    try:
+                        await asyncio.wait_for(changed.wait(), HEARTBEAT_INTERVAL)
+                    except asyncio.TimeoutError:
+                        yield ': keep-alive\n\n'
+                    changed.clear()
+                    continue
+                revision = current
+                yield change_event(revision)
+        finally:
+            self._unsubscribe(notify)
+
+    def _retry_line(self) -> str:
+        # Reconnect delay for the browser's EventSource, in milliseconds
+        return f'retry: {int(self.interval * 3000)}\n\n'
+
+    def _subscribe(self, callback: Optional[Callable[[], None]] = None):
+        """Count a new stream, calling ``callback`` from the watcher thread on changes."""
+        self.start()
+        with self._lock:
+            self._subscribers += 1
+            if callback is not None:
+                self._callbacks.append(callback)
+        self._wake.set()
+
+    def _unsubscribe(self, callback: Optional[Callable[[], None]] = None):
+        with self._lock:
+            self._subscribers -= 1
+            if callback is not None:
+                self._callbacks.remove(callback)
+
+    def _run(self):
+        """Watcher thread: publish the revision whenever the database changes."""
+        db = Database(connect_database())
+        data_version = None
+        try:
+            while not self._stopped:
+                current_version = db.data_version()
+                if current_version != data_version:
+                    data_version = current_version
+                    revision = db.current_revision()
+                    if revision != self.revision:
+                        with self._changed:
+                            self.revision = revision
+                            self._changed.notify_all()
+                        with self._lock:
+                            callbacks = list(self._callbacks)
+                        for callback in callbacks:
+                            callback()
+                # Sleep until a local commit, a new subscriber or the next poll;
+                # without subscribers, only the former two
+                self._wake.wait(self.interval if self._subscribers else None)
+                self._wake.clear()
+        finally:
+            db.conn.close()
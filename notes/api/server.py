@@ -0,0 +1,231 @@
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from functools import partial
+from typing import Callable
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from .app import create_app
+
+
+# Request threads per worker process when --threads isn't given
+DEFAULT_THREADS = 8
+
+# Share of a worker's request threads that open event streams may occupy
+STREAM_SHARE = 0.5
+
+BACKENDS = ('auto', 'gunicorn', 'waitress', 'uvicorn', 'builtin')
+
+
+def choose_backend(backend: str, workers: int, asynchronous: bool = False) -> str:
+    """Pick the server to run: gunicorn or waitress (uvicorn with
+    ``asynchronous``) when installed, otherwise the pure-Python built-in one.
+
+    Only gunicorn and the built-in WSGI server can fork worker processes.
+    """
+    if asynchronous:
+        if workers > 1:
+            raise ValueError('--async runs a single process; use --threads to size its database executor')
+        if backend in ('gunicorn', 'waitress'):
+            raise ValueError(f'{backend} is a WSGI server; use uvicorn or builtin with --async')
+        if backend == 'uvicorn' and not _importable('uvicorn'):
+            raise ValueError('uvicorn is not installed (pip install uvicorn)')
+        if backend == 'auto':
+            return 'uvicorn' if _importable('uvicorn') else 'builtin'
+        return backend
+
+    if backend != 'auto':
+        if backend == 'uvicorn':
+            raise ValueError('uvicorn serves the async API; add --async')
+        if workers > 1 and backend == 'waitress':
+            raise ValueError('waitress runs a single process; use --threads, or another backend for --workers')
+        if backend == 'gunicorn' and not _importable('gunicorn'):
+            raise ValueError('gunicorn is not installed (pip install gunicorn)')
+        if backend == 'waitress' and not _importable('waitress'):
+            raise ValueError('waitress is not installed (pip install waitress)')
+        if workers > 1 and not hasattr(os, 'fork'):
+            raise ValueError('--workers needs a platform with fork(); use --threads instead')
+        return backend
+
+    if hasattr(os, 'fork') and _importable('gunicorn'):
+        return 'gunicorn'
+    if workers == 1 and _importable('waitress'):
+        return 'waitress'
+    if workers > 1 and not hasattr(os, 'fork'):
+        raise ValueError('--workers needs a platform with fork(); use --threads instead')
+    return 'builtin'
+
+
+def _importable(module: str) -> bool:
+    try:
+        __import__(module)
+    except ImportError:
+        return False
+    return True
+
+
+def serve(host: str, port: int, workers: int = 1, threads: int = DEFAULT_THREADS,
+          preload: bool = False, backend: str = 'builtin'):
+    """Serve the app with ``workers`` processes of ``threads`` request threads each.
+
+    With ``preload`` the app, and with it the schema, is set up once in the
+    parent process before workers are forked; otherwise every worker sets
+    up its own. Every server here holds a request thread per open event
+    stream, so only part of them may be taken by streams.
+    """
+    app_factory = partial(create_app, pool_size=threads, max_streams=int(threads * STREAM_SHARE))
+
+    if backend == 'gunicorn':
+        _serve_gunicorn(app_factory, host, port, workers, threads, preload)
+    elif backend == 'waitress':
+        import waitress
+        waitress.serve(app_factory(), host=host, port=port, threads=threads)
+    else:
+        _serve_builtin(app_factory, host, port, workers, threads, preload)
+
+
+def serve_async(host: str, port: int, threads: int = DEFAULT_THREADS, backend: str = 'builtin'):
+    """Serve the API with asyncio, running the views on ``threads`` threads."""
+    from .asgi import AsgiApp, serve_asgi
+
+    app = AsgiApp(create_app(pool_size=threads), threads=threads)
+    if backend == 'uvicorn':
+        import uvicorn
+        uvicorn.run(app, host=host, port=port, lifespan='on', log_level='warning')
+    else:
+        serve_asgi(app, host, port)
+
+
+def _serve_gunicorn(app_factory: Callable, host: str, port: int, workers: int, threads: int, preload: bool):
+    from gunicorn.app.base import BaseApplication
+
+    class NotesApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'{host}:{port}')
+            self.cfg.set('workers', workers)
+            self.cfg.set('threads', threads)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('preload_app', preload)
+
+        def load(self):
+            return app_factory()
+
+    NotesApplication().run()
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """Request handler that doesn't log every request to stderr."""
+
+    def log_request(self, code='-', size='-'):
+        pass
+
+
+class ThreadPoolWSGIServer(WSGIServer):
+    """wsgiref's server, handling requests on a fixed pool of threads.
+
+    Unlike ``socketserver.ThreadingMixIn`` the number of threads is capped,
+    so a burst of requests queues up instead of spawning a thread (and a
+    database connection) per request.
+    """
+
+    request_queue_size = 128
+
+    def __init__(self, server_address, threads: int):
+        super().__init__(server_address, QuietRequestHandler)
+        self.threads = threads
+        self._requests = None
+
+    def process_request(self, request, client_address):
+        if self._requests is None:
+            # Started lazily so that forked workers each get their own threads
+            self._requests = queue.Queue()
+            for i in range(self.threads):
+                # Daemon threads: open event streams must not hold up shutdown
+                threading.Thread(target=self._handle_requests, name=f'notes-http-{i}', daemon=True).start()
+        self._requests.put((request, client_address))
+
+    def _handle_requests(self):
+        while True:
+            request, client_address = self._requests.get()
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+
+def _serve_builtin(app_factory: Callable, host: str, port: int, workers: int, threads: int, preload: bool):
+    server = ThreadPoolWSGIServer((host, port), threads)
+    app = app_factory() if preload or workers == 1 else None
+    try:
+        if workers == 1:
+            server.set_app(app)
+            server.serve_forever()
+        else:
+            _prefork(server, workers, lambda: app or app_factory())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def _prefork(server: ThreadPoolWSGIServer, workers: int, get_app: Callable):
+    """Fork ``workers`` processes that accept on the same listening socket.
+
+    Workers that die are replaced, unless one dies within a second of
+    starting, which means it can't start at all.
+    """
+    children = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                server.set_app(get_app())
+                server.serve_forever()
+                status = 0
+            except KeyboardInterrupt:
+                status = 0
+            finally:
+                os._exit(status)
+        children[pid] = time.monotonic()
+
+    def stop(signum=None, frame=None):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    for _ in range(workers):
+        spawn()
+
+    try:
+        while children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = children.pop(pid, None)
+            if stopping or started is None:
+                continue
+            if time.monotonic() - started < 1:
+                print(f'Worker {pid} failed to start, shutting down', file=sys.stderr)
+                stop()
+            else:
+                spawn()
+    except KeyboardInterrupt:
+        # Ctrl+C reaches the whole process group; just reap the workers
+        stop()
+        for pid in list(children):
+            os.waitpid(pid, 0)
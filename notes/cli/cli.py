@@ -1,25 +1,120 @@
 import click
 import json
+import sqlite3
 import sys
+import textwrap
 from datetime import datetime
-from dateutil.parser import parse as parse_date
 from typing import Optional
 
 from ..database import Database
+from ..database.database import cursor_after
 from ..models import Task, Note, Package
-from .formatters import format_tasks_table, format_notes_table, format_packages_table
-from .interactive import start_interactive_mode
+from ..utils.ndjson import dump_ndjson, load_ndjson
+from .formatters import (
+    format_tasks_table, format_notes_table, format_packages_table,
+    TASK_TABLE_FIELDS, NOTE_TABLE_FIELDS, PACKAGE_TABLE_FIELDS, TASK_TABLE_ORDER, task_table_filters
+)
+
+
+def profile_startup(ctx, param, value):
+    """Print an import-time report for the CLI and exit."""
+    if not value or ctx.resilient_parsing:
+        return
+    from .startup import report_startup_profile
+    report_startup_profile()
+    ctx.exit()
 
 
 @click.group(invoke_without_command=True)
+@click.option('--profile-startup', is_flag=True, is_eager=True, expose_value=False,
+              callback=profile_startup, help='Report CLI import timings and exit')
 @click.pass_context
 def cli(ctx):
     """Notes - A dual-interface task and note management application."""
     if ctx.invoked_subcommand is None:
-        # No subcommand provided, start interactive mode
+        # No subcommand provided, start interactive mode. Imported here so
+        # scripted commands don't pay for readline and the shell.
+        from .interactive import start_interactive_mode
         start_interactive_mode()
 
 
+def parse_date(value: str) -> datetime:
+    """Parse a free-form date; dateutil is only imported when a date is given."""
+    from dateutil.parser import parse
+    return parse(value)
+
+
+def pagination_options(command):
+    """Add --limit/--offset/--cursor options to a list command."""
+    command = click.option('--cursor', help='Resume after the cursor printed by a previous page')(command)
+    command = click.option('--offset', type=int, help='Number of items to skip')(command)
+    command = click.option('--limit', '-n', type=int, help='Maximum number of items to show')(command)
+    return command
+
+
+def tag_options(command):
+    """Add --tag/--match tag filter options to a list command."""
+    command = click.option('--match', 'tag_mode', type=click.Choice(['all', 'any']), default='all',
+                           help='Require all given tags or any of them')(command)
+    command = click.option('--tag', '-t', 'tags', multiple=True,
+                           help='Filter by tag (repeat for several tags)')(command)
+    return command
+
+
+class PageTracker:
+    """Pass items through lazily, remembering how many went by and the last one."""
+
+    def __init__(self, items):
+        self._items = items
+        self.count = 0
+        self.last = None
+
+    def __iter__(self):
+        for item in self._items:
+            self.count += 1
+            self.last = item
+            yield item
+
+
+def echo_next_page(page: PageTracker, limit, offset: Optional[int] = None):
+    """Tell the user how to fetch the next page, if there is one.
+    
+    Pass the page's ``offset`` for lists not in the default order, which
+    can't be resumed with a cursor.
+    """
+    if not limit or page.count < limit:
+        return
+    if offset is None:
+        click.echo(f"More results: --cursor {cursor_after(page.last)}", err=True)
+    else:
+        click.echo(f"More results: --offset {offset + page.count}", err=True)
+
+
+def echo_json_array(items):
+    """Print items as an indented JSON array, one item at a time.
+    
+    The output matches ``json.dumps(list, indent=2)`` without building the
+    whole list first.
+    """
+    first = True
+    for item in items:
+        click.echo('[' if first else ',')
+        click.echo(textwrap.indent(json.dumps(item.to_dict(), indent=2), '  '), nl=False)
+        first = False
+    click.echo('[]' if first else '\n]')
+
+
+def load_json_items(file, model):
+    """Read a JSON array (as written by ``list --format json``) into model objects."""
+    try:
+        data = json.load(file)
+        if isinstance(data, dict):
+            raise ValueError("expected a JSON array")
+        return [model.from_dict(item) for item in data]
+    except (ValueError, KeyError, TypeError) as e:
+        raise click.ClickException(f"Invalid import file: {e}")
+
+
 @cli.group()
 def task():
     """Task management commands."""
@@ -69,10 +164,9 @@ def create(title, description, due, priority, package, tags):
         # Find package ID if package name provided
         package_id = None
         if package:
-            packages = db.list_packages()
-            matching_packages = [p for p in packages if p.name.lower() == package.lower()]
-            if matching_packages:
-                package_id = matching_packages[0].id
+            package_obj = db.get_package_by_name(package)
+            if package_obj:
+                package_id = package_obj.id
             else:
                 click.echo(f"Package '{package}' not found", err=True)
                 return
@@ -102,31 +196,61 @@ def create(title, description, due, priority, package, tags):
 @click.option('--priority', type=click.Choice(['low', 'medium', 'high', 'urgent']),
               help='Filter by priority')
 @click.option('--package', help='Filter by package name')
+@tag_options
+@click.option('--due-after', help='Only tasks due on or after this date')
+@click.option('--due-before', help='Only tasks due before this date')
+@click.option('--completed-since', help='Only tasks completed on or after this date')
+@click.option('--overdue', is_flag=True, help='Only open tasks past their due date')
 @click.option('--format', 'output_format', type=click.Choice(['table', 'json', 'markdown']),
               default='table', help='Output format')
-def list(status, priority, package, output_format):
+@pagination_options
+def list(status, priority, package, tags, tag_mode, due_after, due_before, completed_since, overdue,
+         output_format, limit, offset, cursor):
     """List tasks with optional filtering."""
     with Database() as db:
-        filters = {}
+        filters = {'tags': tags, 'tag_mode': tag_mode, 'overdue': overdue}
         if status:
             filters['status'] = status
         if priority:
             filters['priority'] = priority
         
+        dates = {'due_after': due_after, 'due_before': due_before, 'completed_since': completed_since}
+        for key, value in dates.items():
+            if value:
+                try:
+                    filters[key] = parse_date(value)
+                except Exception as e:
+                    click.echo(f"Error parsing {key.replace('_', ' ')} date: {e}", err=True)
+                    return
+        
         # Find package ID if package name provided
         if package:
-            packages = db.list_packages()
-            matching_packages = [p for p in packages if p.name.lower() == package.lower()]
-            if matching_packages:
-                filters['package_id'] = matching_packages[0].id
+            package_obj = db.get_package_by_name(package)
+            if package_obj:
+                filters['package_id'] = package_obj.id
             else:
                 click.echo(f"Package '{package}' not found", err=True)
                 return
 
-        tasks = db.list_tasks(filters)
+        fields = None
+        order = 'newest'
+        if output_format == 'table':
+            # The table view doesn't show descriptions or long-completed
+            # tasks, so don't read them
+            fields = TASK_TABLE_FIELDS
+            filters.update(task_table_filters())
+            if not cursor:
+                order = TASK_TABLE_ORDER
+        
+        try:
+            tasks = PageTracker(db.iter_tasks(filters, limit=limit, offset=offset, cursor=cursor,
+                                              fields=fields, order=order))
+        except ValueError as e:
+            click.echo(str(e), err=True)
+            return
         
         if output_format == 'json':
-            click.echo(json.dumps([task.to_dict() for task in tasks], indent=2))
+            echo_json_array(tasks)
         elif output_format == 'markdown':
             for task in tasks:
                 click.echo(f"## {task.title}")
@@ -139,6 +263,7 @@ def list(status, priority, package, output_format):
                 click.echo()
         else:
             format_tasks_table(tasks)
+        echo_next_page(tasks, limit, None if order == 'newest' else offset or 0)
 
 
 @task.command()
@@ -221,6 +346,19 @@ def delete(task_id):
             click.echo("Failed to delete task", err=True)
 
 
+@task.command('import')
+@click.argument('file', type=click.File('r'))
+def import_tasks(file):
+    """Import tasks from a JSON file ('-' for stdin) in one transaction."""
+    tasks = load_json_items(file, Task)
+    with Database() as db:
+        try:
+            db.bulk_create_tasks(tasks)
+        except sqlite3.IntegrityError as e:
+            raise click.ClickException(f"Import failed, nothing was written: {e}")
+    click.echo(f"Imported {len(tasks)} tasks")
+
+
 # Note commands
 @note.command()
 @click.argument('title')
@@ -233,10 +371,9 @@ def create(title, content, package, tags):
         # Find package ID if package name provided
         package_id = None
         if package:
-            packages = db.list_packages()
-            matching_packages = [p for p in packages if p.name.lower() == package.lower()]
-            if matching_packages:
-                package_id = matching_packages[0].id
+            package_obj = db.get_package_by_name(package)
+            if package_obj:
+                package_id = package_obj.id
             else:
                 click.echo(f"Package '{package}' not found", err=True)
                 return
@@ -260,27 +397,34 @@ def create(title, content, package, tags):
 
 @note.command()
 @click.option('--package', help='Filter by package name')
+@tag_options
 @click.option('--format', 'output_format', type=click.Choice(['table', 'json', 'markdown']),
               default='table', help='Output format')
-def list(package, output_format):
+@pagination_options
+def list(package, tags, tag_mode, output_format, limit, offset, cursor):
     """List notes with optional filtering."""
     with Database() as db:
-        filters = {}
+        filters = {'tags': tags, 'tag_mode': tag_mode}
         
         # Find package ID if package name provided
         if package:
-            packages = db.list_packages()
-            matching_packages = [p for p in packages if p.name.lower() == package.lower()]
-            if matching_packages:
-                filters['package_id'] = matching_packages[0].id
+            package_obj = db.get_package_by_name(package)
+            if package_obj:
+                filters['package_id'] = package_obj.id
             else:
                 click.echo(f"Package '{package}' not found", err=True)
                 return
 
-        notes = db.list_notes(filters)
+        try:
+            # The table view doesn't show note bodies, so don't read them
+            fields = NOTE_TABLE_FIELDS if output_format == 'table' else None
+            notes = PageTracker(db.iter_notes(filters, limit=limit, offset=offset, cursor=cursor, fields=fields))
+        except ValueError as e:
+            click.echo(str(e), err=True)
+            return
         
         if output_format == 'json':
-            click.echo(json.dumps([note.to_dict() for note in notes], indent=2))
+            echo_json_array(notes)
         elif output_format == 'markdown':
             for note in notes:
                 click.echo(f"## {note.title}")
@@ -289,6 +433,7 @@ def list(package, output_format):
                 click.echo()
         else:
             format_notes_table(notes)
+        echo_next_page(notes, limit)
 
 
 @note.command()
@@ -352,6 +497,19 @@ def delete(note_id):
             click.echo("Failed to delete note", err=True)
 
 
+@note.command('import')
+@click.argument('file', type=click.File('r'))
+def import_notes(file):
+    """Import notes from a JSON file ('-' for stdin) in one transaction."""
+    notes = load_json_items(file, Note)
+    with Database() as db:
+        try:
+            db.bulk_create_notes(notes)
+        except sqlite3.IntegrityError as e:
+            raise click.ClickException(f"Import failed, nothing was written: {e}")
+    click.echo(f"Imported {len(notes)} notes")
+
+
 # Package commands
 @package.command()
 @click.argument('name')
@@ -373,10 +531,9 @@ def create(name, description, parent, due):
         # Find parent package ID if parent name provided
         parent_id = None
         if parent:
-            packages = db.list_packages()
-            matching_packages = [p for p in packages if p.name.lower() == parent.lower()]
-            if matching_packages:
-                parent_id = matching_packages[0].id
+            package_obj = db.get_package_by_name(parent)
+            if package_obj:
+                parent_id = package_obj.id
             else:
                 click.echo(f"Parent package '{parent}' not found", err=True)
                 return
@@ -396,13 +553,19 @@ def create(name, description, parent, due):
 @package.command()
 @click.option('--format', 'output_format', type=click.Choice(['table', 'json', 'markdown']),
               default='table', help='Output format')
-def list(output_format):
+@pagination_options
+def list(output_format, limit, offset, cursor):
     """List all packages."""
     with Database() as db:
-        packages = db.list_packages()
+        try:
+            fields = PACKAGE_TABLE_FIELDS if output_format == 'table' else None
+            packages = PageTracker(db.iter_packages(limit=limit, offset=offset, cursor=cursor, fields=fields))
+        except ValueError as e:
+            click.echo(str(e), err=True)
+            return
         
         if output_format == 'json':
-            click.echo(json.dumps([pkg.to_dict() for pkg in packages], indent=2))
+            echo_json_array(packages)
         elif output_format == 'markdown':
             for pkg in packages:
                 click.echo(f"## {pkg.name}")
@@ -414,11 +577,13 @@ def list(output_format):
                 click.echo()
         else:
             format_packages_table(packages)
+        echo_next_page(packages, limit)
 
 
 @package.command()
 @click.argument('package_id')
-def archive(package_id):
+@click.option('--cascade/--no-cascade', default=True, help='Also archive all sub-packages')
+def archive(package_id, cascade):
     """Archive a package."""
     with Database() as db:
         package_obj = db.get_package(package_id)
@@ -426,9 +591,48 @@ def archive(package_id):
             click.echo(f"Package with ID {package_id} not found", err=True)
             return
 
-        package_obj.archive()
-        db.update_package(package_obj)
+        archived = db.archive_package(package_obj.id, cascade=cascade)
         click.echo(f"Package '{package_obj.name}' archived successfully")
+        if archived > 1:
+            click.echo(f"Also archived {archived - 1} sub-packages")
+
+
+@package.command()
+@click.argument('package_id')
+@click.option('--cascade/--no-cascade', default=True,
+              help='Also delete sub-packages, tasks and notes (otherwise they are detached)')
+@click.option('--yes', '-y', is_flag=True, help='Do not ask for confirmation')
+def delete(package_id, cascade, yes):
+    """Delete a package."""
+    with Database() as db:
+        package_obj = db.get_package(package_id)
+        if not package_obj:
+            click.echo(f"Package with ID {package_id} not found", err=True)
+            return
+
+        if cascade and not yes:
+            rollup = db.package_rollup(package_obj.id)
+            click.confirm(
+                f"Delete package '{package_obj.name}' with {rollup['packages']} sub-packages, "
+                f"{rollup['tasks']['total']} tasks and {rollup['notes']} notes?",
+                abort=True
+            )
+
+        db.delete_package(package_obj.id, cascade=cascade)
+        click.echo(f"Package '{package_obj.name}' deleted successfully")
+
+
+@package.command('import')
+@click.argument('file', type=click.File('r'))
+def import_packages(file):
+    """Import packages from a JSON file ('-' for stdin) in one transaction."""
+    packages = load_json_items(file, Package)
+    with Database() as db:
+        try:
+            db.bulk_create_packages(packages)
+        except sqlite3.IntegrityError as e:
+            raise click.ClickException(f"Import failed, nothing was written: {e}")
+    click.echo(f"Imported {len(packages)} packages")
 
 
 # Global commands
@@ -436,17 +640,24 @@ def archive(package_id):
 @click.argument('query')
 @click.option('--format', 'output_format', type=click.Choice(['table', 'json']),
               default='table', help='Output format')
-def search(query, output_format):
+@click.option('--limit', '-n', default=50, help='Maximum results per type')
+def search(query, output_format, limit):
     """Search across tasks, notes, and packages."""
     with Database() as db:
-        results = db.search(query)
+        results = db.search(query, limit=limit, highlight=('[', ']'))
+        snippets = results['snippets']
         
         if output_format == 'json':
             # Convert objects to dictionaries for JSON serialization
+            def with_snippet(item):
+                data = item.to_dict()
+                data['snippet'] = snippets.get(item.id)
+                return data
+            
             json_results = {
-                'tasks': [task.to_dict() for task in results['tasks']],
-                'notes': [note.to_dict() for note in results['notes']],
-                'packages': [pkg.to_dict() for pkg in results['packages']]
+                'tasks': [with_snippet(task) for task in results['tasks']],
+                'notes': [with_snippet(note) for note in results['notes']],
+                'packages': [with_snippet(pkg) for pkg in results['packages']]
             }
             click.echo(json.dumps(json_results, indent=2))
         else:
@@ -468,16 +679,104 @@ def search(query, output_format):
 
 
 @cli.command()
-@click.option('--port', '-p', default=8080, help='Port to run the server on')
-def server(port):
-    """Start the web server for the GUI interface."""
-    from ..api.app import create_app
+@click.argument('file', type=click.File('w', encoding='utf-8'), default='-')
+def export(file):
+    """Export all packages, tasks and notes as NDJSON (to stdout by default)."""
+    with Database() as db:
+        for line in dump_ndjson(db.export_records()):
+            file.write(line)
+
+
+@cli.command('import')
+@click.argument('file', type=click.File('r', encoding='utf-8'))
+def import_data(file):
+    """Import an NDJSON export, updating items that already exist."""
+    with Database() as db:
+        try:
+            counts = db.import_records(load_ndjson(file))
+        except ValueError as e:
+            raise click.ClickException(str(e))
+    click.echo(f"Imported {counts['package']} packages, {counts['task']} tasks and {counts['note']} notes")
+
+
+@cli.command()
+def reindex():
+    """Rebuild the search, tag and link indexes (e.g. after a VACUUM)."""
+    from ..database.schema import rebuild_link_index, rebuild_search_index, rebuild_tag_index
+
+    with Database() as db:
+        with db.transaction():
+            rebuild_search_index(db.conn)
+            rebuild_tag_index(db.conn)
+            rebuild_link_index(db.conn)
+    click.echo("Rebuilt the search, tag and link indexes")
+
+
+@cli.command()
+@click.option('--kind', type=click.Choice(['tasks', 'notes']), help='Only count tags on tasks or notes')
+@click.option('--format', 'output_format', type=click.Choice(['table', 'json']),
+              default='table', help='Output format')
+def tags(kind, output_format):
+    """List tags with how often each one is used."""
+    with Database() as db:
+        counts = db.tag_counts(kind)
     
-    app = create_app()
-    click.echo(f"Starting Notes web server on http://localhost:{port}")
-    click.echo("Press Ctrl+C to stop the server")
-    app.run(host='0.0.0.0', port=port, debug=False)
+    if output_format == 'json':
+        click.echo(json.dumps([{'name': name, 'count': count} for name, count in counts], indent=2))
+    elif not counts:
+        click.echo("No tags.")
+    else:
+        for name, count in counts:
+            click.echo(f"{count:>5}  {name}")
 
 
+@cli.command()
+@click.option('--port', '-p', default=8080, help='Port to run the server on')
+@click.option('--host', default='0.0.0.0', help='Address to listen on')
+@click.option('--workers', '-w', type=click.IntRange(min=1),
+              help='Worker processes; switches to the production server')
+@click.option('--threads', '-t', type=click.IntRange(min=1),
+              help='Request threads per worker (default 8); switches to the production server')
+@click.option('--preload', is_flag=True,
+              help='Set up the app and schema once before forking workers')
+@click.option('--async', 'asynchronous', is_flag=True,
+              help='Serve the API on asyncio, with database work on a thread pool')
+@click.option('--backend', type=click.Choice(['auto', 'gunicorn', 'waitress', 'uvicorn', 'builtin']), default='auto',
+              help='Production server (auto: gunicorn, then waitress, then built-in; uvicorn with --async)')
+def server(port, host, workers, threads, preload, asynchronous, backend):
+    """Start the web server for the GUI interface.
+
+    Without --workers/--threads/--async this runs Flask's development server.
+    """
+    if workers is None and threads is None and not preload and not asynchronous and backend == 'auto':
+        from ..api.app import create_app
+
+        app = create_app()
+        click.echo(f"Starting Notes web server on http://localhost:{port}")
+        click.echo("Press Ctrl+C to stop the server")
+        app.run(host=host, port=port, debug=False)
+        return
+
+    from ..api.server import DEFAULT_THREADS, choose_backend, serve, serve_async
+
+    workers = workers or 1
+    threads = threads or DEFAULT_THREADS
+    try:
+        backend = choose_backend(backend, workers, asynchronous)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+
+    if asynchronous:
+        click.echo(f"Starting Notes web server on http://localhost:{port} "
+                   f"({backend}, async, {threads} threads)")
+        click.echo("Press Ctrl+C to stop the server")
+        serve_async(host, port, threads=threads, backend=backend)
+        return
+
+    click.echo(f"Starting Notes web server on http://localhost:{port} "
+               f"({backend}, {workers} worker{'s' if workers > 1 else ''} x {threads} threads)")
+    click.echo("Press Ctrl+C to stop the server")
+    serve(host, port, workers=workers, threads=threads, preload=preload, backend=backend)
+
 if __name__ == '__main__':
     cli()
\ No newline at end of file
@@ -0,0 +1,149 @@
+import re
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..database import Database
+
+
+KINDS = ('tasks', 'notes', 'packages')
+
+_IDS = '\0'  # Trie node key holding the IDs of titles with a word ending here
+
+
+def _words(title: str) -> List[str]:
+    """Split a title into lowercase words."""
+    return re.findall(r'\w+', title.lower())
+
+
+class TitleTrie:
+    """A character trie over the lowercase words of item titles."""
+
+    def __init__(self):
+        self.root: Dict = {}
+
+    def add(self, item_id: str, title: str):
+        """Index every word of a title under the item's ID."""
+        for word in _words(title):
+            node = self.root
+            for char in word:
+                node = node.setdefault(char, {})
+            node.setdefault(_IDS, set()).add(item_id)
+
+    def remove(self, item_id: str, title: str):
+        """Remove an item previously added with the same title."""
+        for word in _words(title):
+            node = self.root
+            for char in word:
+                node = node.get(char)
+                if node is None:
+                    break
+            else:
+                node.get(_IDS, set()).discard(item_id)
+
+    def find(self, prefix: str) -> Set[str]:
+        """Return the IDs of items with a title word starting with ``prefix``."""
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return set()
+
+        ids = set()
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for key, child in node.items():
+                if key == _IDS:
+                    ids.update(child)
+                else:
+                    stack.append(child)
+        return ids
+
+
+class CompletionIndex:
+    """In-memory ID and title index backing tab completion.
+    
+    The index is loaded once from the database and then kept current by the
+    shell calling add()/remove() for its own writes. Changes committed by
+    other processes (the CLI, the web GUI) are detected cheaply through
+    ``PRAGMA data_version`` and trigger a reload.
+    """
+
+    def __init__(self, db: Database):
+        self.db = db
+        self._version: Optional[int] = None
+        self._titles: Dict[str, Dict[str, str]] = {}
+        self._sorted_ids: Dict[str, List[str]] = {}
+        self._tries: Dict[str, TitleTrie] = {}
+
+    def refresh(self):
+        """Reload the index if another connection changed the database."""
+        version = self.db.data_version()
+        if version != self._version:
+            self.rebuild()
+            self._version = version
+
+    def rebuild(self):
+        """Load all IDs and titles from the database."""
+        for kind in KINDS:
+            titles = dict(self.db.list_titles(kind))
+            trie = TitleTrie()
+            for item_id, title in titles.items():
+                trie.add(item_id, title)
+            self._titles[kind] = titles
+            self._sorted_ids[kind] = sorted(titles)
+            self._tries[kind] = trie
+
+    def add(self, kind: str, item_id: str, title: str):
+        """Add an item, or update its title if it is already indexed."""
+        if not self._titles:
+            return  # Not loaded yet; the first refresh() will pick it up
+        titles = self._titles[kind]
+        if item_id in titles:
+            self._tries[kind].remove(item_id, titles[item_id])
+        else:
+            insort(self._sorted_ids[kind], item_id)
+        titles[item_id] = title
+        self._tries[kind].add(item_id, title)
+
+    def remove(self, kind: str, item_id: str):
+        """Drop an item from the index."""
+        if not self._titles:
+            return
+        title = self._titles[kind].pop(item_id, None)
+        if title is None:
+            return
+        self._tries[kind].remove(item_id, title)
+        ids = self._sorted_ids[kind]
+        position = bisect_left(ids, item_id)
+        if position < len(ids) and ids[position] == item_id:
+            del ids[position]
+
+    def match(self, kind: str, term: str) -> List[Tuple[str, str]]:
+        """Return (id, title) pairs whose ID or title matches a partial term."""
+        self.refresh()
+        titles = self._titles[kind]
+        term = term.lower()
+        if not term:
+            return sorted(titles.items(), key=lambda item: item[1].lower())
+
+        # IDs starting with the term form a contiguous run in the sorted list
+        ids = self._sorted_ids[kind]
+        matched = []
+        position = bisect_left(ids, term)
+        while position < len(ids) and ids[position].startswith(term):
+            matched.append(ids[position])
+            position += 1
+
+        # Titles with a word starting with each word of the term
+        words = _words(term)
+        if words:
+            candidates = set.intersection(*(self._tries[kind].find(word) for word in words))
+            seen = set(matched)
+            matched.extend(sorted(
+                (item_id for item_id in candidates
+                 if item_id not in seen and term in titles[item_id].lower()),
+                key=lambda item_id: titles[item_id].lower()
+            ))
+
+        return [(item_id, titles[item_id]) for item_id in matched]
@@ -1,73 +1,90 @@
 import click
-from typing import List
+from typing import Iterable
 from datetime import datetime, timedelta
 from ..models import Task, Note, Package
 
+# Fields each compact table prints; list queries can leave the rest unread
+TASK_TABLE_FIELDS = ('id', 'title', 'status', 'priority', 'due_date', 'completed_at')
+NOTE_TABLE_FIELDS = ('id', 'title', 'tags', 'updated_at')
+PACKAGE_TABLE_FIELDS = ('id', 'name', 'status', 'due_date')
 
-def format_tasks_table(tasks: List[Task], filter_completed_days: int = 7):
-    """Format tasks as a compact table for CLI output."""
-    if not tasks:
-        click.echo("No tasks.")
-        return
+# Completed tasks older than this are left out of task tables
+RECENTLY_COMPLETED_DAYS = 7
+
+# list_tasks() arguments that read exactly the rows format_tasks_table shows,
+# in the order it shows them
+TASK_TABLE_ORDER = 'completed_last'
+
+
+def task_table_filters(days: int = RECENTLY_COMPLETED_DAYS) -> dict:
+    """list_tasks() filters leaving out tasks completed more than ``days`` ago."""
+    return {'completed_cutoff': datetime.now() - timedelta(days=days)}
+
+
+def format_tasks_table(tasks: Iterable[Task], filter_completed_days: int = RECENTLY_COMPLETED_DAYS):
+    """Format tasks as a compact table for CLI output.
     
-    # Filter out old completed tasks
-    filtered_tasks = []
+    ``tasks`` may be a generator: active tasks are printed as they arrive and
+    only recently completed ones are held back to be listed last. Tasks read
+    with task_table_filters() in TASK_TABLE_ORDER arrive filtered and in
+    display order, so nothing is dropped or held back here.
+    """
     cutoff_date = datetime.now() - timedelta(days=filter_completed_days)
+    completed_tasks = []
+    shown = 0
     
     for task in tasks:
-        if task.status == 'completed':
-            if task.completed_at and task.completed_at >= cutoff_date:
-                filtered_tasks.append(task)
-        else:
-            filtered_tasks.append(task)
+        if task.status != 'completed':
+            format_task_row(task)
+            shown += 1
+        elif task.completed_at and task.completed_at >= cutoff_date:
+            # Old completed tasks are filtered out
+            completed_tasks.append(task)
     
-    if not filtered_tasks:
+    for task in completed_tasks:
+        format_task_row(task)
+        shown += 1
+    
+    if not shown:
         click.echo("No tasks.")
-        return
+
+
+def format_task_row(task: Task):
+    """Print one compact, color-coded task row."""
+    # Shorter status indicators
+    status_map = {'pending': 'TODO', 'in-progress': 'PROG', 'completed': 'DONE', 'cancelled': 'CANC'}
+    status = status_map.get(task.status, task.status.upper())
     
-    # Sort tasks: active tasks first, then completed tasks
-    active_tasks = [t for t in filtered_tasks if t.status != 'completed']
-    completed_tasks = [t for t in filtered_tasks if t.status == 'completed']
-    sorted_tasks = active_tasks + completed_tasks
+    # Priority indicators 
+    priority_map = {'low': 'L', 'medium': 'M', 'high': 'H', 'urgent': 'U'}
+    priority = priority_map.get(task.priority, 'M')
     
-    # Compact output
-    for task in sorted_tasks:
-        # Shorter status indicators
-        status_map = {'pending': 'TODO', 'in-progress': 'PROG', 'completed': 'DONE', 'cancelled': 'CANC'}
-        status = status_map.get(task.status, task.status.upper())
-        
-        # Priority indicators 
-        priority_map = {'low': 'L', 'medium': 'M', 'high': 'H', 'urgent': 'U'}
-        priority = priority_map.get(task.priority, 'M')
-        
-        # Due date
-        due_str = task.due_date.strftime('%m/%d') if task.due_date else '     '
-        
-        # Truncate title if too long
-        title = task.title[:40] + '...' if len(task.title) > 40 else task.title
-        
-        row = f"{task.id[:6]:<6} [{status:<4}] [{priority}] {due_str} {title}"
-        
-        # Color coding
-        if task.status == 'completed':
-            click.echo(click.style(row, fg='green', dim=True))
-        elif task.status == 'in-progress':
-            click.echo(click.style(row, fg='yellow'))
-        elif task.priority == 'urgent':
-            click.echo(click.style(row, fg='red'))
-        elif task.priority == 'high':
-            click.echo(click.style(row, fg='magenta'))
-        else:
-            click.echo(row)
+    # Due date
+    due_str = task.due_date.strftime('%m/%d') if task.due_date else '     '
+    
+    # Truncate title if too long
+    title = task.title[:40] + '...' if len(task.title) > 40 else task.title
+    
+    row = f"{task.id[:6]:<6} [{status:<4}] [{priority}] {due_str} {title}"
+    
+    # Color coding
+    if task.status == 'completed':
+        click.echo(click.style(row, fg='green', dim=True))
+    elif task.status == 'in-progress':
+        click.echo(click.style(row, fg='yellow'))
+    elif task.priority == 'urgent':
+        click.echo(click.style(row, fg='red'))
+    elif task.priority == 'high':
+        click.echo(click.style(row, fg='magenta'))
+    else:
+        click.echo(row)
 
 
-def format_notes_table(notes: List[Note]):
+def format_notes_table(notes: Iterable[Note]):
     """Format notes as a compact table for CLI output."""
-    if not notes:
-        click.echo("No notes.")
-        return
-    
+    shown = 0
     for note in notes:
+        shown += 1
         updated_str = note.updated_at.strftime('%m/%d')
         tags_str = ','.join(note.tags[:2]) if note.tags else ''
         title = note.title[:35] + '...' if len(note.title) > 35 else note.title
@@ -76,15 +93,16 @@ def format_notes_table(notes: List[Note]):
         if tags_str:
             row += f" [{tags_str}]"
         click.echo(row)
+    
+    if not shown:
+        click.echo("No notes.")
 
 
-def format_packages_table(packages: List[Package]):
+def format_packages_table(packages: Iterable[Package]):
     """Format packages as a compact table for CLI output."""
-    if not packages:
-        click.echo("No packages.")
-        return
-    
+    shown = 0
     for pkg in packages:
+        shown += 1
         due_str = pkg.due_date.strftime('%m/%d') if pkg.due_date else '     '
         status_map = {'active': 'ACT', 'completed': 'DONE', 'archived': 'ARC'}
         status = status_map.get(pkg.status, pkg.status.upper()[:4])
@@ -99,6 +117,9 @@ def format_packages_table(packages: List[Package]):
             click.echo(click.style(row, fg='cyan', dim=True))
         else:
             click.echo(row)
+    
+    if not shown:
+        click.echo("No packages.")
 
 
 def print_ascii_banner():
@@ -1,22 +1,30 @@
 import click
 import os
 import sys
-import readline
 from datetime import datetime
+from itertools import chain
 from typing import Optional, List
 
 from ..database import Database
 from ..models import Task, Note, Package
-from .formatters import format_tasks_table, format_notes_table, format_packages_table, print_ascii_banner
+from .formatters import (
+    format_tasks_table, format_notes_table, format_packages_table, print_ascii_banner,
+    TASK_TABLE_FIELDS, NOTE_TABLE_FIELDS, PACKAGE_TABLE_FIELDS, TASK_TABLE_ORDER, task_table_filters
+)
+from .completion import CompletionIndex
 
 
 class InteractiveApp:
     """Interactive command-line application mode."""
     
+    # Ambiguous partial identifiers list at most this many matches
+    MAX_MATCHES = 20
+    
     def __init__(self):
         self.db = Database()
         self.current_package = None
         self.running = True
+        self.completion_index = CompletionIndex(self.db)
         self.setup_tab_completion()
         
     def __enter__(self):
@@ -27,8 +35,12 @@ class InteractiveApp:
     
     def setup_tab_completion(self):
         """Setup tab completion for the interactive shell."""
+        # Load completion candidates once per session
+        self.completion_index.refresh()
+        
         try:
             # Set up readline for tab completion
+            import readline
             readline.set_completer(self.complete)
             readline.parse_and_bind("tab: complete")
             
@@ -93,11 +105,8 @@ class InteractiveApp:
                     if len(parts) == identifier_pos + 1:
                         # We're completing the identifier
                         search_term = parts[identifier_pos].lower().strip('"') if identifier_pos < len(parts) else ''
-                        tasks = self.db.list_tasks()
-                        for task in tasks:
-                            task_id = task.id[:8]
-                            if not search_term or task_id.startswith(search_term) or search_term in task.title.lower():
-                                completions.extend([task_id, f'"{task.title}"'])
+                        for task_id, title in self.completion_index.match('tasks', search_term):
+                            completions.extend([task_id[:8], f'"{title}"'])
                 
                 elif cmd in ['note']:
                     identifier_pos = 1
@@ -106,11 +115,8 @@ class InteractiveApp:
                     
                     if len(parts) == identifier_pos + 1:
                         search_term = parts[identifier_pos].lower().strip('"') if identifier_pos < len(parts) else ''
-                        notes = self.db.list_notes()
-                        for note in notes:
-                            note_id = note.id[:8]
-                            if not search_term or note_id.startswith(search_term) or search_term in note.title.lower():
-                                completions.extend([note_id, f'"{note.title}"'])
+                        for note_id, title in self.completion_index.match('notes', search_term):
+                            completions.extend([note_id[:8], f'"{title}"'])
                 
                 elif cmd in ['package']:
                     identifier_pos = 1
@@ -119,10 +125,8 @@ class InteractiveApp:
                     
                     if len(parts) == identifier_pos + 1:
                         search_term = parts[identifier_pos].lower().strip('"') if identifier_pos < len(parts) else ''
-                        packages = self.db.list_packages()
-                        for pkg in packages:
-                            if not search_term or search_term in pkg.name.lower():
-                                completions.append(f'"{pkg.name}"')
+                        for _, name in self.completion_index.match('packages', search_term):
+                            completions.append(f'"{name}"')
         
         return completions
     
@@ -130,6 +134,7 @@ class InteractiveApp:
         """Completion function for readline."""
         if state == 0:
             # Get the current line buffer
+            import readline
             line_buffer = readline.get_line_buffer()
             # If the line buffer is empty or just whitespace, show all commands
             if not line_buffer.strip():
@@ -251,35 +256,32 @@ Examples: complete "wireframes", rm "meeting", archive "old project"
     
     def show_status(self):
         """Show current status and statistics."""
-        all_tasks = self.db.list_tasks()
-        all_notes = self.db.list_notes()
-        all_packages = self.db.list_packages()
-        
-        pending_tasks = [t for t in all_tasks if t.status == 'pending']
-        in_progress_tasks = [t for t in all_tasks if t.status == 'in-progress']
-        completed_tasks = [t for t in all_tasks if t.status == 'completed']
-        high_priority_tasks = [t for t in all_tasks if t.priority == 'high' and t.status != 'completed']
+        stats = self.db.get_stats(by_package=bool(self.current_package), by_priority=True)
+        task_stats = stats['tasks']
+        high_priority = stats['by_priority'].get('high', {})
+        high_priority_active = high_priority.get('total', 0) - high_priority.get('completed', 0)
         
         print("Current Status:")
-        print(f"  Total tasks: {len(all_tasks)}")
-        print(f"  - Pending: {len(pending_tasks)}")
-        print(f"  - In Progress: {len(in_progress_tasks)}")
-        print(f"  - Completed: {len(completed_tasks)}")
-        print(f"  - High Priority (active): {len(high_priority_tasks)}")
-        print(f"  Total notes: {len(all_notes)}")
-        print(f"  Total packages: {len(all_packages)}")
+        print(f"  Total tasks: {task_stats['total']}")
+        print(f"  - Pending: {task_stats['pending']}")
+        print(f"  - In Progress: {task_stats['in_progress']}")
+        print(f"  - Completed: {task_stats['completed']}")
+        print(f"  - High Priority (active): {high_priority_active}")
+        print(f"  - Due today: {task_stats['due_today']}")
+        print(f"  - Overdue: {task_stats['overdue']}")
+        print(f"  Total notes: {stats['notes']['total']}")
+        print(f"  Total packages: {stats['packages']['total']}")
         
         if self.current_package:
-            package_tasks = self.db.list_tasks({'package_id': self.current_package.id})
-            package_notes = self.db.list_notes({'package_id': self.current_package.id})
+            package_stats = stats['by_package'].get(self.current_package.id, {})
             print(f"\nCurrent Package: {self.current_package.name}")
-            print(f"  Tasks in package: {len(package_tasks)}")
-            print(f"  Notes in package: {len(package_notes)}")
+            print(f"  Tasks in package: {package_stats.get('tasks', {}).get('total', 0)}")
+            print(f"  Notes in package: {package_stats.get('notes', 0)}")
         print()
     
     def list_packages(self):
         """List all packages."""
-        packages = self.db.list_packages()
+        packages = self.db.list_packages(fields=PACKAGE_TABLE_FIELDS)
         if not packages:
             print("No packages found. Create one with 'create-package <name>'")
             return
@@ -290,17 +292,16 @@ Examples: complete "wireframes", rm "meeting", archive "old project"
     
     def switch_package(self, name: str):
         """Switch to a specific package."""
-        packages = self.db.list_packages()
-        matching = [p for p in packages if p.name.lower() == name.lower()]
+        package = self.db.get_package_by_name(name)
         
-        if not matching:
+        if not package:
             print(f"Package '{name}' not found.")
             print("Available packages:")
-            for p in packages:
+            for p in self.db.iter_packages(fields=('name',)):
                 print(f"  - {p.name}")
             return
         
-        self.current_package = matching[0]
+        self.current_package = package
         print(f"Switched to package: {self.current_package.name}")
     
     def create_package(self, name: str):
@@ -313,6 +314,7 @@ Examples: complete "wireframes", rm "meeting", archive "old project"
         )
         
         created_package = self.db.create_package(package)
+        self.completion_index.add('packages', created_package.id, created_package.name)
         print(f"Package '{created_package.name}' created successfully!")
         
         switch = input("Switch to this package? (y/N): ").strip().lower()
@@ -326,8 +328,10 @@ Examples: complete "wireframes", rm "meeting", archive "old project"
             print("No package selected. Use 'package <name>' to switch to a package.")
             return
         
-        package_tasks = self.db.list_tasks({'package_id': self.current_package.id})
-        package_notes = self.db.list_notes({'package_id': self.current_package.id})
+        # Counts cover the package and all of its sub-packages
+        rollup = self.db.package_rollup(self.current_package.id) or {
+            'tasks': {'total': 0}, 'notes': 0, 'packages': 0, 'progress': 0
+        }
         
         print(f"Package: {self.current_package.name}")
         if self.current_package.description:
@@ -335,17 +339,19 @@ Examples: complete "wireframes", rm "meeting", archive "old project"
         print(f"Status: {self.current_package.status}")
         if self.current_package.due_date:
             print(f"Due date: {self.current_package.due_date.strftime('%Y-%m-%d')}")
-        print(f"Tasks: {len(package_tasks)}")
-        print(f"Notes: {len(package_notes)}")
+        print(f"Tasks: {rollup['tasks']['total']} ({rollup['progress']}% complete)")
+        print(f"Notes: {rollup['notes']}")
+        if rollup['packages']:
+            print(f"Sub-packages: {rollup['packages']}")
         print()
     
     def list_tasks(self):
         """List tasks (filtered by current package if set)."""
-        filters = {}
+        filters = task_table_filters()
         if self.current_package:
             filters['package_id'] = self.current_package.id
             
-        tasks = self.db.list_tasks(filters)
+        tasks = self.db.list_tasks(filters, fields=TASK_TABLE_FIELDS, order=TASK_TABLE_ORDER)
         
         if not tasks:
             context = f" in package '{self.current_package.name}'" if self.current_package else ""
@@ -364,19 +370,14 @@ Examples: complete "wireframes", rm "meeting", archive "old project"
         else:
             print("Active Items:")
         
-        # Get tasks based on show_all parameter
-        all_tasks = self.db.list_tasks()
-        
-        # Filter to current package if set
-        if self.current_package:
-            all_tasks = [t for t in all_tasks if t.package_id == self.current_package.id]
-        
-        if show_all:
-            # Show all tasks, sort by status and priority
-            active_tasks = all_tasks
-        else:
-            # Separate active and recently completed tasks
-            active_tasks = [t for t in all_tasks if t.status in ['pending', 'in-progress']]
+        # Filter to current package if set; the agenda order (status,
+        # priority, due date) comes from an index, so only the rows shown
+        # are read
+        filters = {'package_id': self.current_package.id} if self.current_package else {}
+        if not show_all:
+            filters['open'] = True
+        limit = None if show_all else 10
+        active_tasks = self.db.list_tasks(filters, limit=limit, order='agenda')
         
         if not active_tasks and not self.current_package:
             no_items_msg = "No tasks" if show_all else "No active tasks"
@@ -387,20 +388,8 @@ Examples: complete "wireframes", rm "meeting", archive "old project"
             print(f"{no_items_msg} in {self.current_package.name}. Use 'create-task <title>' to create one.")
             return
         
-        # Sort by priority and due date, with completed items at the end if showing all
-        def task_sort_key(task):
-            status_order = {'pending': 0, 'in-progress': 1, 'completed': 2, 'cancelled': 3}
-            priority_order = {'urgent': 0, 'high': 1, 'medium': 2, 'low': 3}
-            status_val = status_order.get(task.status, 4)
-            priority_val = priority_order.get(task.priority, 4)
-            due_val = task.due_date.timestamp() if task.due_date else float('inf')
-            return (status_val, priority_val, due_val)
-        
-        active_tasks.sort(key=task_sort_key)
-        
         # Show tasks with enhanced formatting  
-        display_count = len(active_tasks) if show_all else min(10, len(active_tasks))
-        for i, task in enumerate(active_tasks[:display_count]):
+        for i, task in enumerate(active_tasks):
             due_indicator = ""
             if task.due_date:
                 days_until_due = (task.due_date.date() - datetime.now().date()).days
@@ -446,8 +435,10 @@ Examples: complete "wireframes", rm "meeting", archive "old project"
                 # Low priority - use bright white for good visibility on dark backgrounds
                 click.echo(click.style(line, fg='bright_white'))
         
-        if not show_all and len(active_tasks) > 10:
-            print(f"... and {len(active_tasks) - 10} more active tasks. Use 'tasks' to see all.")
+        if not show_all and len(active_tasks) == limit:
+            remaining = self.db.count_tasks(filters) - limit
+            if remaining > 0:
+                print(f"... and {remaining} more active tasks. Use 'tasks' to see all.")
         
         print(f"Quick actions: 'complete <id>' to mark done, 'task <id>' for details")
     
@@ -527,20 +518,16 @@ Examples: complete "wireframes", rm "meeting", archive "old project"
         )
         
         created_task = self.db.create_task(task)
+        self.completion_index.add('tasks', created_task.id, created_task.title)
         print(f"Task '{created_task.title}' created successfully! (ID: {created_task.id[:8]})")
     
     def find_task_by_partial_identifier(self, identifier: str):
         """Find a task by partial ID or title."""
-        all_tasks = self.db.list_tasks()
-        
-        # First try partial ID matching
-        id_matches = [t for t in all_tasks if t.id.startswith(identifier)]
-        
-        # Then try partial title matching (case insensitive)
-        title_matches = [t for t in all_tasks if identifier.lower() in t.title.lower()]
-        
-        # Combine matches, prioritizing ID matches
-        all_matches = id_matches + [t for t in title_matches if t not in id_matches]
+        # Partial ID matches first, then partial title matches (case insensitive)
+        all_matches = self.merge_matches(
+            self.db.find_tasks_by_prefix(identifier, limit=self.MAX_MATCHES + 1),
+            self.db.iter_by_title_fragment('tasks', identifier)
+        )
         
         if len(all_matches) == 1:
             return all_matches[0]
@@ -555,7 +542,8 @@ Examples: complete "wireframes", rm "meeting", archive "old project"
         print(f"\nMultiple tasks match '{identifier}':")
         print("=" * 80)
         
-        for i, task in enumerate(tasks):
+        shown = tasks[:self.MAX_MATCHES]
+        for i, task in enumerate(shown):
             due_str = ""
             if task.due_date:
                 due_str = f" | Due: {task.due_date.strftime('%Y-%m-%d')}"
@@ -578,22 +566,18 @@ Examples: complete "wireframes", rm "meeting", archive "old project"
             print()
         
         print("Use the exact ID (8 characters) to specify which task:")
-        for i, task in enumerate(tasks):
+        for i, task in enumerate(shown):
             print(f"   complete {task.id[:8]}    # {task.title}")
+        self.echo_more_matches(tasks)
         print()
     
     def find_note_by_partial_identifier(self, identifier: str):
         """Find a note by partial ID or title."""
-        all_notes = self.db.list_notes()
-        
-        # First try partial ID matching
-        id_matches = [n for n in all_notes if n.id.startswith(identifier)]
-        
-        # Then try partial title matching (case insensitive)
-        title_matches = [n for n in all_notes if identifier.lower() in n.title.lower()]
-        
-        # Combine matches, prioritizing ID matches
-        all_matches = id_matches + [n for n in title_matches if n not in id_matches]
+        # Partial ID matches first, then partial title matches (case insensitive)
+        all_matches = self.merge_matches(
+            self.db.find_notes_by_prefix(identifier, limit=self.MAX_MATCHES + 1),
+            self.db.iter_by_title_fragment('notes', identifier)
+        )
         
         if len(all_matches) == 1:
             return all_matches[0]
@@ -603,12 +587,43 @@ Examples: complete "wireframes", rm "meeting", archive "old project"
         else:
             return None
     
+    def find_packages_by_partial_identifier(self, identifier: str) -> List[Package]:
+        """Find all packages matching a partial ID or name."""
+        return self.merge_matches(
+            self.db.find_packages_by_prefix(identifier, limit=self.MAX_MATCHES + 1),
+            self.db.iter_by_title_fragment('packages', identifier)
+        )
+    
+    def merge_matches(self, id_matches, title_matches) -> list:
+        """Combine ID and title matches without duplicates, ID matches first.
+        
+        Title matches are consumed lazily and the search stops once more than
+        MAX_MATCHES items were found, which is enough to know the identifier
+        is ambiguous.
+        """
+        matches = []
+        seen = set()
+        for item in chain(id_matches, title_matches):
+            if item.id in seen:
+                continue
+            seen.add(item.id)
+            matches.append(item)
+            if len(matches) > self.MAX_MATCHES:
+                break
+        return matches
+    
+    def echo_more_matches(self, matches: list):
+        """Point out that only the first MAX_MATCHES of many matches were shown."""
+        if len(matches) > self.MAX_MATCHES:
+            print(f"  ... more than {self.MAX_MATCHES} matches; use a longer identifier.")
+    
     def show_multiple_note_matches(self, identifier: str, notes):
         """Show detailed information for multiple note matches."""
         print(f"\nMultiple notes match '{identifier}':")
         print("=" * 80)
         
-        for i, note in enumerate(notes):
+        shown = notes[:self.MAX_MATCHES]
+        for i, note in enumerate(shown):
             print(f"{i+1:2}. {note.title}")
             print(f"    ID: {note.id[:8]} | Updated: {note.updated_at.strftime('%Y-%m-%d %H:%M')}")
             
@@ -621,8 +636,9 @@ Examples: complete "wireframes", rm "meeting", archive "old project"
             print()
         
         print("Use the exact ID (8 characters) to specify which note:")
-        for i, note in enumerate(notes):
+        for i, note in enumerate(shown):
             print(f"   note {note.id[:8]}    # {note.title}")
+        self.echo_more_matches(notes)
         print()
 
     def complete_task(self, identifier: str):
@@ -741,6 +757,7 @@ Examples: complete "wireframes", rm "meeting", archive "old project"
                 
                 task.updated_at = datetime.now()
                 self.db.update_task(task)
+                self.completion_index.add('tasks', task.id, task.title)
                 return True
             
             # Main interaction loop
@@ -853,6 +870,7 @@ Examples: complete "wireframes", rm "meeting", archive "old project"
         # Save changes
         task.updated_at = datetime.now()
         self.db.update_task(task)
+        self.completion_index.add('tasks', task.id, task.title)
         print("\nTask updated successfully!")
     
     def remove_task(self, identifier: str):
@@ -865,6 +883,7 @@ Examples: complete "wireframes", rm "meeting", archive "old project"
         confirm = input(f"Delete task '{task.title}'? (y/N): ").strip().lower()
         if confirm in ['y', 'yes']:
             self.db.delete_task(task.id)
+            self.completion_index.remove('tasks', task.id)
             print(f"Task '{task.title}' deleted.")
         else:
             print("Deletion cancelled.")
@@ -882,45 +901,43 @@ Examples: complete "wireframes", rm "meeting", archive "old project"
     
     def remove_package(self, identifier: str):
         """Remove (delete) a package and all its contents."""
-        packages = self.db.list_packages()
-        matching = [p for p in packages if p.id.startswith(identifier) or identifier.lower() in p.name.lower()]
+        exact = self.db.get_package_by_name(identifier)
+        matching = [exact] if exact else self.find_packages_by_partial_identifier(identifier)
         
         if len(matching) == 1:
             package = matching[0]
         elif len(matching) > 1:
             print(f"Multiple packages match '{identifier}':")
-            for pkg in matching:
+            for pkg in matching[:self.MAX_MATCHES]:
                 print(f"  {pkg.id[:8]} - {pkg.name}")
+            self.echo_more_matches(matching)
             return
         else:
             print(f"Package '{identifier}' not found.")
             return
         
-        # Check for contents
-        package_tasks = self.db.list_tasks({'package_id': package.id})
-        package_notes = self.db.list_notes({'package_id': package.id})
+        # Check for contents across the whole subtree
+        subtree_ids = {pkg.id for pkg in self.db.get_package_tree(package.id)}
+        rollup = self.db.package_rollup(package.id)
         
-        if package_tasks or package_notes:
+        if rollup and (rollup['tasks']['total'] or rollup['notes'] or rollup['packages']):
             print(f"WARNING: Package '{package.name}' contains:")
-            if package_tasks:
-                print(f"  {len(package_tasks)} tasks")
-            if package_notes:
-                print(f"  {len(package_notes)} notes")
+            if rollup['packages']:
+                print(f"  {rollup['packages']} sub-packages")
+            if rollup['tasks']['total']:
+                print(f"  {rollup['tasks']['total']} tasks")
+            if rollup['notes']:
+                print(f"  {rollup['notes']} notes")
             print("  All contents will be deleted as well!")
         
         confirm = input(f"Delete package '{package.name}' and all its contents? (y/N): ").strip().lower()
         if confirm in ['y', 'yes']:
-            # Delete all tasks and notes in the package
-            for task in package_tasks:
-                self.db.delete_task(task.id)
-            for note in package_notes:
-                self.db.delete_note(note.id)
-            
-            # Delete the package
-            self.db.delete_package(package.id)
+            # Delete the subtree and its tasks and notes in one transaction
+            self.db.delete_package(package.id, cascade=True)
+            self.completion_index.rebuild()
             
             # If this was the current package, clear it
-            if self.current_package and self.current_package.id == package.id:
+            if self.current_package and self.current_package.id in subtree_ids:
                 self.current_package = None
             
             print(f"Package '{package.name}' and all its contents deleted.")
@@ -929,23 +946,25 @@ Examples: complete "wireframes", rm "meeting", archive "old project"
     
     def archive_package(self, identifier: str):
         """Archive a package (mark as archived)."""
-        packages = self.db.list_packages()
-        matching = [p for p in packages if p.id.startswith(identifier) or identifier.lower() in p.name.lower()]
+        exact = self.db.get_package_by_name(identifier)
+        matching = [exact] if exact else self.find_packages_by_partial_identifier(identifier)
         
         if len(matching) == 1:
             package = matching[0]
         elif len(matching) > 1:
             print(f"Multiple packages match '{identifier}':")
-            for pkg in matching:
+            for pkg in matching[:self.MAX_MATCHES]:
                 print(f"  {pkg.id[:8]} - {pkg.name}")
+            self.echo_more_matches(matching)
             return
         else:
             print(f"Package '{identifier}' not found.")
             return
         
-        package.archive()
-        self.db.update_package(package)
+        archived = self.db.archive_package(package.id)
         print(f"Package '{package.name}' archived.")
+        if archived > 1:
+            print(f"  Also archived {archived - 1} sub-packages.")
     
     def list_notes(self):
         """List notes (filtered by current package if set)."""
@@ -953,7 +972,7 @@ Examples: complete "wireframes", rm "meeting", archive "old project"
         if self.current_package:
             filters['package_id'] = self.current_package.id
             
-        notes = self.db.list_notes(filters)
+        notes = self.db.list_notes(filters, fields=NOTE_TABLE_FIELDS)
         
         if not notes:
             context = f" in package '{self.current_package.name}'" if self.current_package else ""
@@ -1009,6 +1028,7 @@ Examples: complete "wireframes", rm "meeting", archive "old project"
         )
         
         created_note = self.db.create_note(note)
+        self.completion_index.add('notes', created_note.id, created_note.title)
         print(f"Note '{created_note.title}' created successfully! (ID: {created_note.id[:8]})")
     
     def remove_note(self, identifier: str):
@@ -1021,6 +1041,7 @@ Examples: complete "wireframes", rm "meeting", archive "old project"
         confirm = input(f"Delete note '{note.title}'? (y/N): ").strip().lower()
         if confirm in ['y', 'yes']:
             self.db.delete_note(note.id)
+            self.completion_index.remove('notes', note.id)
             print(f"Note '{note.title}' deleted.")
         else:
             print("Deletion cancelled.")
@@ -1153,8 +1174,7 @@ Examples: complete "wireframes", rm "meeting", archive "old project"
                         return
                     
                     # Try to find as package
-                    packages = self.db.list_packages()
-                    matching_packages = [p for p in packages if p.id.startswith(identifier) or identifier.lower() in p.name.lower()]
+                    matching_packages = self.find_packages_by_partial_identifier(identifier)
                     if matching_packages:
                         self.remove_package(identifier)
                         return
@@ -1174,8 +1194,7 @@ Examples: complete "wireframes", rm "meeting", archive "old project"
                         return
                     
                     # Try to find as package
-                    packages = self.db.list_packages()
-                    matching_packages = [p for p in packages if p.id.startswith(identifier) or identifier.lower() in p.name.lower()]
+                    matching_packages = self.find_packages_by_partial_identifier(identifier)
                     if matching_packages:
                         self.archive_package(identifier)
                         return
@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+import click
+
+
+# Cold-start budget for a scripted `notes` invocation, in milliseconds
+STARTUP_TARGET_MS = 100
+
+ENTRY_MODULE = 'notes.cli'
+
+
+def _run_python(args: List[str]) -> Tuple[float, str]:
+    """Run a fresh interpreter and return (wall time in ms, stderr)."""
+    env = dict(os.environ)
+    # Make sure the child imports this copy of the package
+    package_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [package_root, env.get('PYTHONPATH')]))
+
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable] + args, env=env, capture_output=True, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    return elapsed, result.stderr
+
+
+def parse_importtime(output: str) -> List[Tuple[str, int, int]]:
+    """Parse ``-X importtime`` output into (module, self us, cumulative us) rows."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # header line
+        rows.append((parts[2].strip(), int(parts[0]), int(parts[1])))
+    return rows
+
+
+def report_startup_profile(runs: int = 5, top: int = 10):
+    """Measure how long the CLI takes to start and which imports dominate."""
+    baseline = min(_run_python(['-c', 'pass'])[0] for _ in range(runs))
+    cold = min(_run_python(['-c', f'import {ENTRY_MODULE}'])[0] for _ in range(runs))
+
+    _, output = _run_python(['-X', 'importtime', '-c', f'import {ENTRY_MODULE}'])
+    rows = parse_importtime(output)
+    entry = next((cumulative for name, _, cumulative in rows if name == ENTRY_MODULE), 0)
+
+    click.echo(f"Interpreter startup:   {baseline:7.1f} ms")
+    click.echo(f"Startup with CLI:      {cold:7.1f} ms (best of {runs})")
+    click.echo(f"Importing {ENTRY_MODULE}:     {entry / 1000:7.1f} ms")
+
+    status = 'OK' if cold <= STARTUP_TARGET_MS else 'over budget'
+    click.echo(f"Target:                {STARTUP_TARGET_MS:7d} ms ({status})")
+
+    click.echo(f"\nSlowest imports (self time):")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda row: row[1], reverse=True)[:top]:
+        click.echo(f"  {self_us / 1000:6.1f} ms  {cumulative_us / 1000:6.1f} ms cumulative  {name}")
@@ -1,4 +1,5 @@
 from .database import Database
+from .pool import ConnectionPool
 from .schema import create_tables
 
-__all__ = ['Database', 'create_tables']
\ No newline at end of file
+__all__ = ['Database', 'ConnectionPool', 'create_tables']
\ No newline at end of file
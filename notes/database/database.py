@@ -1,19 +1,206 @@
 import sqlite3
 import json
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+import re
+import base64
+import calendar
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import partial
+from itertools import islice
+from typing import Callable, List, Optional, Dict, Any, Tuple, Sequence, Union, Iterable, Iterator
+from datetime import datetime, date, timedelta
 
-from .schema import initialize_database
+from .schema import initialize_database, REVISION_TABLES, TASK_ORDERS, TASK_STATUS_RANK
+from .deferred import DeferredTask, DeferredNote, DeferredPackage, defer
 from ..models import Task, Note, Package
 
 
+# Subquery yielding the IDs of a package and all of its descendants, for use
+# in ``id IN (...)``. UNION (not UNION ALL) drops repeated IDs, so a parent_id
+# cycle terminates.
+SUBTREE_IDS = '''
+    WITH RECURSIVE subtree(id) AS (
+        SELECT ?
+        UNION
+        SELECT packages.id FROM packages JOIN subtree ON packages.parent_id = subtree.id
+    )
+    SELECT id FROM subtree
+'''
+
+# Column each list is ordered by (newest first); keyset cursors are built on it
+SORT_COLUMNS = {
+    Task: 'created_at',
+    Note: 'updated_at',
+    Package: 'created_at',
+}
+
+
+# Table columns in declaration order, which is also the order of ``SELECT *``.
+# Rows are decoded by position, so these must match the CREATE TABLE
+# statements in schema.py.
+TABLE_COLUMNS = {
+    'tasks': ('id', 'title', 'description', 'status', 'priority', 'due_date',
+              'package_id', 'tags', 'created_at', 'updated_at', 'completed_at'),
+    'notes': ('id', 'title', 'content', 'package_id', 'linked_tasks', 'tags',
+              'created_at', 'updated_at'),
+    'packages': ('id', 'name', 'description', 'parent_id', 'due_date', 'status',
+                 'created_at', 'updated_at'),
+}
+
+fromisoformat = datetime.fromisoformat
+
+
+def optional_datetime(value: Optional[str]) -> Optional[datetime]:
+    """Parse a nullable ISO timestamp column."""
+    return fromisoformat(value) if value else None
+
+
+def json_list(value: Optional[str]) -> list:
+    """Decode a JSON list column; empty lists skip the JSON parser."""
+    return json.loads(value) if value and value != '[]' else []
+
+
+# Callables run after this process commits a write through Database
+_commit_listeners: List[Callable[[], None]] = []
+
+
+def add_commit_listener(listener: Callable[[], None]):
+    """Call ``listener()`` after every write Database commits in this process.
+    
+    Listeners run on the writing thread and must return quickly.
+    """
+    _commit_listeners.append(listener)
+
+
+def remove_commit_listener(listener: Callable[[], None]):
+    """Stop calling a listener registered with add_commit_listener()."""
+    if listener in _commit_listeners:
+        _commit_listeners.remove(listener)
+
+
+def to_epoch(value: Union[datetime, date]) -> int:
+    """Convert a datetime or date to the integer used by the epoch columns.
+    
+    Matches ``strftime('%s', ...)`` in the schema: naive values are read as
+    UTC, aware values are converted to it.
+    """
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    return calendar.timegm(value.utctimetuple())
+
+
+def encode_cursor(sort_value: str, item_id: str) -> str:
+    """Encode a keyset position as an opaque, URL-safe cursor string."""
+    raw = json.dumps([sort_value, item_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a cursor produced by encode_cursor."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, item_id = json.loads(base64.urlsafe_b64decode(padded))
+        return str(sort_value), str(item_id)
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def cursor_after(item: Union[Task, Note, Package]) -> str:
+    """Return the cursor that resumes a list right after ``item``."""
+    sort_column = next(column for model, column in SORT_COLUMNS.items() if isinstance(item, model))
+    return encode_cursor(getattr(item, sort_column).isoformat(), item.id)
+
+
+def next_cursor(items: Sequence[Union[Task, Note, Package]], limit: Optional[int]) -> Optional[str]:
+    """Return the cursor for the page after ``items``, or None on the last page."""
+    if not limit or len(items) < limit:
+        return None
+    return cursor_after(items[-1])
+
+
+INSERT_TASK = '''
+    INSERT INTO tasks (id, title, description, status, priority, due_date, 
+                     package_id, tags, created_at, updated_at, completed_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+UPDATE_TASK = '''
+    UPDATE tasks SET title = ?, description = ?, status = ?, priority = ?,
+                   due_date = ?, package_id = ?, tags = ?, updated_at = ?, completed_at = ?
+    WHERE id = ?
+'''
+
+INSERT_NOTE = '''
+    INSERT INTO notes (id, title, content, package_id, linked_tasks, tags, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+UPDATE_NOTE = '''
+    UPDATE notes SET title = ?, content = ?, package_id = ?, 
+                   linked_tasks = ?, tags = ?, updated_at = ?
+    WHERE id = ?
+'''
+
+INSERT_PACKAGE = '''
+    INSERT INTO packages (id, name, description, parent_id, due_date, status, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+UPDATE_PACKAGE = '''
+    UPDATE packages SET name = ?, description = ?, parent_id = ?, 
+                      due_date = ?, status = ?, updated_at = ?
+    WHERE id = ?
+'''
+
+# Insert-or-update statements used by import. An UPSERT (rather than INSERT OR
+# REPLACE) updates the row in place, so the index triggers see an UPDATE.
+UPSERT_TASK = INSERT_TASK + '''
+    ON CONFLICT (id) DO UPDATE SET
+        title = excluded.title, description = excluded.description, status = excluded.status,
+        priority = excluded.priority, due_date = excluded.due_date, package_id = excluded.package_id,
+        tags = excluded.tags, created_at = excluded.created_at, updated_at = excluded.updated_at,
+        completed_at = excluded.completed_at
+'''
+
+UPSERT_NOTE = INSERT_NOTE + '''
+    ON CONFLICT (id) DO UPDATE SET
+        title = excluded.title, content = excluded.content, package_id = excluded.package_id,
+        linked_tasks = excluded.linked_tasks, tags = excluded.tags,
+        created_at = excluded.created_at, updated_at = excluded.updated_at
+'''
+
+UPSERT_PACKAGE = INSERT_PACKAGE + '''
+    ON CONFLICT (id) DO UPDATE SET
+        name = excluded.name, description = excluded.description, parent_id = excluded.parent_id,
+        due_date = excluded.due_date, status = excluded.status,
+        created_at = excluded.created_at, updated_at = excluded.updated_at
+'''
+
+
 class Database:
-    def __init__(self):
-        self.conn = initialize_database()
+    # Number of package-name lookups remembered by get_package_by_name
+    PACKAGE_NAME_CACHE_SIZE = 128
+    TAG_MODES = ('all', 'any')
+
+    # Large text columns that list queries leave out unless asked for in
+    # ``fields``; models then load them on first access
+    DEFERRABLE_COLUMNS = {
+        'tasks': 'description',
+        'notes': 'content',
+        'packages': 'description',
+    }
+
+    def __init__(self, conn: Optional[sqlite3.Connection] = None):
+        # A connection passed in (e.g. from a ConnectionPool) belongs to the caller
+        self._owns_connection = conn is None
+        self.conn = conn if conn is not None else initialize_database()
+        self._transaction_depth = 0
+        self._package_name_cache: 'OrderedDict[str, Optional[sqlite3.Row]]' = OrderedDict()
+        self._package_cache_version: Optional[int] = None
 
     def close(self):
         """Close the database connection."""
-        if self.conn:
+        if self.conn and self._owns_connection:
             self.conn.close()
 
     def __enter__(self):
@@ -22,22 +209,62 @@ class Database:
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
+    @contextmanager
+    def transaction(self):
+        """Group writes into a single transaction, committed once at the end.
+        
+        Individual write methods called inside the block skip their own
+        commit. Nested blocks join the outermost transaction, and any
+        exception rolls the whole transaction back. The write lock is taken
+        up front (BEGIN IMMEDIATE), waiting out other writers for up to the
+        busy timeout, so reads in the block can't strand the transaction
+        with a "database is locked" error when it later writes.
+        """
+        if self._transaction_depth == 0 and not self.conn.in_transaction:
+            self.conn.execute('BEGIN IMMEDIATE')
+        self._transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self.conn.rollback()
+                self._discard_cached_lookups()
+            raise
+        self._transaction_depth -= 1
+        if self._transaction_depth == 0:
+            self._commit()
+
+    @contextmanager
+    def savepoint(self, name: str = 'block'):
+        """Run a block inside a transaction() so that an exception undoes
+        only the block's own writes, then re-raises."""
+        self.conn.execute(f'SAVEPOINT {name}')
+        try:
+            yield self
+        except BaseException:
+            self.conn.execute(f'ROLLBACK TO {name}')
+            self.conn.execute(f'RELEASE {name}')
+            self._discard_cached_lookups()
+            raise
+        self.conn.execute(f'RELEASE {name}')
+
+    def _discard_cached_lookups(self):
+        """Forget cached package-name lookups, e.g. after rolling back writes they may have seen."""
+        self._package_name_cache.clear()
+
+    def _commit(self):
+        """Commit unless an enclosing transaction() block will do it."""
+        if self._transaction_depth == 0:
+            self.conn.commit()
+            for listener in _commit_listeners:
+                listener()
+
     # Task operations
     def create_task(self, task: Task) -> Task:
         """Create a new task in the database."""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            INSERT INTO tasks (id, title, description, status, priority, due_date, 
-                             package_id, tags, created_at, updated_at, completed_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            task.id, task.title, task.description, task.status, task.priority,
-            task.due_date.isoformat() if task.due_date else None,
-            task.package_id, json.dumps(task.tags),
-            task.created_at.isoformat(), task.updated_at.isoformat(),
-            task.completed_at.isoformat() if task.completed_at else None
-        ))
-        self.conn.commit()
+        self.conn.execute(INSERT_TASK, self._task_insert_params(task))
+        self._commit()
         return task
 
     def get_task(self, task_id: str) -> Optional[Task]:
@@ -51,82 +278,238 @@ class Database:
 
     def update_task(self, task: Task) -> Task:
         """Update an existing task."""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            UPDATE tasks SET title = ?, description = ?, status = ?, priority = ?,
-                           due_date = ?, package_id = ?, tags = ?, updated_at = ?, completed_at = ?
-            WHERE id = ?
-        ''', (
-            task.title, task.description, task.status, task.priority,
-            task.due_date.isoformat() if task.due_date else None,
-            task.package_id, json.dumps(task.tags),
-            task.updated_at.isoformat(),
-            task.completed_at.isoformat() if task.completed_at else None,
-            task.id
-        ))
-        self.conn.commit()
+        self.conn.execute(UPDATE_TASK, self._task_update_params(task))
+        self._commit()
         return task
 
     def delete_task(self, task_id: str) -> bool:
         """Delete a task by ID."""
         cursor = self.conn.cursor()
         cursor.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
-        self.conn.commit()
+        self._commit()
         return cursor.rowcount > 0
 
-    def list_tasks(self, filters: Optional[Dict[str, Any]] = None) -> List[Task]:
-        """List tasks with optional filters."""
-        query = 'SELECT * FROM tasks WHERE 1=1'
+    def list_tasks(self, filters: Optional[Dict[str, Any]] = None, limit: Optional[int] = None,
+                   offset: Optional[int] = None, cursor: Optional[str] = None,
+                   fields: Optional[Sequence[str]] = None, order: str = 'newest') -> List[Task]:
+        """List tasks matching ``filters`` in one of TASK_ORDERS; page with ``limit`` and
+        ``offset``, or a ``cursor`` from next_cursor() in the default ``newest`` order."""
+        return list(self.iter_tasks(filters, limit, offset, cursor, fields, order=order))
+
+    def iter_tasks(self, filters: Optional[Dict[str, Any]] = None, limit: Optional[int] = None,
+                   offset: Optional[int] = None, cursor: Optional[str] = None,
+                   fields: Optional[Sequence[str]] = None, batch_size: int = 1000,
+                   order: str = 'newest') -> Iterator[Task]:
+        """Like list_tasks(), but yield tasks lazily, fetching ``batch_size`` rows at a time."""
+        if order not in TASK_ORDERS:
+            raise ValueError(f"Invalid order. Must be one of: {list(TASK_ORDERS)}")
+        conditions, params = self._task_conditions(filters or {})
+        return self._iter_list('tasks', self._row_to_task, conditions, params, 'created_at',
+                               limit, offset, cursor, fields, batch_size, order=TASK_ORDERS[order])
+
+    def count_tasks(self, filters: Optional[Dict[str, Any]] = None) -> int:
+        """Count the tasks list_tasks() would return for ``filters``."""
+        conditions, params = self._task_conditions(filters or {})
+        return self.conn.execute(f'SELECT COUNT(*) FROM tasks WHERE 1=1{conditions}', params).fetchone()[0]
+
+    def _task_conditions(self, filters: Dict[str, Any]) -> Tuple[str, list]:
+        """Build the ``AND ...`` conditions and parameters for task filters."""
+        query = ''
         params = []
+        if filters.get('status'):
+            query += ' AND status = ?'
+            params.append(filters['status'])
+        if filters.get('open'):
+            # Pending or in-progress, written as a range on the leading
+            # column of idx_tasks_agenda so agenda lists come off the index
+            query += f' AND {TASK_STATUS_RANK} < 2'
+        if filters.get('priority'):
+            query += ' AND priority = ?'
+            params.append(filters['priority'])
+        if filters.get('package_id'):
+            query += ' AND package_id = ?'
+            params.append(filters['package_id'])
+        # Date ranges are index range scans on the epoch columns. Without
+        # ANALYZE statistics SQLite would rather walk the created_at index
+        # for the ORDER BY, so the terms are marked unlikely() (selective)
+        # and the status test written as +status to keep it off the
+        # low-cardinality status index.
+        if filters.get('due_after'):
+            query += ' AND unlikely(due_epoch >= ?)'
+            params.append(to_epoch(filters['due_after']))
+        if filters.get('due_before'):
+            query += ' AND unlikely(due_epoch < ?)'
+            params.append(to_epoch(filters['due_before']))
+        if filters.get('completed_since'):
+            query += ' AND unlikely(completed_epoch >= ?)'
+            params.append(to_epoch(filters['completed_since']))
+        if filters.get('overdue'):
+            query += " AND unlikely(due_epoch < ?) AND +status IN ('pending', 'in-progress')"
+            params.append(to_epoch(datetime.now()))
+        if filters.get('completed_cutoff'):
+            query += " AND (status != 'completed' OR completed_epoch >= ?)"
+            params.append(to_epoch(filters['completed_cutoff']))
+        return self._filter_by_tags(query, params, 'task_tags', 'task_id', filters)
 
-        if filters:
-            if filters.get('status'):
-                query += ' AND status = ?'
-                params.append(filters['status'])
-            if filters.get('priority'):
-                query += ' AND priority = ?'
-                params.append(filters['priority'])
-            if filters.get('package_id'):
-                query += ' AND package_id = ?'
-                params.append(filters['package_id'])
+    @staticmethod
+    def _task_insert_params(task: Task) -> tuple:
+        """Column values for INSERT_TASK."""
+        return (
+            task.id, task.title, task.description, task.status, task.priority,
+            task.due_date.isoformat() if task.due_date else None,
+            task.package_id, json.dumps(task.tags),
+            task.created_at.isoformat(), task.updated_at.isoformat(),
+            task.completed_at.isoformat() if task.completed_at else None
+        )
 
-        query += ' ORDER BY created_at DESC'
+    @staticmethod
+    def _task_update_params(task: Task) -> tuple:
+        """Column values for UPDATE_TASK."""
+        return (
+            task.title, task.description, task.status, task.priority,
+            task.due_date.isoformat() if task.due_date else None,
+            task.package_id, json.dumps(task.tags),
+            task.updated_at.isoformat(),
+            task.completed_at.isoformat() if task.completed_at else None,
+            task.id
+        )
+
+    def _row_to_task(self, row, deferred: bool = False) -> Task:
+        """Convert database row to Task object.
         
-        cursor = self.conn.cursor()
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        return [self._row_to_task(row) for row in rows]
+        Columns are read by position (see ``TABLE_COLUMNS``) and every field
+        is passed to the constructor, so no default factory runs.
+        """
+        (task_id, title, description, status, priority, due_date, package_id,
+         tags, created_at, updated_at, completed_at) = row[:11]
+        task = (DeferredTask if deferred else Task)(
+            title=title,
+            id=task_id,
+            description=description,
+            status=status,
+            priority=priority,
+            due_date=optional_datetime(due_date),
+            package_id=package_id,
+            tags=json_list(tags),
+            created_at=fromisoformat(created_at),
+            updated_at=fromisoformat(updated_at),
+            completed_at=optional_datetime(completed_at)
+        )
+        return self._defer(task, 'tasks') if deferred else task
 
-    def _row_to_task(self, row) -> Task:
-        """Convert database row to Task object."""
-        data = {
-            'id': row['id'],
-            'title': row['title'],
-            'description': row['description'],
-            'status': row['status'],
-            'priority': row['priority'],
-            'due_date': row['due_date'],
-            'package_id': row['package_id'],
-            'tags': json.loads(row['tags']) if row['tags'] else [],
-            'created_at': row['created_at'],
-            'updated_at': row['updated_at'],
-            'completed_at': row['completed_at']
-        }
-        return Task.from_dict(data)
+    @classmethod
+    def _filter_by_tags(cls, query: str, params: list, link_table: str, key_column: str,
+                        filters: Dict[str, Any]) -> Tuple[str, list]:
+        """Append a tag filter answered from the tag index tables.
+        
+        ``filters['tag']`` matches one tag. ``filters['tags']`` matches a list
+        of tags, either all of them (``tag_mode='all'``, the default) or any
+        of them (``tag_mode='any'``). Tag names are case-insensitive.
+        """
+        tags = list(filters.get('tags') or [])
+        if filters.get('tag'):
+            tags.append(filters['tag'])
+        # De-duplicate case-insensitively, matching the NOCASE tag names
+        tags = list({tag.strip().lower(): tag.strip() for tag in tags if tag.strip()}.values())
+        if not tags:
+            return query, params
+
+        mode = filters.get('tag_mode') or 'all'
+        if mode not in cls.TAG_MODES:
+            raise ValueError(f"Invalid tag mode. Must be one of: {list(cls.TAG_MODES)}")
+
+        placeholders = ', '.join('?' * len(tags))
+        subquery = (
+            f'SELECT link.{key_column} FROM {link_table} AS link '
+            f'JOIN tags ON tags.id = link.tag_id WHERE tags.name IN ({placeholders})'
+        )
+        params = list(params) + tags
+        if mode == 'all' and len(tags) > 1:
+            subquery += f' GROUP BY link.{key_column} HAVING COUNT(*) = ?'
+            params.append(len(tags))
+        return query + f' AND id IN ({subquery})', params
+
+    @staticmethod
+    def _paginate(query: str, params: list, sort_column: str, limit: Optional[int],
+                  offset: Optional[int], cursor: Optional[str], order: Optional[str] = None) -> Tuple[str, list]:
+        """Append keyset/offset pagination and ordering to a list query.
+        
+        Lists are newest first on ``sort_column`` unless ``order`` gives
+        another ORDER BY clause, which supports offsets but not cursors.
+        """
+        default_order = f'{sort_column} DESC, id DESC'
+        order = order or default_order
+        params = list(params)
+        if cursor:
+            if order != default_order:
+                raise ValueError("Cursors can only be used with the default (newest first) order")
+            sort_value, item_id = decode_cursor(cursor)
+            query += f' AND ({sort_column}, id) < (?, ?)'
+            params.extend([sort_value, item_id])
+
+        query += f' ORDER BY {order}'
+
+        if limit is not None or offset:
+            query += ' LIMIT ? OFFSET ?'
+            params.extend([limit if limit is not None else -1, offset or 0])
+        return query, params
+
+    def _projection(self, table: str, fields: Optional[Sequence[str]]) -> Tuple[str, bool]:
+        """Build the SELECT column list for ``fields``; also report whether the body is deferred."""
+        columns = TABLE_COLUMNS[table]
+        if fields is None:
+            return ', '.join(columns), False
+
+        unknown = [name for name in fields if name not in columns]
+        if unknown:
+            raise ValueError(f"Unknown field(s) {', '.join(unknown)}. Must be among: {list(columns)}")
+
+        body = self.DEFERRABLE_COLUMNS[table]
+        if body in fields:
+            return ', '.join(columns), False
+        # Every other column is cheap, so models stay complete apart from the
+        # body; it is selected as NULL to keep the column positions intact
+        return ', '.join(f'NULL AS {column}' if column == body else column for column in columns), True
+
+    def _defer(self, item, table: str):
+        """Attach a loader that reads the deferred body column of ``item`` on demand."""
+        return defer(item, [self.DEFERRABLE_COLUMNS[table]], partial(self._load_column, table, item.id))
+
+    def _load_column(self, table: str, item_id: str, column: str):
+        """Read one column of one row, as used by deferred models."""
+        row = self.conn.execute(f'SELECT {column} FROM {table} WHERE id = ?', (item_id,)).fetchone()
+        return row[0] if row else None
+
+    def _iter_list(self, table: str, convert: Callable, conditions: str, params: list, sort_column: str,
+                   limit: Optional[int], offset: Optional[int], cursor: Optional[str],
+                   fields: Optional[Sequence[str]], batch_size: int, order: Optional[str] = None) -> Iterator:
+        """Run a paginated list query over ``table`` and lazily convert its rows.
+        
+        Not a generator itself: the query is built eagerly so bad filters or
+        cursors raise here, not on first use.
+        """
+        columns, deferred = self._projection(table, fields)
+        query, params = self._paginate(f'SELECT {columns} FROM {table} WHERE 1=1{conditions}', params,
+                                       sort_column, limit, offset, cursor, order=order)
+        return (convert(row, deferred) for row in self._iter_rows(query, params, batch_size))
+
+    def _iter_rows(self, query: str, params: Sequence = (), batch_size: int = 1000) -> Iterator[sqlite3.Row]:
+        """Yield the rows of a query, fetching ``batch_size`` rows at a time."""
+        cursor = self.conn.execute(query, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
 
     # Note operations
     def create_note(self, note: Note) -> Note:
         """Create a new note in the database."""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            INSERT INTO notes (id, title, content, package_id, linked_tasks, tags, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            note.id, note.title, note.content, note.package_id,
-            json.dumps(note.linked_tasks), json.dumps(note.tags),
-            note.created_at.isoformat(), note.updated_at.isoformat()
-        ))
-        self.conn.commit()
+        self.conn.execute(INSERT_NOTE, self._note_insert_params(note))
+        self._commit()
         return note
 
     def get_note(self, note_id: str) -> Optional[Note]:
@@ -140,70 +523,78 @@ class Database:
 
     def update_note(self, note: Note) -> Note:
         """Update an existing note."""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            UPDATE notes SET title = ?, content = ?, package_id = ?, 
-                           linked_tasks = ?, tags = ?, updated_at = ?
-            WHERE id = ?
-        ''', (
-            note.title, note.content, note.package_id,
-            json.dumps(note.linked_tasks), json.dumps(note.tags),
-            note.updated_at.isoformat(), note.id
-        ))
-        self.conn.commit()
+        self.conn.execute(UPDATE_NOTE, self._note_update_params(note))
+        self._commit()
         return note
 
     def delete_note(self, note_id: str) -> bool:
         """Delete a note by ID."""
         cursor = self.conn.cursor()
         cursor.execute('DELETE FROM notes WHERE id = ?', (note_id,))
-        self.conn.commit()
+        self._commit()
         return cursor.rowcount > 0
 
-    def list_notes(self, filters: Optional[Dict[str, Any]] = None) -> List[Note]:
-        """List notes with optional filters."""
-        query = 'SELECT * FROM notes WHERE 1=1'
+    def list_notes(self, filters: Optional[Dict[str, Any]] = None, limit: Optional[int] = None,
+                   offset: Optional[int] = None, cursor: Optional[str] = None,
+                   fields: Optional[Sequence[str]] = None) -> List[Note]:
+        """List notes with optional filters, most recently updated first."""
+        return list(self.iter_notes(filters, limit, offset, cursor, fields))
+
+    def iter_notes(self, filters: Optional[Dict[str, Any]] = None, limit: Optional[int] = None,
+                   offset: Optional[int] = None, cursor: Optional[str] = None,
+                   fields: Optional[Sequence[str]] = None, batch_size: int = 1000) -> Iterator[Note]:
+        """Like list_notes(), but yield notes lazily, fetching ``batch_size`` rows at a time."""
+        conditions = ''
         params = []
 
         if filters:
             if filters.get('package_id'):
-                query += ' AND package_id = ?'
+                conditions += ' AND package_id = ?'
                 params.append(filters['package_id'])
+            conditions, params = self._filter_by_tags(conditions, params, 'note_tags', 'note_id', filters)
 
-        query += ' ORDER BY updated_at DESC'
-        
-        cursor = self.conn.cursor()
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        return [self._row_to_note(row) for row in rows]
+        return self._iter_list('notes', self._row_to_note, conditions, params, 'updated_at',
+                               limit, offset, cursor, fields, batch_size)
 
-    def _row_to_note(self, row) -> Note:
-        """Convert database row to Note object."""
-        data = {
-            'id': row['id'],
-            'title': row['title'],
-            'content': row['content'],
-            'package_id': row['package_id'],
-            'linked_tasks': json.loads(row['linked_tasks']) if row['linked_tasks'] else [],
-            'tags': json.loads(row['tags']) if row['tags'] else [],
-            'created_at': row['created_at'],
-            'updated_at': row['updated_at']
-        }
-        return Note.from_dict(data)
+    @staticmethod
+    def _note_insert_params(note: Note) -> tuple:
+        """Column values for INSERT_NOTE."""
+        return (
+            note.id, note.title, note.content, note.package_id,
+            json.dumps(note.linked_tasks), json.dumps(note.tags),
+            note.created_at.isoformat(), note.updated_at.isoformat()
+        )
+
+    @staticmethod
+    def _note_update_params(note: Note) -> tuple:
+        """Column values for UPDATE_NOTE."""
+        return (
+            note.title, note.content, note.package_id,
+            json.dumps(note.linked_tasks), json.dumps(note.tags),
+            note.updated_at.isoformat(), note.id
+        )
+
+    def _row_to_note(self, row, deferred: bool = False) -> Note:
+        """Convert database row to Note object, reading columns by position."""
+        note_id, title, content, package_id, linked_tasks, tags, created_at, updated_at = row[:8]
+        note = (DeferredNote if deferred else Note)(
+            title=title,
+            content=content,
+            id=note_id,
+            package_id=package_id,
+            linked_tasks=json_list(linked_tasks),
+            tags=json_list(tags),
+            created_at=fromisoformat(created_at),
+            updated_at=fromisoformat(updated_at)
+        )
+        return self._defer(note, 'notes') if deferred else note
 
     # Package operations
     def create_package(self, package: Package) -> Package:
         """Create a new package in the database."""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            INSERT INTO packages (id, name, description, parent_id, due_date, status, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            package.id, package.name, package.description, package.parent_id,
-            package.due_date.isoformat() if package.due_date else None,
-            package.status, package.created_at.isoformat(), package.updated_at.isoformat()
-        ))
-        self.conn.commit()
+        self.conn.execute(INSERT_PACKAGE, self._package_insert_params(package))
+        self._discard_cached_lookups()
+        self._commit()
         return package
 
     def get_package(self, package_id: str) -> Optional[Package]:
@@ -215,94 +606,682 @@ class Database:
             return self._row_to_package(row)
         return None
 
+    def get_package_by_name(self, name: str) -> Optional[Package]:
+        """Get a package by exact, case-insensitive name.
+        
+        If several packages share the name, the newest one is returned. Lookups
+        use a NOCASE index and are cached; the cache is dropped whenever a
+        package is written through this connection or another connection
+        commits a change.
+        """
+        key = name.lower()
+        version = self.data_version()
+        if version != self._package_cache_version:
+            self._package_name_cache.clear()
+            self._package_cache_version = version
+
+        if key in self._package_name_cache:
+            self._package_name_cache.move_to_end(key)
+            row = self._package_name_cache[key]
+        else:
+            row = self.conn.execute(
+                'SELECT * FROM packages WHERE name = ? COLLATE NOCASE ORDER BY created_at DESC LIMIT 1',
+                (name,)
+            ).fetchone()
+            self._package_name_cache[key] = row
+            if len(self._package_name_cache) > self.PACKAGE_NAME_CACHE_SIZE:
+                self._package_name_cache.popitem(last=False)
+
+        # Rows are cached rather than models so callers can't mutate cached state
+        return self._row_to_package(row) if row else None
+
     def update_package(self, package: Package) -> Package:
         """Update an existing package."""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            UPDATE packages SET name = ?, description = ?, parent_id = ?, 
-                              due_date = ?, status = ?, updated_at = ?
-            WHERE id = ?
-        ''', (
-            package.name, package.description, package.parent_id,
-            package.due_date.isoformat() if package.due_date else None,
-            package.status, package.updated_at.isoformat(), package.id
-        ))
-        self.conn.commit()
+        self.conn.execute(UPDATE_PACKAGE, self._package_update_params(package))
+        self._discard_cached_lookups()
+        self._commit()
         return package
 
-    def delete_package(self, package_id: str) -> bool:
-        """Delete a package by ID."""
-        cursor = self.conn.cursor()
-        cursor.execute('DELETE FROM packages WHERE id = ?', (package_id,))
-        self.conn.commit()
+    def delete_package(self, package_id: str, cascade: bool = False) -> bool:
+        """Delete a package by ID.
+        
+        With ``cascade`` the package's descendants and every task and note in
+        the subtree are deleted too. Otherwise its tasks and notes are left
+        without a package and its sub-packages move up to its parent. Either
+        way it takes a few set-based statements in a single transaction.
+        """
+        self._discard_cached_lookups()
+        with self.transaction():
+            if cascade:
+                # Notes go before tasks so unlinking deleted tasks doesn't
+                # rewrite notes that are about to be deleted anyway
+                for table in ('notes', 'tasks'):
+                    self.conn.execute(
+                        f'DELETE FROM {table} WHERE package_id IN ({SUBTREE_IDS})', (package_id,)
+                    )
+                cursor = self.conn.execute(f'DELETE FROM packages WHERE id IN ({SUBTREE_IDS})', (package_id,))
+            else:
+                for table in ('tasks', 'notes'):
+                    self.conn.execute(f'UPDATE {table} SET package_id = NULL WHERE package_id = ?', (package_id,))
+                self.conn.execute(
+                    'UPDATE packages SET parent_id = (SELECT parent_id FROM packages WHERE id = ?) '
+                    'WHERE parent_id = ?',
+                    (package_id, package_id)
+                )
+                cursor = self.conn.execute('DELETE FROM packages WHERE id = ?', (package_id,))
         return cursor.rowcount > 0
 
-    def list_packages(self, filters: Optional[Dict[str, Any]] = None) -> List[Package]:
-        """List packages with optional filters."""
-        query = 'SELECT * FROM packages WHERE 1=1'
+    def list_packages(self, filters: Optional[Dict[str, Any]] = None, limit: Optional[int] = None,
+                      offset: Optional[int] = None, cursor: Optional[str] = None,
+                      fields: Optional[Sequence[str]] = None) -> List[Package]:
+        """List packages with optional filters, newest first."""
+        return list(self.iter_packages(filters, limit, offset, cursor, fields))
+
+    def iter_packages(self, filters: Optional[Dict[str, Any]] = None, limit: Optional[int] = None,
+                      offset: Optional[int] = None, cursor: Optional[str] = None,
+                      fields: Optional[Sequence[str]] = None, batch_size: int = 1000) -> Iterator[Package]:
+        """Like list_packages(), but yield packages lazily, fetching ``batch_size`` rows at a time."""
+        conditions = ''
         params = []
 
         if filters:
             if filters.get('status'):
-                query += ' AND status = ?'
+                conditions += ' AND status = ?'
                 params.append(filters['status'])
             if filters.get('parent_id'):
-                query += ' AND parent_id = ?'
+                conditions += ' AND parent_id = ?'
                 params.append(filters['parent_id'])
 
-        query += ' ORDER BY created_at DESC'
+        return self._iter_list('packages', self._row_to_package, conditions, params, 'created_at',
+                               limit, offset, cursor, fields, batch_size)
+
+    @staticmethod
+    def _package_insert_params(package: Package) -> tuple:
+        """Column values for INSERT_PACKAGE."""
+        return (
+            package.id, package.name, package.description, package.parent_id,
+            package.due_date.isoformat() if package.due_date else None,
+            package.status, package.created_at.isoformat(), package.updated_at.isoformat()
+        )
+
+    @staticmethod
+    def _package_update_params(package: Package) -> tuple:
+        """Column values for UPDATE_PACKAGE."""
+        return (
+            package.name, package.description, package.parent_id,
+            package.due_date.isoformat() if package.due_date else None,
+            package.status, package.updated_at.isoformat(), package.id
+        )
+
+    def _row_to_package(self, row, deferred: bool = False) -> Package:
+        """Convert database row to Package object, reading columns by position."""
+        package_id, name, description, parent_id, due_date, status, created_at, updated_at = row[:8]
+        package = (DeferredPackage if deferred else Package)(
+            name=name,
+            id=package_id,
+            description=description,
+            parent_id=parent_id,
+            due_date=optional_datetime(due_date),
+            status=status,
+            created_at=fromisoformat(created_at),
+            updated_at=fromisoformat(updated_at)
+        )
+        return self._defer(package, 'packages') if deferred else package
+
+    # Lightweight lookups
+    def list_titles(self, kind: str) -> List[Tuple[str, str]]:
+        """List (id, title) pairs for 'tasks', 'notes' or 'packages' (id, name)."""
+        columns = {'tasks': 'title', 'notes': 'title', 'packages': 'name'}
+        if kind not in columns:
+            raise ValueError(f"Invalid kind. Must be one of: {list(columns)}")
+        return [tuple(row) for row in self.conn.execute(f'SELECT id, {columns[kind]} FROM {kind}')]
+
+    def notes_for_task(self, task_id: str) -> List[Note]:
+        """List the notes that link to a task, most recently updated first."""
+        rows = self.conn.execute('''
+            SELECT notes.* FROM note_task_links AS link
+            JOIN notes ON notes.id = link.note_id
+            WHERE link.task_id = ?
+            ORDER BY notes.updated_at DESC, notes.id DESC
+        ''', (task_id,)).fetchall()
+        return [self._row_to_note(row) for row in rows]
+
+    def tasks_for_note(self, note_id: str) -> List[Task]:
+        """List the existing tasks a note links to, newest first."""
+        rows = self.conn.execute('''
+            SELECT tasks.* FROM note_task_links AS link
+            JOIN tasks ON tasks.id = link.task_id
+            WHERE link.note_id = ?
+            ORDER BY tasks.created_at DESC, tasks.id DESC
+        ''', (note_id,)).fetchall()
+        return [self._row_to_task(row) for row in rows]
+
+    def tag_counts(self, kind: Optional[str] = None) -> List[Tuple[str, int]]:
+        """Count how often each tag is used, most used first.
         
-        cursor = self.conn.cursor()
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        return [self._row_to_package(row) for row in rows]
+        ``kind`` limits the count to 'tasks' or 'notes'; by default both are
+        counted.
+        """
+        link_tables = {'tasks': 'task_tags', 'notes': 'note_tags'}
+        if kind is not None and kind not in link_tables:
+            raise ValueError(f"Invalid kind. Must be one of: {list(link_tables)}")
+
+        selected = [link_tables[kind]] if kind else list(link_tables.values())
+        links = ' UNION ALL '.join(f'SELECT tag_id FROM {table}' for table in selected)
+        rows = self.conn.execute(f'''
+            SELECT tags.name, COUNT(*) AS uses
+            FROM ({links}) AS link
+            JOIN tags ON tags.id = link.tag_id
+            GROUP BY tags.id
+            ORDER BY uses DESC, tags.name
+        ''').fetchall()
+        return [(row['name'], row['uses']) for row in rows]
+
+    def data_version(self) -> int:
+        """Return SQLite's data_version, which changes when another connection commits."""
+        return self.conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def table_revisions(self, tables: Sequence[str] = REVISION_TABLES) -> Dict[str, Tuple[int, int]]:
+        """Return ``{table: (revision, modified_at)}`` from the trigger-maintained counters.
+        
+        A table's revision changes with every insert, update or delete on it;
+        ``modified_at`` is the time of the last change in seconds since 1970.
+        """
+        placeholders = ', '.join('?' * len(tables))
+        rows = self.conn.execute(
+            f'SELECT name, revision, modified_at FROM table_revisions WHERE name IN ({placeholders})',
+            list(tables)
+        )
+        return {name: (revision, modified_at) for name, revision, modified_at in rows}
+
+    def current_revision(self) -> int:
+        """Return the revision of the latest change to any task, note or package."""
+        return self.conn.execute('SELECT MAX(revision) FROM table_revisions').fetchone()[0]
 
-    def _row_to_package(self, row) -> Package:
-        """Convert database row to Package object."""
-        data = {
-            'id': row['id'],
-            'name': row['name'],
-            'description': row['description'],
-            'parent_id': row['parent_id'],
-            'due_date': row['due_date'],
-            'status': row['status'],
-            'created_at': row['created_at'],
-            'updated_at': row['updated_at']
+    def changes_since(self, since: int) -> Dict[str, Any]:
+        """Collect what changed after revision ``since``.
+        
+        Returns ``{'revision': R, 'tasks': [...], 'notes': [...], 'packages':
+        [...], 'deleted': {'tasks': [ids], ...}}`` with the current state of
+        every item inserted or updated in ``(since, R]`` and the IDs of those
+        deleted. Pass ``R`` as ``since`` next time. Changes made while this
+        runs get revisions above ``R`` and are picked up by that next call.
+        """
+        revision = self.current_revision()
+        changes = {'revision': revision, 'deleted': {}}
+        converters = {
+            'tasks': self._row_to_task,
+            'notes': self._row_to_note,
+            'packages': self._row_to_package
         }
-        return Package.from_dict(data)
+        for table, convert in converters.items():
+            columns, _ = self._projection(table, None)
+            rows = self.conn.execute(
+                f'SELECT {columns} FROM {table} WHERE revision > ? AND revision <= ? ORDER BY revision',
+                (since, revision)
+            )
+            changes[table] = [convert(row) for row in rows]
+            deleted = self.conn.execute(
+                'SELECT id FROM tombstones WHERE table_name = ? AND revision > ? AND revision <= ?',
+                (table, since, revision)
+            )
+            changes['deleted'][table] = [item_id for (item_id,) in deleted]
+        return changes
+
+    # Partial identifier lookup
+    def find_tasks_by_prefix(self, id_prefix: str, limit: Optional[int] = None) -> List[Task]:
+        """Find tasks whose ID starts with the given prefix."""
+        return [self._row_to_task(row) for row in self._find_by_id_prefix('tasks', id_prefix, limit)]
+
+    def find_notes_by_prefix(self, id_prefix: str, limit: Optional[int] = None) -> List[Note]:
+        """Find notes whose ID starts with the given prefix."""
+        return [self._row_to_note(row) for row in self._find_by_id_prefix('notes', id_prefix, limit)]
+
+    def find_packages_by_prefix(self, id_prefix: str, limit: Optional[int] = None) -> List[Package]:
+        """Find packages whose ID starts with the given prefix."""
+        return [self._row_to_package(row) for row in self._find_by_id_prefix('packages', id_prefix, limit)]
+
+    def _find_by_id_prefix(self, table: str, id_prefix: str, limit: Optional[int]) -> List[sqlite3.Row]:
+        """Run an ``id >= ? AND id < ?`` range scan on the primary key index."""
+        lower = id_prefix.strip().lower()
+        if not lower:
+            return []
+        # Smallest string greater than every string starting with the prefix
+        upper = lower[:-1] + chr(ord(lower[-1]) + 1)
+        return self.conn.execute(
+            f'SELECT * FROM {table} WHERE id >= ? AND id < ? ORDER BY id LIMIT ?',
+            (lower, upper, limit if limit is not None else -1)
+        ).fetchall()
+
+    def find_by_title_fragment(self, kind: str, fragment: str,
+                               limit: Optional[int] = None) -> List[Union[Task, Note, Package]]:
+        """Find tasks, notes or packages whose title (package name) contains a fragment.
+        
+        ``kind`` is 'tasks', 'notes' or 'packages'. Candidates come from the
+        full-text index, matching each word of the fragment as a prefix of a
+        title word, and are then checked for the fragment case-insensitively.
+        """
+        return list(islice(self.iter_by_title_fragment(kind, fragment), limit))
+
+    def iter_by_title_fragment(self, kind: str, fragment: str,
+                               batch_size: int = 100) -> Iterator[Union[Task, Note, Package]]:
+        """Like find_by_title_fragment(), but yield matches lazily, best first."""
+        lookups = {
+            'tasks': ('title', self._row_to_task),
+            'notes': ('title', self._row_to_note),
+            'packages': ('name', self._row_to_package)
+        }
+        if kind not in lookups:
+            raise ValueError(f"Invalid kind. Must be one of: {list(lookups)}")
+        column, convert = lookups[kind]
+
+        match = self._fts_query(fragment)
+        if not match:
+            return iter(())
+
+        needle = fragment.strip().lower()
+        rows = self._iter_rows(f'''
+            SELECT {kind}.* FROM {kind}_fts
+            JOIN {kind} ON {kind}.rowid = {kind}_fts.rowid
+            WHERE {kind}_fts MATCH ?
+            ORDER BY bm25({kind}_fts)
+        ''', (f'{{{column}}} : ({match})',), batch_size)
+        return (convert(row) for row in rows if needle in row[column].lower())
+
+    # Bulk operations
+    def bulk_create_tasks(self, tasks: Iterable[Task]) -> List[Task]:
+        """Insert many tasks with one executemany call in a single transaction."""
+        tasks = list(tasks)
+        with self.transaction():
+            self.conn.executemany(INSERT_TASK, [self._task_insert_params(task) for task in tasks])
+        return tasks
+
+    def bulk_create_notes(self, notes: Iterable[Note]) -> List[Note]:
+        """Insert many notes with one executemany call in a single transaction."""
+        notes = list(notes)
+        with self.transaction():
+            self.conn.executemany(INSERT_NOTE, [self._note_insert_params(note) for note in notes])
+        return notes
+
+    def bulk_create_packages(self, packages: Iterable[Package]) -> List[Package]:
+        """Insert many packages with one executemany call in a single transaction."""
+        packages = list(packages)
+        with self.transaction():
+            self.conn.executemany(INSERT_PACKAGE, [self._package_insert_params(pkg) for pkg in packages])
+            self._discard_cached_lookups()
+        return packages
+
+    def bulk_update(self, items: Iterable[Union[Task, Note, Package]]) -> int:
+        """Update a mix of tasks, notes and packages in a single transaction.
+        
+        Returns the number of rows updated.
+        """
+        tasks, notes, packages = [], [], []
+        for item in items:
+            if isinstance(item, Task):
+                tasks.append(self._task_update_params(item))
+            elif isinstance(item, Note):
+                notes.append(self._note_update_params(item))
+            elif isinstance(item, Package):
+                packages.append(self._package_update_params(item))
+            else:
+                raise TypeError(f"Cannot update object of type {type(item).__name__}")
+
+        if packages:
+            self._discard_cached_lookups()
+
+        updated = 0
+        with self.transaction():
+            for statement, params in ((UPDATE_TASK, tasks), (UPDATE_NOTE, notes), (UPDATE_PACKAGE, packages)):
+                if params:
+                    updated += self.conn.executemany(statement, params).rowcount
+        return updated
+
+    def bulk_delete(self, task_ids: Iterable[str] = (), note_ids: Iterable[str] = (),
+                    package_ids: Iterable[str] = (), cascade: bool = False) -> Dict[str, int]:
+        """Delete many tasks, notes and packages by ID in a single transaction.
+        
+        Packages go through delete_package(), with ``cascade`` as there.
+        Returns the number of listed tasks, notes and packages deleted.
+        """
+        deleted = {}
+        with self.transaction():
+            for table, ids in (('tasks', task_ids), ('notes', note_ids)):
+                params = [(item_id,) for item_id in ids]
+                deleted[table] = (
+                    self.conn.executemany(f'DELETE FROM {table} WHERE id = ?', params).rowcount
+                    if params else 0
+                )
+            deleted['packages'] = sum(self.delete_package(package_id, cascade) for package_id in package_ids)
+        return deleted
+
+    # Statistics
+    TASK_STATUSES = ('pending', 'in-progress', 'completed', 'cancelled')
+    PACKAGE_STATUSES = ('active', 'completed', 'archived')
+
+    def due_boundaries(self, now: datetime) -> Tuple[Optional[int], Optional[int]]:
+        """Epochs (as stored in ``due_epoch``) of the last open task due before
+        ``now`` and the first one due at or after it.
+        
+        Answers that depend on the clock, such as overdue counts, can only
+        change at these instants (or through a write).
+        """
+        row = self.conn.execute('''
+            SELECT
+                (SELECT MAX(due_epoch) FROM tasks
+                 WHERE due_epoch < ? AND +status IN ('pending', 'in-progress')),
+                (SELECT MIN(due_epoch) FROM tasks
+                 WHERE due_epoch >= ? AND +status IN ('pending', 'in-progress'))
+        ''', (to_epoch(now), to_epoch(now))).fetchone()
+        return row[0], row[1]
+
+    def get_stats(self, by_package: bool = False, by_priority: bool = False) -> Dict[str, Any]:
+        """Count tasks, notes and packages by status in a single aggregate query.
+        
+        Status keys use underscores (``in_progress``); ``tasks`` also counts open
+        tasks ``due_today`` and ``overdue``. With ``by_priority`` the
+        result includes per-priority task counts; with ``by_package`` it
+        includes task and note counts for every package that has contents.
+        """
+        today = date.today()
+        query = '''
+            SELECT 'tasks' AS section, NULL AS item, status, COUNT(*) AS count
+            FROM tasks GROUP BY status
+            UNION ALL
+            SELECT 'due_today', NULL, NULL, COUNT(*) FROM tasks
+            WHERE due_epoch >= ? AND due_epoch < ? AND +status IN ('pending', 'in-progress')
+            UNION ALL
+            SELECT 'overdue', NULL, NULL, COUNT(*) FROM tasks
+            WHERE due_epoch < ? AND +status IN ('pending', 'in-progress')
+            UNION ALL
+            SELECT 'notes', NULL, NULL, COUNT(*) FROM notes
+            UNION ALL
+            SELECT 'packages', NULL, status, COUNT(*) FROM packages GROUP BY status
+        '''
+        params = [to_epoch(today), to_epoch(today + timedelta(days=1)), to_epoch(datetime.now())]
+
+        if by_priority:
+            query += '''
+                UNION ALL
+                SELECT 'priority', priority, status, COUNT(*) FROM tasks GROUP BY priority, status
+            '''
+        if by_package:
+            query += '''
+                UNION ALL
+                SELECT 'package_tasks', package_id, status, COUNT(*) FROM tasks
+                WHERE package_id IS NOT NULL GROUP BY package_id, status
+                UNION ALL
+                SELECT 'package_notes', package_id, NULL, COUNT(*) FROM notes
+                WHERE package_id IS NOT NULL GROUP BY package_id
+            '''
+
+        stats = {
+            'tasks': self._status_counts(self.TASK_STATUSES),
+            'notes': {'total': 0},
+            'packages': self._status_counts(self.PACKAGE_STATUSES)
+        }
+        stats['tasks']['due_today'] = 0
+        stats['tasks']['overdue'] = 0
+        if by_priority:
+            stats['by_priority'] = {}
+        if by_package:
+            stats['by_package'] = {}
+
+        for section, item, status, count in self.conn.execute(query, params):
+            if section in ('tasks', 'packages'):
+                self._add_count(stats[section], status, count)
+            elif section in ('due_today', 'overdue'):
+                stats['tasks'][section] = count
+            elif section == 'notes':
+                stats['notes']['total'] = count
+            elif section == 'priority':
+                counts = stats['by_priority'].setdefault(item, self._status_counts(self.TASK_STATUSES))
+                self._add_count(counts, status, count)
+            else:
+                package_stats = stats['by_package'].setdefault(item, {
+                    'tasks': self._status_counts(self.TASK_STATUSES),
+                    'notes': 0
+                })
+                if section == 'package_tasks':
+                    self._add_count(package_stats['tasks'], status, count)
+                else:
+                    package_stats['notes'] = count
+
+        return stats
+
+    @staticmethod
+    def _status_counts(statuses) -> Dict[str, int]:
+        """Build a zeroed status-count dictionary with a running total."""
+        counts = {'total': 0}
+        counts.update((status.replace('-', '_'), 0) for status in statuses)
+        return counts
+
+    @staticmethod
+    def _add_count(counts: Dict[str, int], status: str, count: int):
+        """Add a GROUP BY status row to a status-count dictionary."""
+        key = status.replace('-', '_')
+        counts[key] = counts.get(key, 0) + count
+        counts['total'] += count
+
+    # Export and import
+    EXPORT_TYPES = ('package', 'task', 'note')
+
+    def export_records(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Stream every package, task and note as a dictionary tagged with its ``type``.
+        
+        Packages come first so an import recreates parents before their
+        contents. Rows are read ``batch_size`` at a time, so memory use does
+        not grow with the size of the database.
+        """
+        sources = {
+            'package': self.iter_packages,
+            'task': self.iter_tasks,
+            'note': self.iter_notes,
+        }
+        for record_type in self.EXPORT_TYPES:
+            for item in sources[record_type](batch_size=batch_size):
+                record = {'type': record_type}
+                record.update(item.to_dict())
+                yield record
+
+    def import_records(self, records: Iterable[Dict[str, Any]], chunk_size: int = 1000,
+                       write: Optional[Callable[[Callable[['Database'], None]], None]] = None) -> Dict[str, int]:
+        """Insert or update records as produced by export_records().
+        
+        Existing rows with the same ID are overwritten. Records are written in
+        transactions of ``chunk_size`` rows, so an invalid record raises
+        ValueError after the earlier chunks have been committed. Each chunk
+        is passed to ``write`` (such as a WriteQueue's run()) as a function of
+        the Database to write it with; by default it is written on this one.
+        Returns the number of records imported per type.
+        """
+        upserts = {
+            'package': (UPSERT_PACKAGE, Package.from_dict, self._package_insert_params),
+            'task': (UPSERT_TASK, Task.from_dict, self._task_insert_params),
+            'note': (UPSERT_NOTE, Note.from_dict, self._note_insert_params),
+        }
+        counts = {record_type: 0 for record_type in self.EXPORT_TYPES}
+        pending: Dict[str, List[tuple]] = {record_type: [] for record_type in self.EXPORT_TYPES}
+        numbers: Dict[str, List[int]] = {record_type: [] for record_type in self.EXPORT_TYPES}
+
+        def upsert(db: 'Database'):
+            with db.transaction():
+                for record_type, params in pending.items():
+                    if not params:
+                        continue
+                    statement = upserts[record_type][0]
+                    try:
+                        db.conn.executemany(statement, params)
+                    except sqlite3.IntegrityError:
+                        # Find the offending record; the chunk is rolled back either way
+                        for number, row in zip(numbers[record_type], params):
+                            try:
+                                db.conn.execute(statement, row)
+                            except sqlite3.IntegrityError as e:
+                                raise ValueError(f"Invalid record {number}: {e}") from e
+                        raise
+            db._discard_cached_lookups()
+
+        def flush():
+            (write or (lambda fn: fn(self)))(upsert)
+            self._discard_cached_lookups()
+            for record_type, params in pending.items():
+                counts[record_type] += len(params)
+                params.clear()
+                numbers[record_type].clear()
+
+        for number, record in enumerate(records, 1):
+            record_type = record.get('type') if isinstance(record, dict) else None
+            if record_type not in upserts:
+                raise ValueError(f"Invalid record {number}: unknown type {record_type!r}")
+            _, from_dict, to_params = upserts[record_type]
+            try:
+                pending[record_type].append(to_params(from_dict(record)))
+                numbers[record_type].append(number)
+            except KeyError as e:
+                raise ValueError(f"Invalid record {number}: missing field {e}") from e
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Invalid record {number}: {e}") from e
+            if number % chunk_size == 0:
+                flush()
+        flush()
+        return counts
+
+    # Package tree operations
+    def get_package_tree(self, package_id: str) -> List[Package]:
+        """Get a package and all of its descendants, oldest first."""
+        rows = self.conn.execute(f'''
+            SELECT * FROM packages WHERE id IN ({SUBTREE_IDS})
+            ORDER BY created_at, id
+        ''', (package_id,)).fetchall()
+        return [self._row_to_package(row) for row in rows]
+
+    def package_rollups(self, package_ids: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Aggregate task and note counts over each package's whole subtree.
+        
+        Returns ``{package_id: {'tasks': {...status counts}, 'notes': n,
+        'packages': number of descendants, 'progress': percent}}`` for the given
+        packages (all packages by default), computed in one query. Progress is
+        the share of completed tasks, ignoring cancelled ones.
+        """
+        roots = 'SELECT id, id FROM packages'
+        params: List[str] = []
+        if package_ids is not None:
+            package_ids = list(package_ids)
+            if not package_ids:
+                return {}
+            roots += f" WHERE id IN ({', '.join('?' * len(package_ids))})"
+            params.extend(package_ids)
+
+        query = f'''
+            WITH RECURSIVE tree(root_id, id) AS (
+                {roots}
+                UNION
+                SELECT tree.root_id, packages.id FROM packages JOIN tree ON packages.parent_id = tree.id
+            )
+            SELECT 'packages' AS section, root_id, NULL AS status, COUNT(*) - 1 AS count
+            FROM tree GROUP BY root_id
+            UNION ALL
+            SELECT 'tasks', tree.root_id, tasks.status, COUNT(*)
+            FROM tree JOIN tasks ON tasks.package_id = tree.id GROUP BY tree.root_id, tasks.status
+            UNION ALL
+            SELECT 'notes', tree.root_id, NULL, COUNT(*)
+            FROM tree JOIN notes ON notes.package_id = tree.id GROUP BY tree.root_id
+        '''
+
+        rollups: Dict[str, Dict[str, Any]] = {}
+        for section, root_id, status, count in self.conn.execute(query, params):
+            rollup = rollups.setdefault(root_id, {
+                'tasks': self._status_counts(self.TASK_STATUSES),
+                'notes': 0,
+                'packages': 0
+            })
+            if section == 'tasks':
+                self._add_count(rollup['tasks'], status, count)
+            else:
+                rollup[section] = count
+
+        for rollup in rollups.values():
+            tasks = rollup['tasks']
+            countable = tasks['total'] - tasks.get('cancelled', 0)
+            rollup['progress'] = round(tasks.get('completed', 0) * 100 / countable) if countable else 0
+        return rollups
+
+    def package_rollup(self, package_id: str) -> Optional[Dict[str, Any]]:
+        """Aggregate counts and progress for one package subtree; see package_rollups()."""
+        return self.package_rollups([package_id]).get(package_id)
+
+    def archive_package(self, package_id: str, cascade: bool = True) -> int:
+        """Archive a package, and by default all of its descendants, in one statement.
+        
+        Returns the number of packages archived.
+        """
+        now = datetime.now().isoformat()
+        if cascade:
+            cursor = self.conn.execute(f'''
+                UPDATE packages SET status = 'archived', updated_at = ?
+                WHERE id IN ({SUBTREE_IDS})
+            ''', (now, package_id))
+        else:
+            cursor = self.conn.execute(
+                "UPDATE packages SET status = 'archived', updated_at = ? WHERE id = ?",
+                (now, package_id)
+            )
+        self._discard_cached_lookups()
+        self._commit()
+        return cursor.rowcount
 
     # Search operations
-    def search(self, query: str) -> Dict[str, List]:
-        """Search across tasks, notes, and packages."""
+    def search(self, query: str, limit: Optional[int] = 50,
+               highlight: Optional[Tuple[str, str]] = None) -> Dict[str, Any]:
+        """Search across tasks, notes, and packages using the full-text index.
+        
+        Every word in the query is matched as a prefix and results are ranked
+        by bm25, with title/name matches weighted above body text. When
+        ``highlight`` is given as an (open, close) marker pair, the results also
+        include a ``snippets`` mapping of item ID to highlighted excerpt.
+        """
         results = {
             'tasks': [],
             'notes': [],
             'packages': []
         }
+        if highlight:
+            results['snippets'] = {}
+
+        match = self._fts_query(query)
+        if not match:
+            return results
 
-        # Search tasks
+        converters = {
+            'tasks': self._row_to_task,
+            'notes': self._row_to_note,
+            'packages': self._row_to_package
+        }
+        open_marker, close_marker = highlight or ('', '')
         cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT * FROM tasks 
-            WHERE title LIKE ? OR description LIKE ?
-            ORDER BY updated_at DESC
-        ''', (f'%{query}%', f'%{query}%'))
-        results['tasks'] = [self._row_to_task(row) for row in cursor.fetchall()]
-
-        # Search notes
-        cursor.execute('''
-            SELECT * FROM notes 
-            WHERE title LIKE ? OR content LIKE ?
-            ORDER BY updated_at DESC
-        ''', (f'%{query}%', f'%{query}%'))
-        results['notes'] = [self._row_to_note(row) for row in cursor.fetchall()]
-
-        # Search packages
-        cursor.execute('''
-            SELECT * FROM packages 
-            WHERE name LIKE ? OR description LIKE ?
-            ORDER BY updated_at DESC
-        ''', (f'%{query}%', f'%{query}%'))
-        results['packages'] = [self._row_to_package(row) for row in cursor.fetchall()]
-
-        return results
\ No newline at end of file
+
+        for table, convert in converters.items():
+            fts_table = f'{table}_fts'
+            cursor.execute(f'''
+                SELECT {table}.*,
+                       snippet({fts_table}, -1, ?, ?, '...', 12) AS snippet
+                FROM {fts_table}
+                JOIN {table} ON {table}.rowid = {fts_table}.rowid
+                WHERE {fts_table} MATCH ?
+                ORDER BY bm25({fts_table}, 10.0, 1.0)
+                LIMIT ?
+            ''', (open_marker, close_marker, match, limit if limit is not None else -1))
+            
+            for row in cursor.fetchall():
+                results[table].append(convert(row))
+                if highlight:
+                    results['snippets'][row['id']] = row['snippet']
+
+        return results
+
+    @staticmethod
+    def _fts_query(text: str) -> str:
+        """Turn free-form user input into an FTS5 prefix query."""
+        terms = re.findall(r'\w+', text)
+        return ' '.join(f'"{term}"*' for term in terms)
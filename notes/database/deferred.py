@@ -0,0 +1,48 @@
+from typing import Callable, Iterable, TypeVar
+
+from ..models import Task, Note, Package
+
+
+def deferred_column(name: str) -> property:
+    """A model attribute that is read from the database the first time it's used.
+
+    The value lives in the instance ``__dict__`` under the same name; while it
+    is missing the instance's ``_load_deferred(name)`` is called to fetch it.
+    Assigning the attribute works as usual and never touches the database.
+    """
+    def get(self):
+        values = self.__dict__
+        if name not in values:
+            values[name] = self._load_deferred(name)
+        return values[name]
+
+    def set(self, value):
+        self.__dict__[name] = value
+
+    return property(get, set, doc=f"{name}, loaded on first access")
+
+
+class DeferredTask(Task):
+    """A Task whose description is loaded on first access."""
+    description = deferred_column('description')
+
+
+class DeferredNote(Note):
+    """A Note whose content is loaded on first access."""
+    content = deferred_column('content')
+
+
+class DeferredPackage(Package):
+    """A Package whose description is loaded on first access."""
+    description = deferred_column('description')
+
+
+M = TypeVar('M', Task, Note, Package)
+
+
+def defer(item: M, columns: Iterable[str], loader: Callable[[str], object]) -> M:
+    """Drop ``columns`` from a deferred model so they are fetched with ``loader``."""
+    for column in columns:
+        item.__dict__.pop(column, None)
+    item._load_deferred = loader
+    return item
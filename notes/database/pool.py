@@ -0,0 +1,70 @@
+import sqlite3
+import threading
+from typing import List
+
+from .schema import connect_database, create_tables
+from ..utils.forks import ForkSafe
+
+
+class ConnectionPool(ForkSafe):
+    """A pool of reusable SQLite connections for long-running servers.
+    
+    The schema is created once when the pool is built. Afterwards connections
+    are handed out without re-running any DDL and are returned to the pool
+    when the caller is done with them, so a request only pays for a lookup
+    instead of a fresh connect plus schema check.
+
+    The pool is safe to share between threads and survives a fork: a pool
+    built before forking worker processes (``notes server --preload``)
+    notices the new process and opens its own connections there.
+    """
+
+    def __init__(self, max_idle: int = 8):
+        super().__init__()
+        self.max_idle = max_idle
+        self._idle: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        # Connections inherited across a fork; kept open, see _after_fork
+        self._inherited: List[sqlite3.Connection] = []
+
+        conn = connect_database(check_same_thread=False)
+        create_tables(conn)
+        self.release(conn)
+
+    def acquire(self) -> sqlite3.Connection:
+        """Take an idle connection from the pool, opening one if none is free."""
+        self._check_fork()
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        # Connections are handed between request threads, never shared at once
+        return connect_database(check_same_thread=False)
+
+    def release(self, conn: sqlite3.Connection):
+        """Return a connection to the pool, closing it if the pool is full."""
+        self._check_fork()
+        if conn.in_transaction:
+            conn.rollback()
+
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        """Close every idle connection."""
+        self._check_fork()
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def _after_fork(self):
+        """Drop connections opened by the parent process."""
+        # SQLite connections must not be used (or closed) in a forked child:
+        # its file locks belong to the parent. Keep them referenced so they
+        # are never finalized here, and start over with a fresh lock.
+        self._inherited.extend(self._idle)
+        self._idle = []
+        self._lock = threading.Lock()
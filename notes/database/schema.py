@@ -2,6 +2,54 @@ import sqlite3
 import os
 from pathlib import Path
 
+from ..utils.config import get_setting
+
+
+# SQLite tuning presets, selected with NOTES_STORAGE_PROFILE or "storage_profile"
+# in ~/.notes/config.json. All of them use WAL so readers never block writers.
+STORAGE_PROFILES = {
+    # Every commit is fsynced; survives power loss at the cost of write latency
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'busy_timeout': 5000,
+        'cache_size': -16000,
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+    },
+    # WAL with synchronous=NORMAL: may lose the last commits on power loss,
+    # never corrupts the database
+    'fast': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'cache_size': -64000,
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+    },
+    # For large imports: no fsyncs and a big page cache; re-run with a safer
+    # profile afterwards
+    'bulk-load': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'busy_timeout': 30000,
+        'cache_size': -256000,
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY',
+    },
+}
+
+DEFAULT_STORAGE_PROFILE = 'fast'
+
+# Bump whenever create_tables() changes so existing databases pick up the new
+# DDL. Stored in PRAGMA user_version; a current database skips all DDL.
+SCHEMA_VERSION = 7
+
+
+# Oldest SQLite with VIRTUAL generated columns (see create_date_index); UPSERT
+# and the FTS5/JSON1 features used here are older than that.
+MIN_SQLITE_VERSION = (3, 31, 0)
+
 
 def get_database_path():
     """Get the path to the SQLite database file."""
@@ -13,6 +61,9 @@ def get_database_path():
 
 def create_tables(conn: sqlite3.Connection):
     """Create all necessary tables in the database."""
+    check_sqlite_support(conn)
+    if get_schema_version(conn) >= SCHEMA_VERSION:
+        return
     
     # Create tasks table
     conn.execute('''
@@ -66,18 +117,476 @@ def create_tables(conn: sqlite3.Connection):
     conn.execute('CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status)')
     conn.execute('CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks(priority)')
     conn.execute('CREATE INDEX IF NOT EXISTS idx_tasks_package_id ON tasks(package_id)')
-    conn.execute('CREATE INDEX IF NOT EXISTS idx_tasks_due_date ON tasks(due_date)')
     conn.execute('CREATE INDEX IF NOT EXISTS idx_notes_package_id ON notes(package_id)')
     conn.execute('CREATE INDEX IF NOT EXISTS idx_packages_parent_id ON packages(parent_id)')
     conn.execute('CREATE INDEX IF NOT EXISTS idx_packages_status ON packages(status)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_packages_name ON packages(name COLLATE NOCASE)')
+    
+    # Keyset pagination indexes matching the list ordering
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks(created_at, id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_notes_updated_at ON notes(updated_at, id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_packages_created_at ON packages(created_at, id)')
+    
+    create_search_index(conn)
+    create_tag_index(conn)
+    create_link_index(conn)
+    create_date_index(conn)
+    create_order_index(conn)
+    create_revision_table(conn)
     
+    conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
     conn.commit()
 
 
-def initialize_database():
-    """Initialize the database with tables and return the connection."""
+def check_sqlite_support(conn: sqlite3.Connection):
+    """Raise sqlite3.NotSupportedError if the SQLite library lacks a feature the schema needs."""
+    if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+        raise sqlite3.NotSupportedError(
+            f"SQLite {sqlite3.sqlite_version} is too old; notes needs "
+            f"{'.'.join(map(str, MIN_SQLITE_VERSION))} or newer"
+        )
+    for extension, probe in (('JSON1', "SELECT json_valid('[]')"), ('FTS5', 'SELECT fts5_source_id()')):
+        try:
+            conn.execute(probe)
+        except sqlite3.OperationalError:
+            raise sqlite3.NotSupportedError(
+                f"SQLite {sqlite3.sqlite_version} was built without the {extension} extension, "
+                f"which notes needs"
+            ) from None
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Get the schema version recorded in the database file."""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+# Full-text search index definitions: FTS5 table -> (content table, indexed columns)
+SEARCH_INDEXES = {
+    'tasks_fts': ('tasks', ('title', 'description')),
+    'notes_fts': ('notes', ('title', 'content')),
+    'packages_fts': ('packages', ('name', 'description')),
+}
+
+
+def create_search_index(conn: sqlite3.Connection):
+    """Create the FTS5 search index and the triggers that keep it in sync.
+    
+    Each FTS table is an external-content index over its source table, so the
+    text is stored only once. Triggers mirror every insert, update and delete.
+    The index is keyed on the implicit rowid, which VACUUM may renumber, so
+    run rebuild_search_index() (``notes reindex``) after a VACUUM.
+    """
+    existing = {
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE '%_fts'"
+        )
+    }
+    
+    for fts_table, (table, columns) in SEARCH_INDEXES.items():
+        column_list = ', '.join(columns)
+        new_values = ', '.join(f'new.{column}' for column in columns)
+        old_values = ', '.join(f'old.{column}' for column in columns)
+        
+        conn.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+                {column_list},
+                content='{table}',
+                content_rowid='rowid',
+                prefix='2 3'
+            )
+        ''')
+        
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.rowid, {new_values});
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts_table}({fts_table}, rowid, {column_list})
+                VALUES ('delete', old.rowid, {old_values});
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE OF {column_list} ON {table} BEGIN
+                INSERT INTO {fts_table}({fts_table}, rowid, {column_list})
+                VALUES ('delete', old.rowid, {old_values});
+                INSERT INTO {fts_table}(rowid, {column_list}) VALUES (new.rowid, {new_values});
+            END
+        ''')
+    
+    # Index rows that were written before the search index existed
+    if not set(SEARCH_INDEXES) <= existing:
+        rebuild_search_index(conn)
+
+
+def rebuild_search_index(conn: sqlite3.Connection):
+    """Rebuild the full-text search index from the source tables."""
+    for fts_table in SEARCH_INDEXES:
+        conn.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+
+
+# Normalized tag index: link table -> (tagged table, key column)
+TAG_INDEXES = {
+    'task_tags': ('tasks', 'task_id'),
+    'note_tags': ('notes', 'note_id'),
+}
+
+
+def create_tag_index(conn: sqlite3.Connection):
+    """Create the normalized tag tables and the triggers that keep them in sync.
+    
+    The JSON ``tags`` column stays the source of truth for the models; the
+    ``tags`` table and its link tables mirror it so tag queries can use
+    indexes instead of decoding every row.
+    """
+    existing = {
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE '%_tags'"
+        )
+    }
+    
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS tags (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE COLLATE NOCASE
+        )
+    ''')
+    
+    for link_table, (table, key_column) in TAG_INDEXES.items():
+        # Primary key (tag_id, item) answers "items with tag X"; the second
+        # index answers "tags of item Y" for the triggers
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {link_table} (
+                tag_id INTEGER NOT NULL REFERENCES tags (id),
+                {key_column} TEXT NOT NULL REFERENCES {table} (id),
+                PRIMARY KEY (tag_id, {key_column})
+            ) WITHOUT ROWID
+        ''')
+        conn.execute(
+            f'CREATE INDEX IF NOT EXISTS idx_{link_table}_{key_column} ON {link_table}({key_column})'
+        )
+        
+        # Rows with missing or malformed tags are simply left untagged.
+        # Duplicates are skipped with NOT EXISTS rather than OR IGNORE, which
+        # an outer UPSERT (as in import_records) would override.
+        new_tags = "json_each(CASE WHEN json_valid(new.tags) THEN new.tags ELSE '[]' END)"
+        link_new_tags = f'''
+            INSERT INTO tags(name)
+                SELECT DISTINCT trim(value) COLLATE NOCASE FROM {new_tags}
+                WHERE type = 'text' AND trim(value) != ''
+                  AND NOT EXISTS (SELECT 1 FROM tags WHERE name = trim(value));
+            INSERT INTO {link_table}(tag_id, {key_column})
+                SELECT DISTINCT tags.id, new.id FROM {new_tags} AS tag_values
+                JOIN tags ON tags.name = trim(tag_values.value)
+                WHERE tag_values.type = 'text' AND NOT EXISTS (
+                    SELECT 1 FROM {link_table} AS link
+                    WHERE link.tag_id = tags.id AND link.{key_column} = new.id
+                );
+        '''
+        # Recreated so older databases pick up the current definitions
+        for event in ('insert', 'update'):
+            conn.execute(f'DROP TRIGGER IF EXISTS {table}_tags_{event}')
+        conn.execute(f'''
+            CREATE TRIGGER {table}_tags_insert AFTER INSERT ON {table} BEGIN
+                {link_new_tags}
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER {table}_tags_update AFTER UPDATE OF id, tags ON {table} BEGIN
+                DELETE FROM {link_table} WHERE {key_column} = old.id;
+                {link_new_tags}
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_tags_delete AFTER DELETE ON {table} BEGIN
+                DELETE FROM {link_table} WHERE {key_column} = old.id;
+            END
+        ''')
+    
+    # Migrate tags written before the index existed
+    if not set(TAG_INDEXES) <= existing:
+        rebuild_tag_index(conn)
+
+
+def rebuild_tag_index(conn: sqlite3.Connection):
+    """Rebuild the tag tables from the JSON tags columns."""
+    for link_table, (table, key_column) in TAG_INDEXES.items():
+        conn.execute(f'DELETE FROM {link_table}')
+        conn.execute(f'''
+            INSERT OR IGNORE INTO tags(name)
+            SELECT trim(json_each.value) FROM {table}, json_each({table}.tags)
+            WHERE json_valid({table}.tags) AND json_each.type = 'text' AND trim(json_each.value) != ''
+        ''')
+        conn.execute(f'''
+            INSERT OR IGNORE INTO {link_table}(tag_id, {key_column})
+            SELECT tags.id, {table}.id FROM {table}, json_each({table}.tags)
+            JOIN tags ON tags.name = trim(json_each.value)
+            WHERE json_valid({table}.tags) AND json_each.type = 'text'
+        ''')
+    # Drop tags that are no longer used anywhere
+    conn.execute(f'''
+        DELETE FROM tags WHERE {' AND '.join(
+            f'id NOT IN (SELECT tag_id FROM {link_table})' for link_table in TAG_INDEXES
+        )}
+    ''')
+
+
+def create_link_index(conn: sqlite3.Connection):
+    """Create the note-task link table and the triggers that keep it in sync.
+    
+    ``notes.linked_tasks`` stays the source of truth; ``note_task_links``
+    mirrors it with an index in each direction so "tasks of a note" and
+    "notes of a task" are both index seeks.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'note_task_links'"
+    ).fetchone()
+    
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS note_task_links (
+            note_id TEXT NOT NULL REFERENCES notes (id),
+            task_id TEXT NOT NULL REFERENCES tasks (id),
+            PRIMARY KEY (note_id, task_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_note_task_links_task_id ON note_task_links(task_id, note_id)')
+    
+    # NOT EXISTS rather than OR IGNORE, as for the tag triggers
+    new_links = "json_each(CASE WHEN json_valid(new.linked_tasks) THEN new.linked_tasks ELSE '[]' END)"
+    link_new_tasks = f'''
+        INSERT INTO note_task_links(note_id, task_id)
+            SELECT DISTINCT new.id, value FROM {new_links}
+            WHERE type = 'text' AND NOT EXISTS (
+                SELECT 1 FROM note_task_links AS link WHERE link.note_id = new.id AND link.task_id = value
+            );
+    '''
+    for event in ('insert', 'update'):
+        conn.execute(f'DROP TRIGGER IF EXISTS notes_links_{event}')
+    conn.execute(f'''
+        CREATE TRIGGER notes_links_insert AFTER INSERT ON notes BEGIN
+            {link_new_tasks}
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER notes_links_update AFTER UPDATE OF id, linked_tasks ON notes BEGIN
+            DELETE FROM note_task_links WHERE note_id = old.id;
+            {link_new_tasks}
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS notes_links_delete AFTER DELETE ON notes BEGIN
+            DELETE FROM note_task_links WHERE note_id = old.id;
+        END
+    ''')
+    # Unlink a deleted task from the notes that reference it, found through
+    # the link index; rewriting linked_tasks re-runs notes_links_update
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_links_delete AFTER DELETE ON tasks BEGIN
+            UPDATE notes SET linked_tasks = (
+                SELECT json_group_array(value) FROM json_each(notes.linked_tasks)
+                WHERE value != old.id
+            )
+            WHERE id IN (SELECT note_id FROM note_task_links WHERE task_id = old.id);
+            DELETE FROM note_task_links WHERE task_id = old.id;
+        END
+    ''')
+    
+    # Migrate links written before the table existed
+    if not exists:
+        rebuild_link_index(conn)
+
+
+def rebuild_link_index(conn: sqlite3.Connection):
+    """Rebuild the note-task link table from notes.linked_tasks."""
+    conn.execute('DELETE FROM note_task_links')
+    conn.execute('''
+        INSERT OR IGNORE INTO note_task_links(note_id, task_id)
+        SELECT notes.id, json_each.value FROM notes, json_each(notes.linked_tasks)
+        WHERE json_valid(notes.linked_tasks) AND json_each.type = 'text'
+    ''')
+
+
+# Integer epoch columns derived from ISO timestamp columns:
+# table -> {generated column: source column}
+EPOCH_COLUMNS = {
+    'tasks': {'due_epoch': 'due_date', 'completed_epoch': 'completed_at'},
+}
+
+
+def create_date_index(conn: sqlite3.Connection):
+    """Create indexed epoch columns for date-range queries.
+
+    The ISO text columns stay the source of truth. Each epoch column is a
+    VIRTUAL generated column (seconds since 1970, reading naive timestamps
+    as UTC), so rows don't grow and only the index is stored; filters such
+    as "overdue" or "completed since" become integer index range scans.
+    Existing databases get the columns with ALTER TABLE.
+    """
+    for table, columns in EPOCH_COLUMNS.items():
+        # table_xinfo, unlike table_info, lists generated columns
+        existing = {row[1] for row in conn.execute(f'PRAGMA table_xinfo({table})')}
+        for column, source in columns.items():
+            if column not in existing:
+                conn.execute(f'''
+                    ALTER TABLE {table} ADD COLUMN {column} INTEGER
+                    GENERATED ALWAYS AS (CAST(strftime('%s', {source}) AS INTEGER)) VIRTUAL
+                ''')
+            conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table}({column})')
+
+    # Superseded by idx_tasks_due_epoch
+    conn.execute('DROP INDEX IF EXISTS idx_tasks_due_date')
+
+
+# Sort keys of the task list orders. Database.list_tasks() builds its ORDER BY
+# from these same strings so SQLite can match them to the expression indexes.
+TASK_STATUS_RANK = (
+    "CASE status WHEN 'pending' THEN 0 WHEN 'in-progress' THEN 1 "
+    "WHEN 'completed' THEN 2 WHEN 'cancelled' THEN 3 ELSE 4 END"
+)
+TASK_PRIORITY_RANK = (
+    "CASE priority WHEN 'urgent' THEN 0 WHEN 'high' THEN 1 "
+    "WHEN 'medium' THEN 2 WHEN 'low' THEN 3 ELSE 4 END"
+)
+# Tasks without a due date sort after every dated task
+TASK_DUE_RANK = 'IFNULL(due_epoch, 9223372036854775807)'
+TASK_COMPLETED_LAST = "status = 'completed'"
+
+TASK_ORDERS = {
+    # Newest first; the only order keyset cursors work with
+    'newest': 'created_at DESC, id DESC',
+    # Open and cancelled tasks, then completed ones, newest first within each
+    'completed_last': f'{TASK_COMPLETED_LAST}, created_at DESC, id DESC',
+    # Status, then priority, then earliest due date
+    'agenda': f'{TASK_STATUS_RANK}, {TASK_PRIORITY_RANK}, {TASK_DUE_RANK}, created_at DESC, id DESC',
+}
+
+
+def create_order_index(conn: sqlite3.Connection):
+    """Create expression indexes matching the non-default task orders.
+
+    With them a LIMITed list in ``agenda`` or ``completed_last`` order reads
+    rows straight off the index instead of sorting the whole table.
+    """
+    conn.execute(f'CREATE INDEX IF NOT EXISTS idx_tasks_agenda ON tasks({TASK_ORDERS["agenda"]})')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS idx_tasks_completed_last ON tasks({TASK_ORDERS["completed_last"]})')
+
+
+# Tables whose changes are tracked with revisions
+REVISION_TABLES = ('tasks', 'notes', 'packages')
+
+# The next revision: one more than the latest change to any tracked table
+NEXT_REVISION = '(SELECT MAX(revision) FROM table_revisions) + 1'
+
+
+def create_revision_table(conn: sqlite3.Connection):
+    """Track changes with a database-wide revision number.
+    
+    ``table_revisions`` holds, per tracked table, the revision of its latest
+    change and the time of it (``modified_at``, seconds since 1970), so
+    "has anything changed" is a single primary-key lookup. Every insert or
+    update also stamps the row's own ``revision`` column, and every delete
+    leaves a row in ``tombstones``; "what changed since revision N" is then
+    an index range scan per table. Revisions start at a random value so a
+    recreated database doesn't repeat the revisions of the old one.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS table_revisions (
+            name TEXT PRIMARY KEY,
+            revision INTEGER NOT NULL,
+            modified_at INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS tombstones (
+            table_name TEXT NOT NULL,
+            id TEXT NOT NULL,
+            revision INTEGER NOT NULL,
+            PRIMARY KEY (table_name, id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_tombstones_revision ON tombstones(revision)')
+    
+    start = conn.execute('SELECT abs(random() % 1000000000)').fetchone()[0]
+    for table in REVISION_TABLES:
+        conn.execute('''
+            INSERT OR IGNORE INTO table_revisions(name, revision, modified_at)
+            VALUES (?, ?, CAST(strftime('%s', 'now') AS INTEGER))
+        ''', (table, start))
+    
+    for table in REVISION_TABLES:
+        # Recreated below; the backfill must not run them
+        for event in ('insert', 'update', 'delete'):
+            conn.execute(f'DROP TRIGGER IF EXISTS {table}_revision_{event}')
+        
+        # Rows written before revisions existed count as the current revision
+        existing = {row[1] for row in conn.execute(f'PRAGMA table_xinfo({table})')}
+        if 'revision' not in existing:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN revision INTEGER NOT NULL DEFAULT 0')
+            conn.execute(f'UPDATE {table} SET revision = (SELECT MAX(revision) FROM table_revisions)')
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_revision ON {table}(revision)')
+        
+        bump = f'''
+            UPDATE table_revisions
+            SET revision = {NEXT_REVISION}, modified_at = CAST(strftime('%s', 'now') AS INTEGER)
+            WHERE name = '{table}';
+        '''
+        stamp = f'''
+            UPDATE {table} SET revision = (SELECT revision FROM table_revisions WHERE name = '{table}')
+            WHERE rowid = new.rowid;
+        '''
+        conn.execute(f'''
+            CREATE TRIGGER {table}_revision_insert AFTER INSERT ON {table} BEGIN
+                {bump}
+                {stamp}
+                DELETE FROM tombstones WHERE table_name = '{table}' AND id = new.id;
+            END
+        ''')
+        # The WHEN clause skips the stamping UPDATEs these triggers make
+        conn.execute(f'''
+            CREATE TRIGGER {table}_revision_update AFTER UPDATE ON {table}
+            WHEN new.revision IS old.revision BEGIN
+                {bump}
+                {stamp}
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER {table}_revision_delete AFTER DELETE ON {table} BEGIN
+                {bump}
+                INSERT OR REPLACE INTO tombstones(table_name, id, revision)
+                VALUES ('{table}', old.id, (SELECT revision FROM table_revisions WHERE name = '{table}'));
+            END
+        ''')
+
+
+def get_storage_profile() -> str:
+    """Get the configured storage profile name."""
+    profile = get_setting('storage_profile', 'NOTES_STORAGE_PROFILE', DEFAULT_STORAGE_PROFILE)
+    if profile not in STORAGE_PROFILES:
+        raise ValueError(
+            f"Unknown storage profile '{profile}'. Must be one of: {list(STORAGE_PROFILES)}"
+        )
+    return profile
+
+
+def apply_storage_profile(conn: sqlite3.Connection, profile: str = None):
+    """Apply the PRAGMA settings of a storage profile to a connection."""
+    settings = STORAGE_PROFILES[profile or get_storage_profile()]
+    for pragma, value in settings.items():
+        conn.execute(f'PRAGMA {pragma} = {value}')
+
+
+def connect_database(check_same_thread: bool = True) -> sqlite3.Connection:
+    """Open a connection to the database without touching the schema."""
     db_path = get_database_path()
-    conn = sqlite3.connect(str(db_path))
+    conn = sqlite3.connect(str(db_path), check_same_thread=check_same_thread)
     conn.row_factory = sqlite3.Row  # Enable column access by name
+    apply_storage_profile(conn)
+    return conn
+
+
+def initialize_database():
+    """Initialize the database with tables and return the connection."""
+    conn = connect_database()
     create_tables(conn)
     return conn
\ No newline at end of file
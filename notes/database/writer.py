@@ -0,0 +1,110 @@
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple, TypeVar
+
+from .database import Database
+from .schema import connect_database
+from ..utils.forks import ForkSafe
+
+
+T = TypeVar('T')
+
+# Most queued writes committed together in one transaction
+MAX_BATCH = 64
+
+
+class WriteQueue(ForkSafe):
+    """Serialize a process's writes through one thread that owns the write connection.
+
+    Callers pass run() a function of a Database. The writer thread takes
+    every function queued since its last commit, runs each one in its own
+    savepoint inside a single transaction and commits once (group commit).
+    A function that raises only undoes its own writes, and its exception
+    is re-raised to its caller. Concurrent requests then share commits
+    (and fsyncs) instead of contending for SQLite's write lock, while
+    reads keep using their own connections, which WAL never blocks.
+    """
+
+    def __init__(self, max_batch: int = MAX_BATCH):
+        super().__init__()
+        self.max_batch = max_batch
+        self._jobs: 'queue.Queue[Optional[Tuple[Callable, Future]]]' = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def run(self, fn: Callable[[Database], T]) -> T:
+        """Run ``fn(db)`` on the writer thread; return its result once committed."""
+        return self.submit(fn).result()
+
+    def submit(self, fn: Callable[[Database], T]) -> 'Future[T]':
+        """Queue ``fn(db)`` and return a future for its committed result."""
+        self._start()
+        future: Future = Future()
+        self._jobs.put((fn, future))
+        return future
+
+    def close(self):
+        """Finish the queued writes and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._jobs.put(None)
+            thread.join()
+
+    def _start(self):
+        self._check_fork()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='notes-writer', daemon=True)
+                self._thread.start()
+
+    def _after_fork(self):
+        # A queue built before a fork has no writer thread in the child
+        self.__init__(self.max_batch)
+
+    def _run(self):
+        """Writer thread: commit whatever has queued up, batch by batch."""
+        db = Database(connect_database())
+        try:
+            while True:
+                batch = [self._jobs.get()]
+                while batch[-1] is not None and len(batch) < self.max_batch:
+                    try:
+                        batch.append(self._jobs.get_nowait())
+                    except queue.Empty:
+                        break
+                jobs = [job for job in batch if job is not None]
+                if jobs:
+                    self._write(db, jobs)
+                if batch[-1] is None:
+                    return
+        finally:
+            db.conn.close()
+
+    def _write(self, db: Database, jobs: List[Tuple[Callable, Future]]):
+        """Run ``jobs`` in one transaction and settle their futures after the commit."""
+        outcomes = []
+        try:
+            with db.transaction():
+                for fn, future in jobs:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with db.savepoint('job'):
+                            outcomes.append((future, fn(db), None))
+                    except Exception as e:
+                        outcomes.append((future, None, e))
+        except Exception as e:
+            # BEGIN or COMMIT failed, so nothing in the batch was written
+            errors = {future: error for future, _, error in outcomes}
+            for _, future in jobs:
+                if not future.done():
+                    future.set_exception(errors.get(future) or e)
+            return
+
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
@@ -7,11 +7,18 @@ let notes = [];
 let projects = [];
 let stats = {};
 
+// Delta sync: the revision the loaded arrays are current to, and which of
+// them have been fetched whole (the rest are fetched on first use)
+let syncRevision = null;
+let syncInFlight = null;
+const loadedCollections = new Set();
+
 // Initialize app when DOM is loaded
 document.addEventListener('DOMContentLoaded', function() {
     initializeApp();
     setupEventListeners();
     loadInitialData();
+    subscribeToChanges();
 });
 
 // Initialize the application
@@ -253,7 +260,7 @@ async function loadDashboardData() {
         const [tasksResponse, notesResponse, projectsResponse] = await Promise.all([
             fetch('/api/tasks?limit=5'),
             fetch('/api/notes?limit=3'),
-            fetch('/api/packages?limit=3')
+            fetch('/api/packages?limit=3&rollup=1')
         ]);
         
         const todayTasks = await tasksResponse.json();
@@ -270,8 +277,12 @@ async function loadDashboardData() {
 
 async function loadTasks() {
     try {
-        const response = await fetch('/api/tasks');
-        tasks = await response.json();
+        await syncChanges();
+        if (!loadedCollections.has('tasks')) {
+            const response = await fetch('/api/tasks');
+            tasks = await response.json();
+            loadedCollections.add('tasks');
+        }
         renderTasks();
     } catch (error) {
         console.error('Error loading tasks:', error);
@@ -281,8 +292,12 @@ async function loadTasks() {
 
 async function loadNotes() {
     try {
-        const response = await fetch('/api/notes');
-        notes = await response.json();
+        await syncChanges();
+        if (!loadedCollections.has('notes')) {
+            const response = await fetch('/api/notes');
+            notes = await response.json();
+            loadedCollections.add('notes');
+        }
         renderNotes();
     } catch (error) {
         console.error('Error loading notes:', error);
@@ -292,8 +307,12 @@ async function loadNotes() {
 
 async function loadProjects() {
     try {
-        const response = await fetch('/api/packages');
-        projects = await response.json();
+        await syncChanges();
+        if (!loadedCollections.has('projects')) {
+            const response = await fetch('/api/packages?rollup=1');
+            projects = await response.json();
+            loadedCollections.add('projects');
+        }
         renderProjects();
         updateProjectSelectors();
     } catch (error) {
@@ -302,6 +321,101 @@ async function loadProjects() {
     }
 }
 
+// Bring the loaded arrays up to date; concurrent callers share one request
+function syncChanges() {
+    if (!syncInFlight) {
+        syncInFlight = fetchChanges().finally(() => {
+            syncInFlight = null;
+        });
+    }
+    return syncInFlight;
+}
+
+async function fetchChanges() {
+    if (syncRevision === null) {
+        // Nothing loaded yet: remember where to sync from before fetching anything
+        const response = await fetch('/api/changes');
+        syncRevision = (await response.json()).revision;
+        return;
+    }
+    
+    const response = await fetch(`/api/changes?since=${syncRevision}`);
+    if (!response.ok) {
+        throw new Error('Failed to load changes');
+    }
+    const changes = await response.json();
+    
+    if (loadedCollections.has('tasks')) {
+        tasks = applyChanges(tasks, changes.tasks, changes.deleted.tasks, 'created_at');
+    }
+    if (loadedCollections.has('notes')) {
+        notes = applyChanges(notes, changes.notes, changes.deleted.notes, 'updated_at');
+    }
+    // Project rollups count subtree tasks, notes and packages, so any change
+    // refetches the project list
+    const changed = ['tasks', 'notes', 'packages'].some(
+        name => changes[name].length || changes.deleted[name].length
+    );
+    if (changed) {
+        loadedCollections.delete('projects');
+    }
+    syncRevision = changes.revision;
+}
+
+// Refresh the open page when the server reports a change, including ones
+// made from the CLI or the interactive shell
+function subscribeToChanges() {
+    if (!window.EventSource) {
+        return;
+    }
+    const events = new EventSource('/api/events');
+    events.addEventListener('change', event => {
+        const { revision } = JSON.parse(event.data);
+        // Our own writes have usually been synced already
+        if (revision !== syncRevision) {
+            refreshCurrentPage();
+        }
+    });
+    events.onerror = () => {
+        // The browser reconnects by itself unless the server refused the
+        // stream (e.g. 503 when too many are open); then try again later
+        if (events.readyState === EventSource.CLOSED) {
+            setTimeout(subscribeToChanges, 30000);
+        }
+    };
+}
+
+async function refreshCurrentPage() {
+    switch (currentPage) {
+        case 'dashboard':
+            await Promise.all([loadStats(), loadDashboardData()]);
+            break;
+        case 'tasks':
+            await Promise.all([loadStats(), loadTasks()]);
+            break;
+        case 'notes':
+            await Promise.all([loadStats(), loadNotes()]);
+            break;
+        case 'projects':
+            await Promise.all([loadStats(), loadProjects()]);
+            break;
+        default:
+            await loadStats();
+    }
+}
+
+// Replace changed items, drop deleted ones, and keep the server's newest-first order
+function applyChanges(items, changed, deletedIds, sortKey) {
+    if (!changed.length && !deletedIds.length) {
+        return items;
+    }
+    const replaced = new Set(deletedIds.concat(changed.map(item => item.id)));
+    return items
+        .filter(item => !replaced.has(item.id))
+        .concat(changed)
+        .sort((a, b) => b[sortKey].localeCompare(a[sortKey]) || b.id.localeCompare(a.id));
+}
+
 // Rendering functions
 function renderDashboardTasks(tasks) {
     const container = document.getElementById('today-tasks');
@@ -978,7 +1092,8 @@ function createSearchSection(title, items, type) {
                 <div class="result-header">
                     <div class="result-title">${escapeHtml(item.title)}</div>
                 </div>
-                ${item.content ? `<div class="result-description">${escapeHtml(item.content.substring(0, 150))}${item.content.length > 150 ? '...' : ''}</div>` : ''}
+                ${item.snippet ? `<div class="result-description">${highlightSnippet(item.snippet)}</div>` :
+                  item.content ? `<div class="result-description">${escapeHtml(item.content.substring(0, 150))}${item.content.length > 150 ? '...' : ''}</div>` : ''}
                 <div class="result-meta">
                     Updated: ${formatDate(item.updated_at)} • 
                     ${item.package_id ? `Project: ${getProjectName(item.package_id)} • ` : ''}
@@ -1066,9 +1181,9 @@ function formatDueDate(dateString) {
 }
 
 function calculateProjectProgress(project) {
-    // This would calculate actual progress based on completed tasks
-    // For now, return a placeholder
-    return Math.floor(Math.random() * 100);
+    // Share of completed tasks across the project and its sub-projects,
+    // computed server-side by /api/packages?rollup=1
+    return project.rollup ? project.rollup.progress : 0;
 }
 
 function getProjectName(projectId) {
@@ -1094,6 +1209,14 @@ function escapeHtml(text) {
     return div.innerHTML;
 }
 
+function highlightSnippet(snippet) {
+    // Search snippets wrap matches in \u0002...\u0003, which escaping leaves
+    // alone, so literal "<mark>" text in a note stays escaped
+    return escapeHtml(snippet)
+        .replace(/\u0002/g, '<mark>')
+        .replace(/\u0003/g, '</mark>');
+}
+
 function debounce(func, wait) {
     let timeout;
     return function executedFunction(...args) {
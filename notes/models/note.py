@@ -1,10 +1,12 @@
 import uuid
 from datetime import datetime
 from typing import Optional, List
-from dataclasses import dataclass, field
+from dataclasses import field
 
+from .base import model
 
-@dataclass
+
+@model
 class Note:
     title: str
     content: str = ""
@@ -0,0 +1,31 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+def get_config_path() -> Path:
+    """Get the path to the user configuration file."""
+    return Path.home() / '.notes' / 'config.json'
+
+
+def load_config() -> Dict[str, Any]:
+    """Load user preferences from ~/.notes/config.json, if it exists."""
+    config_path = get_config_path()
+    if not config_path.exists():
+        return {}
+    
+    with open(config_path, 'r', encoding='utf-8') as f:
+        try:
+            config = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid configuration file {config_path}: {e}")
+    return config if isinstance(config, dict) else {}
+
+
+def get_setting(key: str, env_var: str, default: Optional[Any] = None) -> Any:
+    """Read a setting, preferring the environment variable over the config file."""
+    value = os.environ.get(env_var)
+    if value:
+        return value
+    return load_config().get(key, default)
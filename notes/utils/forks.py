@@ -0,0 +1,26 @@
+import os
+
+
+class ForkSafe:
+    """Mixin for objects whose threads, locks or connections don't survive a fork.
+
+    An object built before forking worker processes (``notes server
+    --preload``) is inherited by every worker. Subclasses call
+    ``_check_fork()`` where they touch that per-process state; the first
+    call in a new process runs ``_after_fork()`` so the object starts
+    afresh there.
+    """
+
+    def __init__(self):
+        self._pid = os.getpid()
+
+    def _check_fork(self):
+        """Call _after_fork() if this is the first use in a forked child."""
+        pid = os.getpid()
+        if self._pid != pid:
+            self._pid = pid
+            self._after_fork()
+
+    def _after_fork(self):
+        """Reset the state inherited from the parent process."""
+        raise NotImplementedError
@@ -0,0 +1,22 @@
+import json
+from typing import Any, Dict, Iterable, Iterator, Union
+
+
+def dump_ndjson(records: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Serialize records as newline-delimited JSON, one line at a time."""
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def load_ndjson(lines: Iterable[Union[str, bytes]]) -> Iterator[Dict[str, Any]]:
+    """Parse newline-delimited JSON lazily, skipping blank lines."""
+    for number, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON on line {number}: {e}") from e
@@ -32,6 +32,12 @@ setup(
         "python-dateutil==2.8.2",
         "markdown==3.5.1",
     ],
+    extras_require={
+        "server": [
+            "gunicorn==21.2.0; platform_system != 'Windows'",
+            "waitress==2.1.2",
+        ],
+    },
     entry_points={
         "console_scripts": [
             "notes=notes.cli:cli",
@@ -0,0 +1,33 @@
+import pytest
+
+from notes.api.app import create_app
+from notes.database import Database
+
+
+@pytest.fixture(autouse=True)
+def home(tmp_path, monkeypatch):
+    """Point ~/.notes at a fresh directory for every test."""
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.delenv('NOTES_STORAGE_PROFILE', raising=False)
+    return tmp_path
+
+
+@pytest.fixture
+def db():
+    database = Database()
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config['TESTING'] = True
+    yield app
+    app.extensions['notes_writer'].close()
+    app.extensions['notes_pool'].close()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
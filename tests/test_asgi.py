@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+import pytest
+
+from notes.api.asgi import AsgiApp
+
+
+@pytest.fixture
+def asgi(app):
+    asgi = AsgiApp(app, threads=2)
+    yield asgi
+    app.extensions['notes_watcher'].stop()
+    asgi.close()
+
+
+def scope(method, path, query=b'', headers=()):
+    return {'type': 'http', 'method': method, 'path': path, 'query_string': query, 'headers': list(headers)}
+
+
+async def call(asgi, scope, body=b'', until=None):
+    """Send one request; collect the messages sent back, disconnecting once ``until(messages)``."""
+    sent = []
+    requests = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    gone = asyncio.Event()
+
+    async def receive():
+        if requests:
+            return requests.pop()
+        await gone.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+        if until is not None and until(sent):
+            gone.set()
+
+    await asyncio.wait_for(asgi(scope, receive, send), 10)
+    return sent
+
+
+def response(sent):
+    start = sent[0]
+    headers = {name.decode(): value.decode() for name, value in start['headers']}
+    return start['status'], headers, b''.join(message.get('body', b'') for message in sent[1:])
+
+
+def test_reads_and_writes_go_through_the_flask_app(asgi):
+    body = json.dumps({'title': 'Over ASGI'}).encode()
+    created = asyncio.run(call(asgi, scope('POST', '/api/tasks', headers=[(b'content-type', b'application/json')]), body))
+    assert response(created)[0] == 201
+
+    status, headers, data = response(asyncio.run(call(asgi, scope('GET', '/api/tasks', b'limit=5'))))
+    assert status == 200
+    assert [task['title'] for task in json.loads(data)] == ['Over ASGI']
+
+    cached = asyncio.run(call(asgi, scope('GET', '/api/tasks', b'limit=5', [(b'if-none-match', headers['etag'].encode())])))
+    assert response(cached)[0] == 304
+
+
+def test_event_stream_runs_on_the_loop(asgi):
+    def has_change_event(sent):
+        return any(b'event: change' in message.get('body', b'') for message in sent)
+
+    status, headers, data = response(asyncio.run(call(asgi, scope('GET', '/api/events'), until=has_change_event)))
+    assert status == 200
+    assert headers['content-type'].startswith('text/event-stream')
+    assert headers['cache-control'] == 'no-cache'
+    assert data.startswith(b'retry: ')
+    assert b'event: change' in data
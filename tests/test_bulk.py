@@ -0,0 +1,84 @@
+import sqlite3
+
+import pytest
+
+from notes.models import Note, Package, Task
+
+
+def test_bulk_create_and_update(db):
+    package = db.bulk_create_packages([Package(name='Home')])[0]
+    tasks = db.bulk_create_tasks(Task(title=f'Task {i}', package_id=package.id) for i in range(3))
+    note = db.bulk_create_notes([Note(title='Plan', linked_tasks=[tasks[0].id])])[0]
+    assert db.count_tasks({'package_id': package.id}) == 3
+
+    tasks[0].title = 'Renamed'
+    note.content = 'Details'
+    package.status = 'completed'
+    assert db.bulk_update([tasks[0], note, package]) == 3
+    assert db.get_task(tasks[0].id).title == 'Renamed'
+    assert db.get_note(note.id).content == 'Details'
+    assert db.get_package(package.id).status == 'completed'
+
+
+def test_bulk_update_rejects_other_objects(db):
+    with pytest.raises(TypeError):
+        db.bulk_update([object()])
+
+
+def test_bulk_delete_counts_per_table(db):
+    tasks = db.bulk_create_tasks([Task(title='A'), Task(title='B')])
+    note = db.bulk_create_notes([Note(title='N')])[0]
+    deleted = db.bulk_delete(task_ids=[task.id for task in tasks] + ['missing'], note_ids=[note.id])
+    assert deleted == {'tasks': 2, 'notes': 1, 'packages': 0}
+    assert db.count_tasks() == 0
+
+
+def test_bulk_create_is_atomic(db):
+    existing = db.create_task(Task(title='Existing'))
+    with pytest.raises(sqlite3.IntegrityError):
+        # The second insert collides on the primary key
+        db.bulk_create_tasks([Task(title='New'), Task(title='Copy', id=existing.id)])
+    assert [task.title for task in db.list_tasks()] == ['Existing']
+
+
+def test_batch_endpoint(client):
+    task = client.post('/api/tasks', json={'title': 'Old'}).get_json()
+    doomed = client.post('/api/notes', json={'title': 'Doomed'}).get_json()
+
+    response = client.post('/api/batch', json={
+        'create': {'tasks': [{'title': 'One'}, {'title': 'Two'}], 'packages': [{'name': 'Work'}]},
+        'update': {'tasks': [{'id': task['id'], 'status': 'completed'}]},
+        'delete': {'notes': [doomed['id']]},
+    })
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [item['title'] for item in body['created']['tasks']] == ['One', 'Two']
+    assert body['updated']['tasks'][0]['status'] == 'completed'
+    assert body['deleted']['notes'] == 1
+    assert len(client.get('/api/tasks').get_json()) == 3
+    assert client.get('/api/notes').get_json() == []
+
+
+def test_batch_writes_nothing_when_an_item_fails(client):
+    task = client.post('/api/tasks', json={'title': 'Keep'}).get_json()
+
+    missing = client.post('/api/batch', json={
+        'create': {'tasks': [{'title': 'Never'}]},
+        'update': {'tasks': [{'id': 'no-such-task', 'title': 'x'}]},
+    })
+    assert missing.status_code == 404
+
+    invalid = client.post('/api/batch', json={
+        'create': {'tasks': [{'title': 'Never either'}]},
+        'update': {'tasks': [{'id': task['id'], 'status': 'bogus'}]},
+        'delete': {'tasks': [task['id']]},
+    })
+    assert invalid.status_code == 400
+
+    assert [item['title'] for item in client.get('/api/tasks').get_json()] == ['Keep']
+
+
+def test_batch_requires_titles(client):
+    response = client.post('/api/batch', json={'create': {'notes': [{'content': 'untitled'}]}})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Title is required for notes'
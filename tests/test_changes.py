@@ -0,0 +1,50 @@
+from notes.models import Note, Package, Task
+
+
+def test_changes_since_reports_updates_and_tombstones(db):
+    kept = db.create_task(Task(title='Kept'))
+    gone = db.create_task(Task(title='Gone'))
+    note = db.create_note(Note(title='Note'))
+    package = db.create_package(Package(name='Package'))
+    since = db.current_revision()
+
+    kept.title = 'Kept and renamed'
+    db.update_task(kept)
+    db.delete_task(gone.id)
+    db.delete_note(note.id)
+    db.delete_package(package.id)
+
+    changes = db.changes_since(since)
+    assert [task.title for task in changes['tasks']] == ['Kept and renamed']
+    assert changes['notes'] == changes['packages'] == []
+    assert changes['deleted'] == {'tasks': [gone.id], 'notes': [note.id], 'packages': [package.id]}
+    assert changes['revision'] > since
+
+    again = db.changes_since(changes['revision'])
+    assert again['tasks'] == [] and again['deleted'] == {'tasks': [], 'notes': [], 'packages': []}
+
+
+def test_recreated_item_is_not_reported_deleted(db):
+    task = db.create_task(Task(title='Back'))
+    since = db.current_revision()
+    db.delete_task(task.id)
+    db.create_task(task)
+
+    changes = db.changes_since(since)
+    assert [item.id for item in changes['tasks']] == [task.id]
+    assert changes['deleted']['tasks'] == []
+
+
+def test_changes_endpoint(client):
+    start = client.get('/api/changes').get_json()
+    assert set(start) == {'revision'}
+
+    task = client.post('/api/tasks', json={'title': 'Synced'}).get_json()
+    client.delete(f"/api/tasks/{task['id']}")
+    client.post('/api/notes', json={'title': 'Fresh'})
+
+    changes = client.get(f"/api/changes?since={start['revision']}").get_json()
+    assert changes['tasks'] == []
+    assert [note['title'] for note in changes['notes']] == ['Fresh']
+    assert changes['deleted']['tasks'] == [task['id']]
+    assert client.get('/api/changes?since=soon').status_code == 400
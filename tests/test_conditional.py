@@ -0,0 +1,101 @@
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+import notes.api.app
+
+
+def create_tasks(client, count):
+    return [client.post('/api/tasks', json={'title': f'Task {i}'}).get_json()['id'] for i in range(count)]
+
+
+def follow_pages(client, url):
+    """GET ``url`` and every rel="next" page after it; return the IDs in order."""
+    ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        ids.extend(item['id'] for item in response.get_json())
+        link = response.headers.get('Link')
+        url = link[1:link.index('>')] if link else None
+    return ids
+
+
+@pytest.mark.parametrize('order', ['agenda', 'completed_last'])
+def test_other_orders_page_by_offset(client, order):
+    create_tasks(client, 5)
+
+    response = client.get(f'/api/tasks?order={order}&limit=2')
+    assert 'X-Next-Cursor' not in response.headers
+    assert response.headers['X-Next-Offset'] == '2'
+    assert parse_qs(urlsplit(response.headers['Link'][1:].split('>')[0]).query)['offset'] == ['2']
+
+    everything = [task['id'] for task in client.get(f'/api/tasks?order={order}').get_json()]
+    assert follow_pages(client, f'/api/tasks?order={order}&limit=2') == everything
+
+
+def test_etag_answers_304_until_a_write(client):
+    create_tasks(client, 2)
+    response = client.get('/api/tasks')
+    etag = response.headers['ETag']
+    assert etag.startswith('W/')
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+    cached = client.get('/api/tasks', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.data == b''
+    assert cached.headers['ETag'] == etag
+
+    # A write to another table leaves the task list's validator alone
+    client.post('/api/notes', json={'title': 'Unrelated'})
+    assert client.get('/api/tasks', headers={'If-None-Match': etag}).status_code == 304
+
+    client.post('/api/tasks', json={'title': 'New'})
+    fresh = client.get('/api/tasks', headers={'If-None-Match': etag})
+    assert fresh.status_code == 200
+    assert fresh.headers['ETag'] != etag
+    assert len(fresh.get_json()) == 3
+
+
+def test_if_modified_since(client, monkeypatch):
+    create_tasks(client, 1)
+    assert 'Last-Modified' in client.get('/api/tasks').headers
+    now = datetime.now(timezone.utc)
+    later = format_datetime(now + timedelta(minutes=1), usegmt=True)
+    earlier = format_datetime(now - timedelta(days=1), usegmt=True)
+
+    # Another write could still land in the second of the last one
+    assert client.get('/api/tasks', headers={'If-Modified-Since': later}).status_code == 200
+
+    clock = time.time
+    monkeypatch.setattr(time, 'time', lambda: clock() + 2)
+    assert client.get('/api/tasks', headers={'If-Modified-Since': later}).status_code == 304
+    assert client.get('/api/tasks', headers={'If-Modified-Since': earlier}).status_code == 200
+
+
+def test_stats_validator_changes_with_the_date(client, monkeypatch):
+    tomorrow = datetime.now() + timedelta(days=1)
+    client.post('/api/tasks', json={'title': 'Due', 'due_date': tomorrow.isoformat(timespec='seconds')})
+    etag = client.get('/api/stats').headers['ETag']
+    assert client.get('/api/stats', headers={'If-None-Match': etag}).status_code == 304
+
+    class Later(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.now(tz) + timedelta(days=2)
+
+    monkeypatch.setattr(notes.api.app, 'datetime', Later)
+    later = client.get('/api/stats', headers={'If-None-Match': etag})
+    assert later.status_code == 200
+    assert later.headers['ETag'] != etag
+
+
+def test_overdue_filter_validator_depends_on_the_clock(client):
+    client.post('/api/tasks', json={'title': 'Due', 'due_date': '2000-01-01T00:00:00'})
+    plain = client.get('/api/tasks').headers['ETag']
+    overdue = client.get('/api/tasks?overdue=1')
+    assert [task['title'] for task in overdue.get_json()] == ['Due']
+    assert overdue.headers['ETag'] != plain
@@ -0,0 +1,68 @@
+import pytest
+
+from notes.api.app import create_app
+from notes.api.events import change_event, requested_revision
+
+
+@pytest.fixture
+def watcher(app):
+    yield app.extensions['notes_watcher']
+    app.extensions['notes_watcher'].stop()
+
+
+def open_stream(client, **kwargs):
+    response = client.get('/api/events', buffered=False, **kwargs)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    return response, (chunk.decode() for chunk in response.response)
+
+
+def test_stream_sends_a_change_event_after_a_write(client, watcher):
+    response, events = open_stream(client)
+    assert next(events).startswith('retry: ')
+    first = next(events)
+    current = watcher.revision
+    assert first == change_event(current)
+
+    client.post('/api/tasks', json={'title': 'Pushed'})
+    event = next(events)
+    assert event.startswith('id: ') and 'event: change' in event
+    assert int(event.split('\n')[0][4:]) > current
+    response.close()
+
+
+def test_client_that_is_up_to_date_gets_no_event(client, watcher):
+    revision = client.get('/api/changes').get_json()['revision']
+    response, events = open_stream(client, headers={'Last-Event-ID': str(revision)})
+    next(events)
+    client.post('/api/notes', json={'title': 'Pushed'})
+    assert next(events) == change_event(revision + 1)
+    response.close()
+
+
+def test_stream_cap_answers_503():
+    app = create_app(max_streams=1)
+    client = app.test_client()
+    try:
+        first = client.get('/api/events', buffered=False)
+        assert first.status_code == 200
+
+        refused = client.get('/api/events')
+        assert refused.status_code == 503
+        assert refused.headers['Retry-After'] == '30'
+
+        first.close()
+        again = client.get('/api/events', buffered=False)
+        assert again.status_code == 200
+        again.close()
+    finally:
+        app.extensions['notes_watcher'].stop()
+        app.extensions['notes_writer'].close()
+        app.extensions['notes_pool'].close()
+
+
+@pytest.mark.parametrize('last_event_id, since, expected', [
+    ('7', None, 7), (None, '3', 3), ('7', '3', 7), (None, None, None), ('soon', None, None),
+])
+def test_requested_revision(last_event_id, since, expected):
+    assert requested_revision(last_event_id, since) == expected
@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+import notes.utils.forks
+from notes.api.events import ChangeWatcher
+from notes.database import ConnectionPool
+from notes.database.database import remove_commit_listener
+from notes.database.writer import WriteQueue
+
+
+@pytest.fixture
+def forked(monkeypatch):
+    """Make the objects built so far look like they came from a parent process."""
+    def fork():
+        pid = os.getpid() + 1
+        monkeypatch.setattr(notes.utils.forks.os, 'getpid', lambda: pid)
+    return fork
+
+
+def test_pool_abandons_inherited_connections(forked):
+    pool = ConnectionPool()
+    inherited = pool.acquire()
+    pool.release(inherited)
+
+    forked()
+    conn = pool.acquire()
+    assert conn is not inherited
+    assert pool._inherited == [inherited]
+    pool.release(conn)
+    pool.close()
+
+
+def test_writer_starts_its_own_thread(db, forked):
+    writer = WriteQueue()
+    revision = writer.run(lambda db: db.current_revision())
+    inherited, inherited_jobs = writer._thread, writer._jobs
+
+    forked()
+    assert writer.run(lambda db: db.current_revision()) == revision
+    assert writer._thread is not inherited
+    writer.close()
+    # In a real fork the parent's thread would not exist; here it must be stopped
+    inherited_jobs.put(None)
+    inherited.join()
+
+
+def test_watcher_starts_afresh(forked):
+    watcher = ChangeWatcher()
+    watcher.start()
+    inherited, inherited_wake = watcher._thread, watcher._wake
+
+    forked()
+    watcher.start()
+    assert watcher._thread is not inherited
+    watcher.stop()
+    # In a real fork the parent's thread would not exist; here it must be stopped
+    remove_commit_listener(inherited_wake.set)
+    inherited_wake.set()
+    inherited.join()
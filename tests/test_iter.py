@@ -0,0 +1,25 @@
+import pytest
+
+from notes.models import Note, Package, Task
+
+
+def test_iterators_match_the_lists(db):
+    db.bulk_create_tasks(Task(title=f'Task {i}') for i in range(5))
+    db.bulk_create_notes(Note(title=f'Note {i}') for i in range(3))
+    db.create_package(Package(name='Work'))
+
+    assert [task.id for task in db.iter_tasks(batch_size=2)] == [task.id for task in db.list_tasks()]
+    assert [note.id for note in db.iter_notes(batch_size=2)] == [note.id for note in db.list_notes()]
+    assert [package.name for package in db.iter_packages()] == ['Work']
+
+
+def test_iterators_are_lazy(db):
+    tasks = db.iter_tasks()
+    db.create_task(Task(title='Late'))
+    assert [task.title for task in tasks] == ['Late']
+
+
+@pytest.mark.parametrize('method', ['iter_tasks', 'iter_notes', 'iter_packages'])
+def test_bad_cursor_raises_at_call_time(db, method):
+    with pytest.raises(ValueError):
+        getattr(db, method)(limit=2, cursor='not-a-cursor')
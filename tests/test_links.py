@@ -0,0 +1,53 @@
+from notes.database.database import UPSERT_NOTE
+from notes.models import Note, Task
+
+
+def test_links_in_both_directions(db):
+    first = db.create_task(Task(title='First'))
+    second = db.create_task(Task(title='Second'))
+    db.create_note(Note(title='Both', linked_tasks=[first.id, second.id]))
+    db.create_note(Note(title='One', linked_tasks=[first.id]))
+
+    assert sorted(note.title for note in db.notes_for_task(first.id)) == ['Both', 'One']
+    assert [note.title for note in db.notes_for_task(second.id)] == ['Both']
+    note = db.notes_for_task(second.id)[0]
+    assert sorted(task.title for task in db.tasks_for_note(note.id)) == ['First', 'Second']
+
+
+def test_links_follow_note_updates_and_deletes(db):
+    task = db.create_task(Task(title='Task'))
+    note = db.create_note(Note(title='Note', linked_tasks=[task.id]))
+
+    note.linked_tasks = []
+    db.update_note(note)
+    assert db.notes_for_task(task.id) == []
+
+    note.linked_tasks = [task.id]
+    db.update_note(note)
+    db.delete_note(note.id)
+    assert db.notes_for_task(task.id) == []
+
+
+def test_links_to_deleted_tasks_are_skipped(db):
+    task = db.create_task(Task(title='Gone'))
+    note = db.create_note(Note(title='Note', linked_tasks=[task.id]))
+    db.delete_task(task.id)
+    assert db.tasks_for_note(note.id) == []
+
+
+def test_link_endpoints(client):
+    task = client.post('/api/tasks', json={'title': 'Task'}).get_json()
+    note = client.post('/api/notes', json={'title': 'Note', 'linked_tasks': [task['id']]}).get_json()
+
+    assert [item['id'] for item in client.get(f"/api/tasks/{task['id']}/notes").get_json()] == [note['id']]
+    assert [item['id'] for item in client.get(f"/api/notes/{note['id']}/tasks").get_json()] == [task['id']]
+    assert client.get('/api/tasks/missing/notes').status_code == 404
+    assert client.get('/api/notes/missing/tasks').status_code == 404
+
+
+def test_links_survive_upserts_and_repeated_ids(db):
+    task = db.create_task(Task(title='Task'))
+    note = db.create_note(Note(title='Note', linked_tasks=[task.id, task.id]))
+    db.conn.execute(UPSERT_NOTE, db._note_insert_params(note))
+    db.conn.commit()
+    assert [item.id for item in db.tasks_for_note(note.id)] == [task.id]
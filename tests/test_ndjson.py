@@ -0,0 +1,86 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from notes.cli import cli
+from notes.database import Database
+from notes.models import Note, Package, Task
+from notes.utils.ndjson import dump_ndjson, load_ndjson
+
+
+def populate(db):
+    package = db.create_package(Package(name='Work', description='Office'))
+    task = db.create_task(Task(title='Report', package_id=package.id, tags=['q3']))
+    db.create_note(Note(title='Outline', content='Intro\nBody', linked_tasks=[task.id], package_id=package.id))
+
+
+def snapshot(db):
+    return sorted(json.dumps(record, sort_keys=True) for record in db.export_records())
+
+
+def test_export_import_round_trip(db, tmp_path):
+    populate(db)
+    exported = ''.join(dump_ndjson(db.export_records()))
+    assert [record['type'] for record in load_ndjson(exported.splitlines(True))] == ['package', 'task', 'note']
+
+    before = snapshot(db)
+    for table in ('notes', 'tasks', 'packages'):
+        db.conn.execute(f'DELETE FROM {table}')
+    db.conn.commit()
+
+    counts = db.import_records(load_ndjson(exported.splitlines(True)), chunk_size=2)
+    assert counts == {'package': 1, 'task': 1, 'note': 1}
+    assert snapshot(db) == before
+    # Imported rows are indexed like any other
+    assert [task.title for task in db.list_tasks({'tag': 'q3'})] == ['Report']
+    assert db.search('outline')['notes'][0].linked_tasks == [db.list_tasks()[0].id]
+
+
+def test_import_updates_existing_items(db):
+    populate(db)
+    records = list(db.export_records())
+    records[1]['title'] = 'Final report'
+    db.import_records(records)
+    assert [task.title for task in db.list_tasks()] == ['Final report']
+
+
+def test_invalid_record_is_reported_by_number(db):
+    populate(db)
+    records = list(db.export_records()) + [{'type': 'task', 'title': None}]
+    with pytest.raises(ValueError, match='^Invalid record 4: NOT NULL constraint failed: tasks.title$'):
+        db.import_records(records)
+
+
+def test_api_import_rejects_constraint_violations(client):
+    body = '{"type": "task", "title": "Fine"}\n{"type": "task", "title": null}\n'
+    response = client.post('/api/import', data=body)
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid record 2: NOT NULL constraint failed: tasks.title'}
+    assert client.get('/api/tasks').get_json() == []
+
+
+def test_api_export_import(client):
+    client.post('/api/tasks', json={'title': 'Exported'})
+    exported = client.get('/api/export').data
+    response = client.post('/api/import', data=exported)
+    assert response.get_json() == {'imported': {'note': 0, 'package': 0, 'task': 1}}
+
+
+def test_cli_import_rejects_constraint_violations(tmp_path):
+    path = tmp_path / 'bad.ndjson'
+    path.write_text('{"type": "package", "name": null}\n', encoding='utf-8')
+    result = CliRunner().invoke(cli, ['import', str(path)])
+    assert result.exit_code == 1
+    assert 'Error: Invalid record 1: NOT NULL constraint failed: packages.name' in result.output
+    assert 'Traceback' not in result.output
+
+
+def test_cli_export_import(tmp_path):
+    with Database() as db:
+        populate(db)
+    path = tmp_path / 'export.ndjson'
+    runner = CliRunner()
+    assert runner.invoke(cli, ['export', str(path)]).exit_code == 0
+    result = runner.invoke(cli, ['import', str(path)])
+    assert result.output == 'Imported 1 packages, 1 tasks and 1 notes\n'
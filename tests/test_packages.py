@@ -0,0 +1,65 @@
+import pytest
+
+from notes.models import Note, Package, Task
+
+
+@pytest.fixture
+def tree(db):
+    """root > child > grandchild, with a task and a note in each."""
+    root = db.create_package(Package(name='Root'))
+    child = db.create_package(Package(name='Child', parent_id=root.id))
+    grandchild = db.create_package(Package(name='Grandchild', parent_id=child.id))
+    for package in (root, child, grandchild):
+        db.create_task(Task(title=f'{package.name} task', package_id=package.id))
+        db.create_note(Note(title=f'{package.name} note', package_id=package.id))
+    return root, child, grandchild
+
+
+def names(db):
+    return sorted(package.name for package in db.list_packages())
+
+
+def test_cascade_delete_removes_the_subtree(db, tree):
+    root, child, grandchild = tree
+    assert db.delete_package(child.id, cascade=True)
+    assert names(db) == ['Root']
+    assert [task.title for task in db.list_tasks()] == ['Root task']
+    assert [note.title for note in db.list_notes()] == ['Root note']
+
+
+def test_delete_without_cascade_reparents(db, tree):
+    root, child, grandchild = tree
+    assert db.delete_package(child.id)
+    assert db.get_package(grandchild.id).parent_id == root.id
+    task = next(task for task in db.list_tasks() if task.title == 'Child task')
+    assert task.package_id is None
+
+
+def test_tree_and_rollups(db, tree):
+    root, child, grandchild = tree
+    db.create_task(Task(title='Done', status='completed', package_id=grandchild.id))
+    assert [package.name for package in db.get_package_tree(child.id)] == ['Child', 'Grandchild']
+
+    rollup = db.package_rollup(root.id)
+    assert rollup['packages'] == 2
+    assert rollup['notes'] == 3
+    assert rollup['progress'] == 25
+
+
+def test_batch_delete_cascades_by_default(client, db, tree):
+    root, child, grandchild = tree
+    response = client.post('/api/batch', json={'delete': {'packages': [child.id]}})
+    assert response.status_code == 200
+    assert response.get_json()['deleted']['packages'] == 1
+    assert names(db) == ['Root']
+    assert {task.package_id for task in db.list_tasks()} == {root.id}
+
+
+def test_batch_delete_without_cascade_leaves_no_dangling_parents(client, db, tree):
+    root, child, grandchild = tree
+    response = client.post('/api/batch', json={'delete': {'packages': [child.id], 'cascade': False}})
+    assert response.status_code == 200
+    assert db.get_package(grandchild.id).parent_id == root.id
+    package_ids = {package.id for package in db.list_packages()}
+    for item in db.list_tasks() + db.list_notes():
+        assert item.package_id is None or item.package_id in package_ids
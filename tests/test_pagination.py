@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from notes.database.database import next_cursor
+from notes.models import Note, Task
+
+
+def create_tasks(client, count):
+    return [client.post('/api/tasks', json={'title': f'Task {i}'}).get_json()['id'] for i in range(count)]
+
+
+def follow_pages(client, url):
+    """GET ``url`` and every rel="next" page after it; return the IDs in order."""
+    ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        ids.extend(item['id'] for item in response.get_json())
+        link = response.headers.get('Link')
+        url = link[1:link.index('>')] if link else None
+    return ids
+
+
+def test_cursor_pages_match_the_full_list(db):
+    start = datetime(2024, 1, 1)
+    # Shared timestamps make the ID the tie-breaker
+    db.bulk_create_notes(Note(title=f'Note {i}', updated_at=start + timedelta(minutes=i // 2)) for i in range(9))
+    everything = [note.id for note in db.list_notes()]
+
+    seen, cursor = [], None
+    while True:
+        page = db.list_notes(limit=4, cursor=cursor)
+        seen.extend(note.id for note in page)
+        cursor = next_cursor(page, 4)
+        if cursor is None:
+            break
+    assert seen == everything
+
+
+def test_offset_pages(db):
+    db.bulk_create_tasks(Task(title=f'Task {i}') for i in range(5))
+    everything = [task.id for task in db.list_tasks()]
+    assert [task.id for task in db.list_tasks(limit=2, offset=2)] == everything[2:4]
+
+
+def test_bad_cursor_is_rejected(db):
+    with pytest.raises(ValueError):
+        db.list_tasks(limit=2, cursor='not-a-cursor')
+
+
+def test_cursor_pages_cover_every_task_once(client):
+    created = create_tasks(client, 7)
+
+    response = client.get('/api/tasks?limit=3')
+    cursor = response.headers['X-Next-Cursor']
+    assert response.headers['Link'] == f'</api/tasks?limit=3&cursor={cursor}>; rel="next"'
+
+    ids = follow_pages(client, '/api/tasks?limit=3')
+    assert ids == [task['id'] for task in client.get('/api/tasks').get_json()]
+    assert sorted(ids) == sorted(created)
+
+
+def test_cursor_pages_skip_items_created_meanwhile(client):
+    create_tasks(client, 4)
+    first = client.get('/api/tasks?limit=2')
+    create_tasks(client, 3)
+
+    link = first.headers['Link']
+    rest = follow_pages(client, link[1:link.index('>')])
+    seen = [task['id'] for task in first.get_json()] + rest
+    assert len(seen) == len(set(seen)) == 4
+
+
+def test_last_page_has_no_link(client):
+    create_tasks(client, 2)
+    response = client.get('/api/tasks?limit=5')
+    assert 'Link' not in response.headers
+    assert 'X-Next-Cursor' not in response.headers
+
+
+@pytest.mark.parametrize('query', ['limit=abc', 'limit=-1', 'offset=1.5', 'offset=-3', 'cursor=garbage'])
+def test_invalid_page_arguments(client, query):
+    response = client.get(f'/api/tasks?{query}')
+    assert response.status_code == 400
+    assert 'Invalid' in response.get_json()['error']
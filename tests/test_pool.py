@@ -0,0 +1,62 @@
+import pytest
+
+from notes.database import ConnectionPool
+from notes.models import Package
+
+
+def test_pool_reuses_released_connections():
+    pool = ConnectionPool(max_idle=1)
+    try:
+        conn = pool.acquire()
+        pool.release(conn)
+        assert pool.acquire() is conn
+
+        other = pool.acquire()
+        pool.release(conn)
+        # Beyond max_idle, released connections are closed
+        pool.release(other)
+        assert pool.acquire() is conn
+    finally:
+        pool.close()
+
+
+def test_release_rolls_back_an_open_transaction():
+    pool = ConnectionPool()
+    try:
+        conn = pool.acquire()
+        conn.execute('BEGIN')
+        conn.execute("INSERT INTO packages (id, name, status, created_at, updated_at) VALUES ('p', 'P', 'active', '', '')")
+        pool.release(conn)
+        conn = pool.acquire()
+        assert not conn.in_transaction
+        assert conn.execute('SELECT COUNT(*) FROM packages').fetchone()[0] == 0
+        pool.release(conn)
+    finally:
+        pool.close()
+
+
+def test_api_requests_share_pooled_connections(app, client):
+    pool = app.extensions['notes_pool']
+    client.get('/api/tasks')
+    idle = list(pool._idle)
+    client.get('/api/notes')
+    assert pool._idle == idle
+
+
+def test_rolled_back_lookups_are_not_cached(db):
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.create_package(Package(name='Temporary'))
+            assert db.get_package_by_name('Temporary') is not None
+            raise RuntimeError
+    assert db.get_package_by_name('Temporary') is None
+
+
+def test_lookups_undone_by_a_savepoint_are_not_cached(db):
+    with db.transaction():
+        with pytest.raises(RuntimeError):
+            with db.savepoint():
+                db.create_package(Package(name='Temporary'))
+                assert db.get_package_by_name('Temporary') is not None
+                raise RuntimeError
+        assert db.get_package_by_name('Temporary') is None
@@ -0,0 +1,160 @@
+import json
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from notes.database import Database, create_tables
+from notes.database.schema import SCHEMA_VERSION, get_database_path, get_schema_version
+from notes.models import Task
+
+
+# The schema as the first release created it, before any migration
+BASELINE_SCHEMA = '''
+    CREATE TABLE tasks (
+        id TEXT PRIMARY KEY,
+        title TEXT NOT NULL,
+        description TEXT,
+        status TEXT NOT NULL DEFAULT 'pending',
+        priority TEXT NOT NULL DEFAULT 'medium',
+        due_date TEXT,
+        package_id TEXT,
+        tags TEXT,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        completed_at TEXT,
+        FOREIGN KEY (package_id) REFERENCES packages (id)
+    );
+    CREATE TABLE notes (
+        id TEXT PRIMARY KEY,
+        title TEXT NOT NULL,
+        content TEXT,
+        package_id TEXT,
+        linked_tasks TEXT,
+        tags TEXT,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        FOREIGN KEY (package_id) REFERENCES packages (id)
+    );
+    CREATE TABLE packages (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        description TEXT,
+        parent_id TEXT,
+        due_date TEXT,
+        status TEXT NOT NULL DEFAULT 'active',
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        FOREIGN KEY (parent_id) REFERENCES packages (id)
+    );
+    CREATE INDEX idx_tasks_status ON tasks(status);
+    CREATE INDEX idx_tasks_priority ON tasks(priority);
+    CREATE INDEX idx_tasks_package_id ON tasks(package_id);
+    CREATE INDEX idx_tasks_due_date ON tasks(due_date);
+    CREATE INDEX idx_notes_package_id ON notes(package_id);
+    CREATE INDEX idx_packages_parent_id ON packages(parent_id);
+    CREATE INDEX idx_packages_status ON packages(status);
+'''
+
+
+def baseline_database() -> sqlite3.Connection:
+    """Create a database the way the first release did, with a few rows in it."""
+    conn = sqlite3.connect(str(get_database_path()))
+    conn.executescript(BASELINE_SCHEMA)
+    now = datetime.now().replace(microsecond=0)
+    yesterday = (now - timedelta(days=1)).isoformat()
+    conn.execute(
+        'INSERT INTO packages VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        ('pkg-1', 'Garden', 'Outdoor work', None, None, 'active', now.isoformat(), now.isoformat())
+    )
+    conn.execute(
+        'INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        ('task-1', 'Plant tomatoes', 'By the fence', 'pending', 'high', yesterday, 'pkg-1',
+         json.dumps(['garden', 'spring']), now.isoformat(), now.isoformat(), None)
+    )
+    conn.execute(
+        'INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        ('task-2', 'Water lawn', None, 'completed', 'low', yesterday, None,
+         json.dumps(['garden']), now.isoformat(), now.isoformat(), now.isoformat())
+    )
+    conn.execute(
+        'INSERT INTO notes VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        ('note-1', 'Seed list', 'Cherry tomatoes and basil', 'pkg-1', json.dumps(['task-1']),
+         json.dumps(['spring']), now.isoformat(), now.isoformat())
+    )
+    conn.commit()
+    return conn
+
+
+def test_migrates_baseline_database():
+    conn = baseline_database()
+    assert get_schema_version(conn) == 0
+
+    create_tables(conn)
+
+    assert get_schema_version(conn) == SCHEMA_VERSION
+    conn.row_factory = sqlite3.Row
+    db = Database(conn)
+    task = db.get_task('task-1')
+    assert task.title == 'Plant tomatoes'
+    assert task.tags == ['garden', 'spring']
+    assert sorted(t.id for t in db.list_tasks({'tag': 'garden'})) == ['task-1', 'task-2']
+    # Dates written before the epoch columns existed are backfilled
+    assert [t.id for t in db.list_tasks({'overdue': True})] == ['task-1']
+    assert [t.id for t in db.tasks_for_note('note-1')] == ['task-1']
+    assert [n.id for n in db.search('tomato')['notes']] == ['note-1']
+    assert db.get_stats()['tasks']['overdue'] == 1
+    conn.close()
+
+
+def test_migration_is_idempotent():
+    conn = baseline_database()
+    create_tables(conn)
+    create_tables(conn)
+    conn.row_factory = sqlite3.Row
+    db = Database(conn)
+    assert db.count_tasks() == 2
+    assert [t.id for t in db.search('tomatoes')['tasks']] == ['task-1']
+    conn.close()
+
+
+def test_migrated_database_tracks_changes():
+    conn = baseline_database()
+    create_tables(conn)
+    conn.row_factory = sqlite3.Row
+    db = Database(conn)
+    since = db.current_revision()
+
+    task = db.get_task('task-1')
+    task.title = 'Plant peppers'
+    db.update_task(task)
+    db.delete_note('note-1')
+
+    changes = db.changes_since(since)
+    assert [t.title for t in changes['tasks']] == ['Plant peppers']
+    assert changes['deleted']['notes'] == ['note-1']
+    assert db.changes_since(changes['revision'])['tasks'] == []
+    conn.close()
+
+
+def test_date_range_filters(db):
+    db.create_task(Task(title='Early', due_date=datetime(2024, 3, 1, 9)))
+    db.create_task(Task(title='Late', due_date=datetime(2024, 3, 20)))
+    db.create_task(Task(title='Done', status='completed', due_date=datetime(2024, 3, 10),
+                        completed_at=datetime(2024, 3, 12)))
+    db.create_task(Task(title='Undated'))
+
+    def titles(filters):
+        return sorted(task.title for task in db.list_tasks(filters))
+
+    assert titles({'due_after': datetime(2024, 3, 1), 'due_before': datetime(2024, 3, 15)}) == ['Done', 'Early']
+    assert titles({'completed_since': datetime(2024, 3, 12)}) == ['Done']
+    assert titles({'overdue': True}) == ['Early', 'Late']
+
+
+def test_old_sqlite_is_rejected(monkeypatch):
+    monkeypatch.setattr(sqlite3, 'sqlite_version_info', (3, 30, 1))
+    conn = sqlite3.connect(':memory:')
+    with pytest.raises(sqlite3.NotSupportedError, match='3.31.0 or newer'):
+        create_tables(conn)
+    assert get_schema_version(conn) == 0
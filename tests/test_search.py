@@ -0,0 +1,92 @@
+import pytest
+from click.testing import CliRunner
+
+from notes.cli import cli
+from notes.database import Database
+from notes.database.schema import rebuild_search_index
+from notes.models import Note, Package, Task
+
+
+@pytest.fixture
+def items(db):
+    db.create_task(Task(title='Fix the garden fence', description='Needs new posts'))
+    db.create_task(Task(title='Call plumber', description='About the garden tap'))
+    db.create_note(Note(title='Fencing ideas', content='Cedar or pine'))
+    db.create_package(Package(name='Garden', description='Outdoor work'))
+    return db
+
+
+def titles(results, kind):
+    return [getattr(item, 'name' if kind == 'packages' else 'title') for item in results[kind]]
+
+
+def test_search_ranks_title_matches_first(items):
+    results = items.search('garden')
+    assert titles(results, 'tasks') == ['Fix the garden fence', 'Call plumber']
+    assert titles(results, 'packages') == ['Garden']
+    assert results['notes'] == []
+
+
+def test_search_matches_prefixes(items):
+    assert titles(items.search('fenc'), 'notes') == ['Fencing ideas']
+    assert titles(items.search('plum gard'), 'tasks') == ['Call plumber']
+
+
+def test_search_follows_updates_and_deletes(items):
+    task = items.search('plumber')['tasks'][0]
+    task.title = 'Call electrician'
+    items.update_task(task)
+    assert items.search('plumber')['tasks'] == []
+    assert titles(items.search('electrician'), 'tasks') == ['Call electrician']
+
+    items.delete_task(task.id)
+    assert items.search('electrician')['tasks'] == []
+
+
+def test_search_highlights_snippets(items):
+    results = items.search('cedar', highlight=('[', ']'))
+    note = results['notes'][0]
+    assert results['snippets'][note.id] == '[Cedar] or pine'
+
+
+def test_api_snippets_mark_matches_with_control_characters(client):
+    client.post('/api/notes', json={'title': 'Markup', 'content': 'Use <mark> for cedar'})
+    note = client.get('/api/search?q=cedar').get_json()['notes'][0]
+    assert note['snippet'] == 'Use <mark> for \x02cedar\x03'
+
+
+@pytest.mark.parametrize('query', ['"', 'garden"', 'NOT', 'fence AND', '(', 'title:garden', '*', 'a-b', '^x'])
+def test_search_accepts_fts_syntax_as_plain_text(items, query):
+    # Nothing the user types is passed through as FTS5 query syntax
+    items.search(query)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('garden fence', '"garden"* "fence"*'),
+    ('"quoted" OR stuff', '"quoted"* "OR"* "stuff"*'),
+    ('title:x*', '"title"* "x"*'),
+    ('  ', ''),
+    ('-^()', ''),
+])
+def test_fts_query(text, expected):
+    assert Database._fts_query(text) == expected
+
+
+def test_rebuild_search_index_repairs_renumbered_rows(items):
+    # What VACUUM may do: give rows new rowids without firing any trigger
+    items.conn.execute('UPDATE tasks SET rowid = rowid + 100')
+    items.conn.commit()
+    assert titles(items.search('plumber'), 'tasks') != ['Call plumber']
+
+    rebuild_search_index(items.conn)
+    items.conn.commit()
+    assert titles(items.search('plumber'), 'tasks') == ['Call plumber']
+
+
+def test_reindex_command(items):
+    items.conn.execute('UPDATE notes SET rowid = rowid + 100')
+    items.conn.commit()
+
+    result = CliRunner().invoke(cli, ['reindex'])
+    assert result.exit_code == 0, result.output
+    assert titles(items.search('cedar'), 'notes') == ['Fencing ideas']
@@ -0,0 +1,71 @@
+import pytest
+
+from notes.database.database import UPSERT_TASK
+from notes.models import Note, Task
+
+
+@pytest.fixture
+def tagged(db):
+    db.create_task(Task(title='Both', tags=['work', 'urgent']))
+    db.create_task(Task(title='Work', tags=['Work']))
+    db.create_task(Task(title='Home', tags=['home']))
+    db.create_note(Note(title='Minutes', tags=['work']))
+    return db
+
+
+def titles(items):
+    return sorted(item.title for item in items)
+
+
+def test_single_tag_is_case_insensitive(tagged):
+    assert titles(tagged.list_tasks({'tag': 'WORK'})) == ['Both', 'Work']
+    assert titles(tagged.list_notes({'tag': 'work'})) == ['Minutes']
+
+
+def test_all_and_any_modes(tagged):
+    assert titles(tagged.list_tasks({'tags': ['work', 'urgent']})) == ['Both']
+    assert titles(tagged.list_tasks({'tags': ['urgent', 'home'], 'tag_mode': 'any'})) == ['Both', 'Home']
+    assert titles(tagged.list_tasks({'tags': ['work', 'Work', ' work ']})) == ['Both', 'Work']
+    with pytest.raises(ValueError):
+        tagged.list_tasks({'tags': ['work'], 'tag_mode': 'some'})
+
+
+def test_index_follows_updates_and_deletes(tagged):
+    home = tagged.list_tasks({'tag': 'home'})[0]
+    home.tags = ['garden']
+    tagged.update_task(home)
+    assert tagged.list_tasks({'tag': 'home'}) == []
+    assert titles(tagged.list_tasks({'tag': 'garden'})) == ['Home']
+
+    tagged.delete_task(home.id)
+    assert tagged.list_tasks({'tag': 'garden'}) == []
+
+
+def test_tag_counts(tagged):
+    assert tagged.tag_counts() == [('work', 3), ('home', 1), ('urgent', 1)]
+    assert tagged.tag_counts('notes') == [('work', 1)]
+    with pytest.raises(ValueError):
+        tagged.tag_counts('packages')
+
+
+def test_tag_filters_over_the_api(client):
+    client.post('/api/tasks', json={'title': 'A', 'tags': ['x', 'y']})
+    client.post('/api/tasks', json={'title': 'B', 'tags': ['y']})
+
+    def listed(query):
+        return sorted(task['title'] for task in client.get(f'/api/tasks?{query}').get_json())
+
+    assert listed('tag=x,y') == ['A']
+    assert listed('tag=x&tag=y&match=any') == ['A', 'B']
+    assert client.get('/api/tags').get_json() == [{'name': 'y', 'count': 2}, {'name': 'x', 'count': 1}]
+
+
+def test_index_survives_upserts_and_repeated_tags(db):
+    task = db.create_task(Task(title='Task', tags=['shared', 'Shared ', 'other']))
+    db.create_task(Task(title='Other', tags=['shared']))
+    # An UPSERT's conflict handling overrides OR IGNORE inside triggers
+    task.tags = ['shared', 'new']
+    db.conn.execute(UPSERT_TASK, db._task_insert_params(task))
+    db.conn.commit()
+    assert titles(db.list_tasks({'tag': 'new'})) == ['Task']
+    assert db.tag_counts() == [('shared', 2), ('new', 1)]
@@ -0,0 +1,119 @@
+import sqlite3
+import threading
+
+import pytest
+
+from notes.database.database import add_commit_listener, remove_commit_listener
+from notes.database.writer import WriteQueue
+from notes.models import Task
+
+
+@pytest.fixture
+def writer():
+    queue = WriteQueue()
+    yield queue
+    queue.close()
+
+
+@pytest.fixture
+def commits():
+    """Count the commits made through Database in this process."""
+    count = []
+    listener = lambda: count.append(1)
+    add_commit_listener(listener)
+    yield count
+    remove_commit_listener(listener)
+
+
+def hold(writer):
+    """Keep the writer thread busy until the returned event is set, so that
+    jobs submitted meanwhile queue up for the next batch."""
+    release = threading.Event()
+    started = threading.Event()
+
+    def wait(db):
+        started.set()
+        release.wait(5)
+
+    blocker = writer.submit(wait)
+    started.wait(5)
+    return release, blocker
+
+
+def create(title):
+    return lambda db: db.create_task(Task(title=title)).id
+
+
+def test_run_returns_the_committed_result(writer, db):
+    task_id = writer.run(create('Written'))
+    assert db.get_task(task_id).title == 'Written'
+
+
+def test_queued_jobs_share_one_commit(writer, db, commits):
+    release, blocker = hold(writer)
+    futures = [writer.submit(create(f'Task {i}')) for i in range(10)]
+    release.set()
+    blocker.result()
+    ids = [future.result(5) for future in futures]
+
+    # One commit for the blocking job's batch, one for the ten queued behind it
+    assert len(commits) == 2
+    assert {task.id for task in db.list_tasks()} == set(ids)
+
+
+def test_max_batch_splits_large_batches(db, commits):
+    writer = WriteQueue(max_batch=4)
+    try:
+        release, blocker = hold(writer)
+        futures = [writer.submit(create(f'Task {i}')) for i in range(10)]
+        release.set()
+        for future in [blocker] + futures:
+            future.result(5)
+    finally:
+        writer.close()
+    assert len(commits) == 1 + 3
+    assert db.count_tasks() == 10
+
+
+def test_failing_job_only_undoes_its_own_writes(writer, db):
+    def fails(db):
+        db.create_task(Task(title='Undone'))
+        raise ValueError('no good')
+
+    release, blocker = hold(writer)
+    before = writer.submit(create('Before'))
+    failing = writer.submit(fails)
+    after = writer.submit(create('After'))
+    release.set()
+
+    assert before.result(5) and after.result(5)
+    with pytest.raises(ValueError, match='no good'):
+        failing.result(5)
+    assert sorted(task.title for task in db.list_tasks()) == ['After', 'Before']
+
+
+def test_database_errors_are_isolated_too(writer, db):
+    def duplicate(db):
+        db.conn.execute('INSERT INTO tasks (id, title, created_at, updated_at) VALUES (?, ?, ?, ?)',
+                        (task_id, 'Copy', 'x', 'x'))
+
+    task_id = writer.run(create('Original'))
+    release, blocker = hold(writer)
+    failing = writer.submit(duplicate)
+    other = writer.submit(create('Other'))
+    release.set()
+
+    with pytest.raises(sqlite3.IntegrityError):
+        failing.result(5)
+    assert db.get_task(other.result(5)).title == 'Other'
+    assert db.get_task(task_id).title == 'Original'
+
+
+def test_close_finishes_queued_jobs(db):
+    writer = WriteQueue()
+    release, blocker = hold(writer)
+    futures = [writer.submit(create(f'Task {i}')) for i in range(3)]
+    release.set()
+    writer.close()
+    assert all(future.done() for future in futures)
+    assert db.count_tasks() == 3